@@ -22,8 +22,11 @@ and add any Glean paths that were only accessed via alias.
 import re
 import sys
 import argparse
+from bisect import bisect_right
 from pathlib import Path
 
+from render_jinja import render_sql
+
 
 GLEAN_SUFFIXES = ("_live", "_stable")
 
@@ -36,6 +39,81 @@ _TABLE_DATASET_SUFFIXES = (
 # Note: "safe" is omitted here — it is already excluded via first_segment_keywords.
 _UDF_NAMESPACES = {"mozfun", "net", "st", "keys", "map", "mode"}
 
+# Keywords that are never valid as the FIRST segment of a Glean field path.
+# Middle segments (e.g. "string" in metrics.string.newtab_locale) are
+# Glean metric type names and must NOT be filtered out.
+_FIRST_SEGMENT_KEYWORDS = {
+    # DML / clauses
+    "select", "from", "where", "group", "by", "order", "having",
+    "join", "left", "right", "inner", "outer", "cross", "on", "as", "and",
+    "or", "not", "in", "is", "null", "true", "false", "case", "when",
+    "then", "else", "end", "distinct", "limit", "offset", "union",
+    "all", "with", "qualify", "over", "partition", "rows", "range",
+    "between", "like", "ilike", "exists", "lateral", "unnest",
+    # Types (valid as first segment only when bare, e.g. CAST(x AS STRING))
+    "int64", "float64", "numeric", "bool", "bytes",
+    # Conditionals / casting
+    "if", "ifnull", "nullif", "coalesce", "cast", "safe_cast",
+    # Aggregation / math / analytic functions
+    "count", "sum", "avg", "min", "max", "countif",
+    "approx_count_distinct", "approx_quantiles", "any_value",
+    "array_agg", "array_concat_agg", "string_agg",
+    "abs", "ceil", "floor", "round", "trunc", "mod", "div",
+    "pow", "power", "sqrt", "log", "log10", "exp", "ln",
+    "greatest", "least", "sign",
+    "row_number", "rank", "dense_rank", "ntile",
+    "lag", "lead", "first_value", "last_value", "nth_value",
+    "cumulative_dist", "percent_rank",
+    # Date / time functions
+    "current_date", "current_timestamp", "current_time",
+    "extract", "date_sub", "date_add", "date_trunc", "date_diff",
+    "timestamp_sub", "timestamp_add", "timestamp_trunc", "timestamp_diff",
+    "time_trunc", "time_diff", "datetime_trunc", "datetime_diff",
+    "date_from_unix_date", "unix_date",
+    "format_date", "format_timestamp", "parse_date", "parse_timestamp",
+    "generate_date_array", "generate_timestamp_array",
+    # String functions
+    "concat", "substr", "substring", "trim", "ltrim", "rtrim",
+    "lower", "upper", "length", "replace", "split", "starts_with",
+    "ends_with", "contains_substr", "instr", "lpad", "rpad",
+    "regexp_replace", "regexp_extract", "regexp_extract_all",
+    "regexp_contains", "regexp_instr",
+    "to_base64", "from_base64", "to_hex", "from_hex",
+    # JSON / array functions
+    "json_extract", "json_extract_scalar", "json_extract_array",
+    "json_query", "json_value", "json_value_array",
+    "to_json_string", "parse_json", "json_type",
+    "array_length", "array_concat", "array_reverse",
+    "array_to_string", "generate_array",
+    # Misc
+    "safe_divide", "ieee_divide",
+    "farm_fingerprint", "md5", "sha256", "sha512",
+    "generate_uuid", "session_user", "error",
+    "interval", "day", "week", "month", "year", "hour", "minute", "second",
+    "microsecond", "millisecond",
+}
+
+# Additional words that are never column references when they appear bare
+_BARE_KEYWORDS = _FIRST_SEGMENT_KEYWORDS | {
+    "asc", "desc", "nulls", "first", "last", "respect", "ignore", "using",
+    "full", "window", "except", "replace", "struct", "array", "string",
+    "date", "datetime", "time", "timestamp", "float", "integer", "boolean",
+    "int", "bignumeric", "json", "geography", "quarter", "isoweek", "isoyear",
+    "dayofweek", "dayofyear", "safe", "ordinal", "tablesample", "system",
+    "percent", "pivot", "unpivot", "for", "create", "view", "or", "temp",
+    "temporary", "table", "function", "returns", "language", "declare", "set",
+    "insert", "into", "values", "merge", "update", "delete", "options",
+    "current_datetime", "preceding", "following", "unbounded", "current", "row",
+}
+
+# Words that can follow a FROM/JOIN table reference but are not aliases
+_ALIAS_STOPWORDS = {
+    "where", "on", "using", "left", "right", "inner", "outer", "full", "cross",
+    "join", "group", "order", "limit", "qualify", "window", "union", "having",
+    "for", "tablesample", "except", "intersect", "pivot", "unpivot", "as",
+    "select", "with",
+}
+
 
 def read_sql(path: str) -> str:
     return Path(path).read_text()
@@ -49,7 +127,7 @@ def strip_comments(sql: str) -> str:
 
 
 def strip_jinja(sql: str) -> str:
-    """Remove Jinja2 template tags and variable expressions."""
+    """Remove Jinja2 template tags and variable expressions (what render_sql() left unrendered)."""
     # Remove block tags: {% ... %}
     sql = re.sub(r"\{%-?\s*.*?-?%\}", " ", sql, flags=re.DOTALL)
     # Remove variable expressions: {{ ... }}
@@ -91,6 +169,145 @@ def extract_source_tables(sql: str) -> list[str]:
     return list(dict.fromkeys(results))
 
 
+def extract_table_aliases(sql: str) -> dict[str, str]:
+    """Map table aliases to the table they name (FROM/JOIN <table> [AS] <alias>)."""
+    # The alias is a lookahead so a following `JOIN` is not consumed as one
+    pattern = r"(?:FROM|JOIN)\s+([`a-zA-Z0-9_\-][`a-zA-Z0-9_\-\.]*)(?=\s+(?:AS\s+)?([a-zA-Z_]\w*))"
+    aliases = {}
+    for table, alias in re.findall(pattern, sql, re.IGNORECASE):
+        clean = table.replace("`", "")
+        if clean.count(".") >= 1 and alias.lower() not in _ALIAS_STOPWORDS:
+            aliases[alias] = clean
+    return aliases
+
+
+def extract_unnest_aliases(sql: str) -> dict[str, str]:
+    """Map UNNEST aliases to the repeated field they iterate (UNNEST(<path>) [AS] <alias>)."""
+    pattern = r"UNNEST\s*\(\s*([a-zA-Z_][\w\.]*)\s*\)\s+(?:AS\s+)?([a-zA-Z_]\w*)"
+    return {
+        alias: path
+        for path, alias in re.findall(pattern, sql, re.IGNORECASE)
+        if alias.lower() not in _ALIAS_STOPWORDS
+    }
+
+
+def extract_cte_names(sql: str) -> list[str]:
+    """Return the names of common table expressions (WITH <name> AS (...), <name> AS (...))."""
+    return re.findall(r"(?:\bWITH|,)\s*([a-zA-Z_]\w*)\s+AS\s*\(", sql, re.IGNORECASE)
+
+
+# Clause keywords and parentheses, for finding where SELECT-list aliases can be referenced
+_CLAUSE_RE = re.compile(
+    r"\(|\)|\b(?:SELECT|FROM|WHERE|GROUP\s+BY|HAVING|QUALIFY|ORDER\s+BY|WINDOW|LIMIT|JOIN|ON|USING"
+    r"|UNION|EXCEPT|INTERSECT)\b",
+    re.IGNORECASE,
+)
+_ALIAS_CLAUSES = {"GROUP BY", "ORDER BY", "QUALIFY"}
+
+# The part and FROM of EXTRACT(<part> FROM <expr>), which would otherwise read as a FROM clause
+_EXTRACT_PART_RE = re.compile(r"(\bEXTRACT\s*\()(\s*\w+(?:\s*\(\s*\w+\s*\))?\s+FROM\b)", re.IGNORECASE)
+
+
+def alias_reference_scopes(sql: str) -> tuple[list[int], list[bool]]:
+    """
+    Mark where a bare name may be a SELECT-list alias rather than a source column.
+
+    BigQuery resolves output aliases only as whole items of GROUP BY, ORDER BY and
+    QUALIFY (not inside function calls, window specifications or WHERE). Returns
+    sorted change positions and the state from each position on; look a position
+    up with bisect_right(positions, pos) - 1.
+    """
+    positions, states = [0], [False]
+    stack = [[False, False]]  # per parenthesis depth: [in alias clause, is a window specification]
+    for m in _CLAUSE_RE.finditer(sql):
+        text = m.group()
+        if text == "(":
+            window = bool(re.search(r"\bOVER\s*$", sql[max(0, m.start() - 8):m.start()], re.IGNORECASE))
+            stack.append([False, window])
+        elif text == ")":
+            if len(stack) > 1:
+                stack.pop()
+        else:
+            frame = stack[-1]
+            frame[0] = not frame[1] and re.sub(r"\s+", " ", text.upper()) in _ALIAS_CLAUSES
+        positions.append(m.end())
+        states.append(stack[-1][0])
+    return positions, states
+
+
+def extract_column_references(sql: str) -> list[tuple[str | None, str]]:
+    """
+    Extract column references with alias resolution.
+
+    Expects SQL that has been through strip_comments, strip_jinja and
+    strip_string_literals. Table and UNNEST aliases are resolved, so
+    ``e.name`` with ``FROM events_v1 AS e`` becomes ("<dataset>.events_v1",
+    "name") and ``ev.key`` with ``UNNEST(e.events) AS ev`` becomes
+    ("<dataset>.events_v1", "events.key"). Unqualified references, and
+    references through a CTE name, have a qualifier of None.
+
+    CTE names, table aliases, function names and SQL keywords are excluded, and
+    so are output column aliases (``AS <name>``) where BigQuery lets them be
+    referenced (whole GROUP BY / ORDER BY / QUALIFY items). Elsewhere, e.g. in
+    ``LOWER(channel) AS channel`` or ``WHERE country = ...``, a name shared with
+    an alias is still the source column.
+
+    Returns:
+        Deduplicated (table_ref or None, dotted column path) pairs in order
+        of first appearance
+    """
+    aliases = extract_table_aliases(sql)
+    unnest_aliases = extract_unnest_aliases(sql)
+    cte_names = {name.lower() for name in extract_cte_names(sql)}
+    output_aliases = {a.lower() for a in re.findall(r"\bAS\s+([a-zA-Z_]\w*)", sql, re.IGNORECASE)}
+    lower_aliases = {a.lower() for a in list(aliases) + list(unnest_aliases)}
+
+    # Drop table references so their dotted names are not read as columns, keeping
+    # the column inside EXTRACT(<part> FROM <column>)
+    body = _EXTRACT_PART_RE.sub(lambda m: m.group(1) + " " * len(m.group(2)), sql)
+    body = re.sub(
+        r"((?:FROM|JOIN)\s+)[`a-zA-Z0-9_\-][`a-zA-Z0-9_\-\.]*",
+        r"\1 ",
+        body,
+        flags=re.IGNORECASE,
+    )
+
+    def resolve(path: str, depth: int = 0) -> tuple[str | None, str]:
+        first, _, rest = path.partition(".")
+        if rest and first in aliases:
+            return aliases[first], rest
+        if first in unnest_aliases and depth < 5:
+            qualifier, array_path = resolve(unnest_aliases[first], depth + 1)
+            return qualifier, f"{array_path}.{rest}" if rest else array_path
+        if rest and first.lower() in cte_names:
+            return None, rest
+        return None, path
+
+    scope_positions, scope_states = alias_reference_scopes(body)
+    pattern = r"(?<![\w.@`$])([a-zA-Z_]\w*(?:\.[a-zA-Z_]\w*)*)(?![\w.]*\s*\()"
+    references = {}
+    for m in re.finditer(pattern, body):
+        token = m.group(1)
+        first = token.split(".")[0].lower()
+        preceding = body[max(0, m.start() - 4):m.start()]
+        alias_scope = scope_states[bisect_right(scope_positions, m.start()) - 1]
+
+        if re.search(r"\bAS\s+$", preceding, re.IGNORECASE):
+            continue
+        if first in _BARE_KEYWORDS or first in _UDF_NAMESPACES:
+            continue
+        if "." not in token and (
+            first in cte_names or first in lower_aliases or (alias_scope and first in output_aliases)
+        ):
+            continue
+        if "." in token and alias_scope and first in output_aliases and first not in lower_aliases:
+            continue
+
+        references.setdefault(resolve(token), None)
+
+    return list(references)
+
+
 def is_glean_table(table_ref: str) -> bool:
     """Return True if the table name ends in _live or _stable."""
     # table_ref is project.dataset.table or dataset.table
@@ -119,60 +336,6 @@ def extract_field_references(sql: str) -> list[str]:
     for m in re.finditer(pattern, sql, re.IGNORECASE):
         candidates.add(m.group(1))
 
-    # Keywords that are never valid as the FIRST segment of a Glean field path.
-    # Middle segments (e.g. "string" in metrics.string.newtab_locale) are
-    # Glean metric type names and must NOT be filtered out.
-    first_segment_keywords = {
-        # DML / clauses
-        "select", "from", "where", "group", "by", "order", "having",
-        "join", "left", "right", "inner", "outer", "cross", "on", "as", "and",
-        "or", "not", "in", "is", "null", "true", "false", "case", "when",
-        "then", "else", "end", "distinct", "limit", "offset", "union",
-        "all", "with", "qualify", "over", "partition", "rows", "range",
-        "between", "like", "ilike", "exists", "lateral", "unnest",
-        # Types (valid as first segment only when bare, e.g. CAST(x AS STRING))
-        "int64", "float64", "numeric", "bool", "bytes",
-        # Conditionals / casting
-        "if", "ifnull", "nullif", "coalesce", "cast", "safe_cast",
-        # Aggregation / math / analytic functions
-        "count", "sum", "avg", "min", "max", "countif",
-        "approx_count_distinct", "approx_quantiles", "any_value",
-        "array_agg", "array_concat_agg", "string_agg",
-        "abs", "ceil", "floor", "round", "trunc", "mod", "div",
-        "pow", "power", "sqrt", "log", "log10", "exp", "ln",
-        "greatest", "least", "sign",
-        "row_number", "rank", "dense_rank", "ntile",
-        "lag", "lead", "first_value", "last_value", "nth_value",
-        "cumulative_dist", "percent_rank",
-        # Date / time functions
-        "current_date", "current_timestamp", "current_time",
-        "extract", "date_sub", "date_add", "date_trunc", "date_diff",
-        "timestamp_sub", "timestamp_add", "timestamp_trunc", "timestamp_diff",
-        "time_trunc", "time_diff", "datetime_trunc", "datetime_diff",
-        "date_from_unix_date", "unix_date",
-        "format_date", "format_timestamp", "parse_date", "parse_timestamp",
-        "generate_date_array", "generate_timestamp_array",
-        # String functions
-        "concat", "substr", "substring", "trim", "ltrim", "rtrim",
-        "lower", "upper", "length", "replace", "split", "starts_with",
-        "ends_with", "contains_substr", "instr", "lpad", "rpad",
-        "regexp_replace", "regexp_extract", "regexp_extract_all",
-        "regexp_contains", "regexp_instr",
-        "to_base64", "from_base64", "to_hex", "from_hex",
-        # JSON / array functions
-        "json_extract", "json_extract_scalar", "json_extract_array",
-        "json_query", "json_value", "json_value_array",
-        "to_json_string", "parse_json", "json_type",
-        "array_length", "array_concat", "array_reverse",
-        "array_to_string", "generate_array",
-        # Misc
-        "safe_divide", "ieee_divide",
-        "farm_fingerprint", "md5", "sha256", "sha512",
-        "generate_uuid", "session_user", "error",
-        "interval", "day", "week", "month", "year", "hour", "minute", "second",
-        "microsecond", "millisecond",
-    }
-
     def _is_table_ref(f: str) -> bool:
         """Return True if any segment looks like a dataset suffix (table reference)."""
         return any(
@@ -183,7 +346,7 @@ def extract_field_references(sql: str) -> list[str]:
 
     filtered = sorted(
         f for f in candidates
-        if f.split(".")[0].lower() not in first_segment_keywords  # first segment not a keyword
+        if f.split(".")[0].lower() not in _FIRST_SEGMENT_KEYWORDS  # first segment not a keyword
         and f.split(".")[0].lower() not in _UDF_NAMESPACES        # not a UDF namespace
         and not _is_table_ref(f)                                   # not a table reference
     )
@@ -230,7 +393,7 @@ def main():
     args = parser.parse_args()
 
     raw_sql = read_sql(args.query_sql)
-    sql = strip_string_literals(strip_jinja(strip_comments(raw_sql)))
+    sql = strip_string_literals(strip_jinja(strip_comments(render_sql(raw_sql))))
     source_tables = extract_source_tables(sql)
     field_refs = extract_field_references(sql)
 
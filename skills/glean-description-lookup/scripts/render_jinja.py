@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Render the Jinja in query.sql files without bqetl.
+
+bqetl renders every query.sql as a Jinja template before running it. The static
+analyzers in these skills used to strip the template tags instead, which keeps
+both branches of every `{% if %}` and loses anything generated in a `{% for %}`
+loop. This module renders templates in a lightweight environment instead:
+
+    - bqetl globals are stubbed: `is_init()` is False (--init makes it True), and
+      any other name (`metrics.calculate(...)`, macros, variables) renders as an
+      empty string, iterates as empty and can be called or indexed.
+    - `{% include %}` / `{% import %}` resolve against the sql/ directory and the
+      repository root (the current directory).
+    - Compiled templates are cached in memory and on disk (Jinja bytecode cache,
+      default ~/.cache/bigquery-etl-skills/jinja/), keyed by a hash of the
+      template text, so re-rendering thousands of queries skips compilation.
+
+Files without Jinja are returned unchanged without touching the environment.
+When jinja2 is not installed, or a template cannot be rendered, render_sql()
+returns the text unchanged, and analyzers fall back to strip_jinja().
+
+Usage:
+    python render_jinja.py <query.sql | directory>... [options]
+
+Examples:
+    # Print the rendered SQL of one query
+    python render_jinja.py sql/moz-fx-data-shared-prod/telemetry_derived/clients_daily_v1/query.sql
+
+    # Render the init branch with an extra variable
+    python render_jinja.py query.sql --init --var app_name=firefox_desktop
+
+    # Check that every templated query in the tree renders, in parallel
+    python render_jinja.py sql/ --check --jobs 8
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import jinja2
+except ImportError:
+    jinja2 = None
+
+
+DEFAULT_SQL_DIR = "sql"
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "bigquery-etl-skills" / "jinja"
+# Compiled templates kept in memory per process
+TEMPLATE_CACHE_SIZE = 4096
+PARALLEL_THRESHOLD = 200
+JINJA_MARKERS = ("{{", "{%", "{#")
+
+
+def has_jinja(sql: str) -> bool:
+    return any(marker in sql for marker in JINJA_MARKERS)
+
+
+def template_hash(sql: str) -> str:
+    return hashlib.sha256(sql.encode()).hexdigest()
+
+
+if jinja2 is not None:
+
+    class StubUndefined(jinja2.ChainableUndefined):
+        """Undefined names (bqetl macros and globals) render empty and can be called, indexed or iterated."""
+
+        def __call__(self, *args, **kwargs):
+            return self
+
+    class HashLoader(jinja2.BaseLoader):
+        """
+        Templates named by the hash of their text; other names fall through to the file loader.
+
+        A source is only held until its template is compiled (the environment and
+        bytecode caches keep the result), so memory stays bounded over large trees.
+        """
+
+        def __init__(self, fallback: "jinja2.BaseLoader"):
+            self.sources: Dict[str, str] = {}
+            self.fallback = fallback
+
+        def get_source(self, environment, template):
+            if template in self.sources:
+                return self.sources[template], None, lambda: True
+            return self.fallback.get_source(environment, template)
+
+
+class QueryRenderer:
+    """
+    Jinja environment with stubbed bqetl globals and a compiled-template cache.
+
+    Args:
+        sql_dir: Root of the sql/ tree, for {% include %} and {% import %}
+        cache_dir: Directory for compiled templates, or None for memory only
+        init: Value returned by is_init()
+        variables: Extra template variables
+    """
+
+    def __init__(
+        self,
+        sql_dir: str = DEFAULT_SQL_DIR,
+        cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+        init: bool = False,
+        variables: Optional[Dict[str, str]] = None,
+    ):
+        if jinja2 is None:
+            raise RuntimeError("jinja2 is not installed (pip install jinja2)")
+        bytecode_cache = None
+        if cache_dir is not None:
+            try:
+                Path(cache_dir).mkdir(parents=True, exist_ok=True)
+                bytecode_cache = jinja2.FileSystemBytecodeCache(str(cache_dir))
+            except OSError as e:
+                print(f"Warning: Not caching compiled templates in {cache_dir}: {e}", file=sys.stderr)
+
+        self.sql_dir = sql_dir
+        self.loader = HashLoader(jinja2.FileSystemLoader([sql_dir, "."]))
+        self.env = jinja2.Environment(
+            loader=self.loader,
+            undefined=StubUndefined,
+            bytecode_cache=bytecode_cache,
+            cache_size=TEMPLATE_CACHE_SIZE,
+            auto_reload=False,
+            keep_trailing_newline=True,
+        )
+        self.env.globals.update(is_init=lambda: init, **(variables or {}))
+
+    def render(self, sql: str) -> str:
+        """Render a template; raises jinja2.TemplateError (or the error a stub caused) when it cannot be rendered."""
+        if not has_jinja(sql):
+            return sql
+        name = template_hash(sql)
+        self.loader.sources[name] = sql
+        try:
+            template = self.env.get_template(name)
+        finally:
+            del self.loader.sources[name]
+        return template.render()
+
+
+_renderers: Dict[Tuple[str, bool], "QueryRenderer"] = {}
+_file_renderers: Dict[Tuple, "QueryRenderer"] = {}
+
+
+def render_sql(
+    sql: str,
+    sql_dir: str = DEFAULT_SQL_DIR,
+    init: bool = False,
+) -> str:
+    """
+    Render a query's Jinja with a shared per-process renderer.
+
+    Returns the text unchanged when it has no Jinja, when jinja2 is not
+    installed or when rendering fails (template errors, but also e.g. the
+    TypeError of `range(n)` over a stubbed n); pass the result through
+    strip_jinja() to drop whatever is left.
+    """
+    if jinja2 is None or not has_jinja(sql):
+        return sql
+    key = (sql_dir, init)
+    if key not in _renderers:
+        _renderers[key] = QueryRenderer(sql_dir, init=init)
+    try:
+        return _renderers[key].render(sql)
+    except Exception:
+        return sql
+
+
+def render_sql_both_modes(sql: str, sql_dir: str = DEFAULT_SQL_DIR) -> str:
+    """Scheduled and init renders joined, for analyses that need every table or UDF a query can read."""
+    scheduled, init = render_sql(sql, sql_dir), render_sql(sql, sql_dir, init=True)
+    return scheduled if scheduled == init else f"{scheduled}\n;\n{init}"
+
+
+def render_file(
+    path: Path,
+    sql_dir: str = DEFAULT_SQL_DIR,
+    cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+    init: bool = False,
+    variables: Optional[Dict[str, str]] = None,
+) -> Dict:
+    """Render one file; returns {path, templated, sql or error}."""
+    key = (sql_dir, str(cache_dir), init, json.dumps(variables, sort_keys=True))
+    renderer = _file_renderers.get(key)
+    if renderer is None:
+        renderer = _file_renderers[key] = QueryRenderer(sql_dir, cache_dir, init, variables)
+    try:
+        sql = path.read_text()
+        return {"path": str(path), "templated": has_jinja(sql), "sql": renderer.render(sql)}
+    except Exception as e:
+        return {"path": str(path), "templated": True, "error": f"{type(e).__name__}: {e}"}
+
+
+def find_sql_files(targets: List[str]) -> List[Path]:
+    files = []
+    for target in targets:
+        path = Path(target)
+        if path.is_dir():
+            files.extend(sorted(p for name in ("query.sql", "view.sql") for p in path.rglob(name)))
+        else:
+            files.append(path)
+    return files
+
+
+def render_files(
+    paths: List[Path],
+    jobs: Optional[int] = None,
+    **options,
+) -> List[Dict]:
+    """Render many files, in a process pool for large batches."""
+    jobs = jobs or os.cpu_count() or 1
+    render = partial(render_file, **options)
+    if jobs == 1 or len(paths) < PARALLEL_THRESHOLD:
+        return list(map(render, paths))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(render, paths, chunksize=max(1, len(paths) // (jobs * 4))))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render Jinja in query.sql files with stubbed bqetl globals",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "targets",
+        nargs="+",
+        help="query.sql/view.sql files or directories to search"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Root of the sql/ tree for includes (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--init",
+        action="store_true",
+        help="Render with is_init() returning True"
+    )
+    parser.add_argument(
+        "--var",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Extra template variable (repeatable)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(DEFAULT_CACHE_DIR),
+        help=f"Directory for compiled templates (default: {DEFAULT_CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write compiled templates on disk"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only report files that fail to render, with timings"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Parallel workers for large batches (default: CPU count)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "text"],
+        default="text",
+        help="Output format (default: text)"
+    )
+
+    args = parser.parse_args()
+
+    if jinja2 is None:
+        print("Error: jinja2 is not installed (pip install jinja2)", file=sys.stderr)
+        sys.exit(1)
+
+    variables = {}
+    for var in args.var:
+        name, sep, value = var.partition("=")
+        if not sep:
+            print(f"Error: --var expects NAME=VALUE, got {var}", file=sys.stderr)
+            sys.exit(1)
+        variables[name] = value
+
+    paths = find_sql_files(args.targets)
+    missing = [p for p in paths if not p.exists()]
+    if missing:
+        print(f"Error: File not found: {missing[0]}", file=sys.stderr)
+        sys.exit(1)
+
+    started = time.perf_counter()
+    results = render_files(
+        paths,
+        args.jobs,
+        sql_dir=args.sql_dir,
+        cache_dir=None if args.no_cache else Path(args.cache_dir),
+        init=args.init,
+        variables=variables,
+    )
+    elapsed = time.perf_counter() - started
+    failed = [r for r in results if "error" in r]
+
+    if args.format == "json":
+        if args.check:
+            results = [{k: v for k, v in r.items() if k != "sql"} for r in results]
+        print(json.dumps(results, indent=2))
+    elif args.check:
+        for result in failed:
+            print(f"{result['path']}: {result['error']}")
+        templated = sum(1 for r in results if r["templated"])
+        print(f"{len(results)} file(s), {templated} templated, {len(failed)} failed to render in {elapsed:.2f}s")
+    else:
+        for result in results:
+            if len(results) > 1:
+                print(f"-- {result['path']}")
+            if "error" in result:
+                print(f"Warning: Could not render {result['path']}: {result['error']}", file=sys.stderr)
+            else:
+                print(result["sql"].rstrip("\n"))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+DAG Landing-Time and Critical-Path Analyzer
+
+Estimates when each table's data lands (is written for the day) by walking the
+local table lineage through the DAGs that build it, shows the critical path (the
+chain of upstream tables that decides the landing time, including waits on other
+DAGs), and recommends which DAG a new table should join to land as early as
+possible.
+
+Model (times are minutes after midnight UTC on the day the run starts):
+    - A table scheduled in a DAG starts when the DAG run starts (schedule_interval
+      in dags.yaml; for DAGs running several times a day, the last run started by
+      the time its inputs are ready) or, when its upstream data is not there yet,
+      as soon as it lands (bqetl waits on upstream tasks in other DAGs with
+      ExternalTaskSensors). It lands --task-minutes later, or after the duration
+      given for it in --durations.
+    - Views land when their sources land, and count as part of the DAGs that
+      build the tables behind them.
+    - Tables not built in the tree (stable/live tables, ingestion) and unscheduled
+      queries land at --source-landing.
+
+Recommendation: for the table's upstream tables, every DAG with the wanted cadence
+(--cadence) is scored by the landing time it would give, then by how long the task
+would wait for its inputs after the DAG run starts, then by how many upstream tables it already runs
+(same-DAG dependencies need no sensor); remaining ties go to the table's current DAG.
+
+Durations file: JSON object {"dataset.table": minutes} or CSV with table and
+minutes columns (e.g. exported Airflow task durations).
+
+Usage:
+    python scripts/analyze_dag_latency.py <table> [<table>...] [options]
+    python scripts/analyze_dag_latency.py --query path/to/query.sql [options]
+
+Examples:
+    # Landing time and critical path of a table
+    python scripts/analyze_dag_latency.py telemetry_derived.clients_last_seen_v1
+
+    # Which daily DAG should a new query join?
+    python scripts/analyze_dag_latency.py --query sql/moz-fx-data-shared-prod/search_derived/new_table_v1/query.sql
+
+    # With measured task durations, as JSON
+    python scripts/analyze_dag_latency.py search_derived.search_clients_daily_v8 --durations durations.csv --format json
+"""
+
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from dag_schedule import DEFAULT_DAGS_FILE, DEFAULT_PROJECT, load_dags, parse_schedule, qualify_table, table_schedule
+from datahub_lineage import (
+    DEFAULT_SQL_DIR,
+    LineageGraph,
+    build_lineage_graph,
+    extract_source_tables,
+    find_lineage_files,
+    read_lineage_sql,
+    resolve_table_reference,
+)
+
+
+DEFAULT_TASK_MINUTES = 30
+DEFAULT_SOURCE_LANDING = "01:00"  # copy_deduplicate has the previous day's stable tables by then
+CADENCES = {
+    "daily": lambda runs: runs == 1,
+    "hourly": lambda runs: runs >= 24,
+    "weekly": lambda runs: runs < 1,  # weekly or less often
+    "any": lambda runs: True,
+}
+
+
+def parse_clock(value: str) -> int:
+    """Parse HH:MM into minutes after midnight."""
+    hours, _, minutes = value.partition(":")
+    try:
+        total = int(hours) * 60 + int(minutes or 0)
+    except ValueError:
+        raise ValueError(f"Invalid time {value!r}, expected HH:MM")
+    if not 0 <= total < 1440:
+        raise ValueError(f"Invalid time {value!r}, expected HH:MM")
+    return total
+
+
+def format_clock(minutes: Optional[float]) -> str:
+    """Format minutes after midnight as HH:MM, with +Nd when it runs into later days."""
+    if minutes is None:
+        return "unknown"
+    days, rest = divmod(int(round(minutes)), 1440)
+    clock = f"{rest // 60:02d}:{rest % 60:02d}"
+    return f"{clock} (+{days}d)" if days else clock
+
+
+def schedule_cadence(schedule: Optional[Dict]) -> str:
+    """Cadence name of a parsed schedule, for recommending DAGs like the current one."""
+    if not schedule:
+        return "daily"
+    for cadence in ("daily", "hourly", "weekly"):
+        if CADENCES[cadence](schedule["runs_per_day"]):
+            return cadence
+    return "any"
+
+
+def run_start(start_minutes: List[int], ready: float) -> int:
+    """Start of the DAG run a task lands in: the last run started by the time its inputs are ready, else the first."""
+    started = [minute for minute in start_minutes if minute <= ready]
+    return max(started) if started else min(start_minutes)
+
+
+def load_durations(path: str) -> Dict[str, float]:
+    """Load task durations in minutes, keyed by fully qualified table name."""
+    with open(path) as f:
+        if path.endswith(".json"):
+            rows = json.load(f).items()
+        else:
+            rows = [(row.get("table"), row.get("minutes")) for row in csv.DictReader(f)]
+    durations = {}
+    for table, minutes in rows:
+        if not table or minutes in (None, ""):
+            continue
+        durations[qualify_table(table)] = float(minutes)
+    return durations
+
+
+class LandingModel:
+    """Landing times of tables, computed lazily over the lineage graph."""
+
+    def __init__(
+        self,
+        sql_dir: str,
+        dags: Dict[str, Dict],
+        graph: LineageGraph,
+        task_minutes: float = DEFAULT_TASK_MINUTES,
+        source_landing: int = parse_clock(DEFAULT_SOURCE_LANDING),
+        durations: Optional[Dict[str, float]] = None,
+    ):
+        self.sql_dir = sql_dir
+        self.dags = dags
+        self.graph = graph
+        self.task_minutes = task_minutes
+        self.source_landing = source_landing
+        self.durations = durations or {}
+        self.views = {fqn for fqn, path in find_lineage_files(sql_dir) if path.name == "view.sql"}
+        self._landing: Dict[str, Dict] = {}
+        self._dags_behind: Dict[str, Set[str]] = {}
+
+    def dag_start(self, dag_name: Optional[str], ready: float) -> Optional[int]:
+        schedule = parse_schedule((self.dags.get(dag_name) or {}).get("schedule_interval")) if dag_name else None
+        return run_start(schedule["start_minutes"], ready) if schedule else None
+
+    def upstream(self, fqn: str) -> List[str]:
+        if fqn not in self.graph:
+            return []
+        return [self.graph.names[i] for i in self.graph.neighbors(self.graph.ids[fqn], "upstream")]
+
+    def ready_after(self, sources: List[str], visiting: Set[str]) -> Tuple[float, Optional[str]]:
+        """Latest landing among sources, and the source that lands last."""
+        ready, critical = float(self.source_landing), None
+        for source in sources:
+            landing = self.landing(source, visiting)["landing"]
+            if landing > ready:
+                ready, critical = landing, source
+        return ready, critical
+
+    def landing(self, fqn: str, visiting: Optional[Set[str]] = None) -> Dict:
+        """
+        Landing estimate for a table.
+
+        Returns:
+            Dict with table, kind (scheduled, view, source, unscheduled), dag_name,
+            dag_start, start, landing and critical_source (upstream table landing last)
+        """
+        if fqn in self._landing:
+            return self._landing[fqn]
+        visiting = set() if visiting is None else visiting
+        if fqn in visiting:
+            print(f"Warning: Lineage cycle through {fqn}; ignoring the back edge", file=sys.stderr)
+            return {"landing": self.source_landing}
+        visiting.add(fqn)
+
+        defined = fqn in self.graph and self.graph.ids[fqn] in self.graph.defined
+        dag_name = table_schedule(self.sql_dir, fqn, self.dags)["dag_name"] if defined else None
+        ready, critical = self.ready_after(self.upstream(fqn), visiting)
+        dag_start = self.dag_start(dag_name, ready)
+        result = {"table": fqn, "dag_name": dag_name, "dag_start": dag_start, "critical_source": None}
+
+        if fqn in self.views:
+            result.update(kind="view", start=ready, landing=ready, critical_source=critical)
+        elif dag_name and dag_start is not None:
+            start = max(dag_start, ready)
+            result.update(
+                kind="scheduled",
+                start=start,
+                landing=start + self.durations.get(fqn, self.task_minutes),
+                critical_source=critical if ready > dag_start else None,
+            )
+        else:
+            result.update(
+                kind="unscheduled" if defined else "source",
+                start=self.source_landing,
+                landing=self.source_landing,
+            )
+
+        visiting.discard(fqn)
+        self._landing[fqn] = result
+        return result
+
+    def dags_behind(self, fqn: str, visiting: Optional[Set[str]] = None) -> Set[str]:
+        """DAGs that build a table, or for a view the tables behind it."""
+        if fqn in self._dags_behind:
+            return self._dags_behind[fqn]
+        if fqn not in self.views:
+            dag_name = self.landing(fqn)["dag_name"]
+            return {dag_name} if dag_name else set()
+        visiting = set() if visiting is None else visiting
+        if fqn in visiting:
+            return set()
+        visiting.add(fqn)
+        dags = set().union(*(self.dags_behind(source, visiting) for source in self.upstream(fqn)))
+        visiting.discard(fqn)
+        self._dags_behind[fqn] = dags
+        return dags
+
+    def behind_view(self, fqn: str) -> str:
+        """The table that decides when a view lands (the view's critical source, through nested views)."""
+        seen = set()
+        while fqn in self.views and fqn not in seen:
+            seen.add(fqn)
+            critical = self.landing(fqn).get("critical_source")
+            if not critical:
+                break
+            fqn = critical
+        return fqn
+
+    def critical_path(self, fqn: str) -> List[Dict]:
+        """Follow critical sources upstream; returned source-first."""
+        path, seen = [], set()
+        current = fqn
+        while current and current not in seen:
+            seen.add(current)
+            landing = self.landing(current)
+            path.append(landing)
+            current = landing.get("critical_source")
+        return list(reversed(path))
+
+    def recommend_dag(
+        self,
+        sources: List[str],
+        cadence: str = "daily",
+        table: Optional[str] = None,
+        current_dag: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Score candidate DAGs for a table reading from sources (views count for
+        the DAGs behind them); ties go to current_dag.
+
+        Returns:
+            Candidates sorted best first: dag_name, schedule_interval, start, landing,
+            wait_minutes (time the task waits on other DAGs after the DAG starts),
+            upstream_in_dag and latency (landing minus the time all inputs are ready)
+        """
+        ready, _ = self.ready_after(sources, set())
+        duration = self.durations.get(table, self.task_minutes) if table else self.task_minutes
+        source_dags = [self.dags_behind(source) for source in sources]
+
+        candidates = []
+        for dag_name, config in self.dags.items():
+            schedule = parse_schedule((config or {}).get("schedule_interval"))
+            if not schedule or not CADENCES[cadence](schedule["runs_per_day"]):
+                continue
+            dag_start = run_start(schedule["start_minutes"], ready)
+            start = max(dag_start, ready)
+            candidates.append({
+                "dag_name": dag_name,
+                "schedule_interval": config.get("schedule_interval"),
+                "start": start,
+                "landing": start + duration,
+                "wait_minutes": start - dag_start,
+                "upstream_in_dag": sum(dag_name in dags for dags in source_dags),
+                "latency": start + duration - ready,
+            })
+
+        return sorted(
+            candidates,
+            key=lambda c: (
+                c["landing"], c["wait_minutes"], -c["upstream_in_dag"], c["dag_name"] != current_dag, c["dag_name"]
+            ),
+        )
+
+
+def analyze_table(model: LandingModel, fqn: str, cadence: Optional[str], top: int) -> Dict:
+    """
+    Landing time, critical path and DAG recommendation for a table in the tree.
+
+    Without a cadence, DAGs with the same cadence as the table's current DAG are recommended.
+    """
+    landing = model.landing(fqn)
+    path = model.critical_path(fqn)
+    cross_dag_waits = []
+    for step in path:
+        if step.get("kind") != "scheduled" or not step["critical_source"]:
+            continue
+        waits_on = model.behind_view(step["critical_source"])
+        waits_on_dag = model.landing(waits_on)["dag_name"]
+        if waits_on_dag == step["dag_name"]:
+            continue
+        cross_dag_waits.append({
+            "table": step["table"],
+            "dag_name": step["dag_name"],
+            "waits_on": waits_on,
+            "waits_on_dag": waits_on_dag,
+            "wait_minutes": step["start"] - step["dag_start"],
+        })
+    if cadence is None:
+        cadence = schedule_cadence(parse_schedule((model.dags.get(landing["dag_name"]) or {}).get("schedule_interval")))
+    return {
+        "table": fqn,
+        "dag_name": landing["dag_name"],
+        "kind": landing["kind"],
+        "landing": landing["landing"],
+        "critical_path": [
+            {key: step.get(key) for key in ("table", "kind", "dag_name", "start", "landing")} for step in path
+        ],
+        "cross_dag_waits": cross_dag_waits,
+        "recommendations": model.recommend_dag(model.upstream(fqn), cadence, fqn, landing["dag_name"])[:top],
+    }
+
+
+def analyze_query(model: LandingModel, query_path: Path, cadence: Optional[str], top: int) -> Dict:
+    """DAG recommendation for a query that is not (yet) in the lineage graph."""
+    try:
+        project = query_path.resolve().relative_to(Path(model.sql_dir).resolve()).parts[0]
+    except ValueError:
+        project = DEFAULT_PROJECT
+    cadence = cadence or "daily"
+    sources = sorted({
+        fqn for fqn in (resolve_table_reference(ref, project) for ref in extract_source_tables(read_lineage_sql(query_path, model.sql_dir)))
+        if fqn
+    })
+    ready, critical = model.ready_after(sources, set())
+    return {
+        "query": str(query_path),
+        "sources": [
+            {key: model.landing(source).get(key) for key in ("table", "kind", "dag_name", "landing")}
+            for source in sources
+        ],
+        "inputs_ready": ready,
+        "critical_source": critical,
+        "critical_path": [
+            {key: step.get(key) for key in ("table", "kind", "dag_name", "start", "landing")}
+            for step in (model.critical_path(critical) if critical else [])
+        ],
+        "recommendations": model.recommend_dag(sources, cadence)[:top],
+    }
+
+
+def format_recommendations(recommendations: List[Dict], current_dag: Optional[str] = None) -> List[str]:
+    if not recommendations:
+        return ["   No DAG with the requested cadence in dags.yaml"]
+    lines = []
+    for i, rec in enumerate(recommendations):
+        marker = "⭐" if i == 0 else "  "
+        current = " (current)" if rec["dag_name"] == current_dag else ""
+        wait = f", starts {rec['wait_minutes']:.0f} min after the DAG" if rec["wait_minutes"] else ""
+        lines.append(
+            f"   {marker} {rec['dag_name']}{current} [{rec['schedule_interval']}]: lands {format_clock(rec['landing'])}"
+            f"{wait}, {rec['upstream_in_dag']} upstream table(s) in DAG"
+        )
+    return lines
+
+
+def format_output(results: List[Dict], output_format: str = "text") -> str:
+    """Format analysis results as JSON or text."""
+    if output_format == "json":
+        return json.dumps(results, indent=2)
+
+    output = []
+    for result in results:
+        if "query" in result:
+            output.append(f"📄 {result['query']}")
+            output.append(f"   Inputs ready: {format_clock(result['inputs_ready'])}")
+            for source in result["sources"]:
+                dag = source["dag_name"] or source["kind"]
+                output.append(f"      • {source['table']} ({dag}) lands {format_clock(source['landing'])}")
+        else:
+            dag = result["dag_name"] or result["kind"]
+            output.append(f"📊 {result['table']} ({dag}): lands {format_clock(result['landing'])}")
+
+        if len(result["critical_path"]) > 1 or ("query" in result and result["critical_path"]):
+            output.append("   Critical path:")
+            for step in result["critical_path"]:
+                dag = step["dag_name"] or step["kind"]
+                output.append(f"      {step['table']} [{dag}] → {format_clock(step['landing'])}")
+        for wait in result.get("cross_dag_waits", []):
+            output.append(
+                f"   ⚠️  {wait['table'].split('.')[-1]} waits {wait['wait_minutes']:.0f} min after {wait['dag_name']} "
+                f"starts for {wait['waits_on']} ({wait['waits_on_dag'] or 'unscheduled'})"
+            )
+
+        output.append("   Recommended DAG:")
+        output.extend(format_recommendations(result["recommendations"], result.get("dag_name")))
+        output.append("")
+    return "\n".join(output).rstrip()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Estimate table landing times and recommend a DAG from upstream lineage",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "tables",
+        nargs="*",
+        help="Tables in the sql/ tree (dataset.table or project.dataset.table)"
+    )
+    parser.add_argument(
+        "--query",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="query.sql of a new table to recommend a DAG for (repeatable)"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Root of the bigquery-etl sql/ tree (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--dags-file",
+        default=DEFAULT_DAGS_FILE,
+        help=f"Path to dags.yaml (default: {DEFAULT_DAGS_FILE})"
+    )
+    parser.add_argument(
+        "--cadence",
+        choices=sorted(CADENCES),
+        help="Only recommend DAGs with this cadence (default: the table's current cadence, daily for --query)"
+    )
+    parser.add_argument(
+        "--task-minutes",
+        type=float,
+        default=DEFAULT_TASK_MINUTES,
+        help=f"Assumed run time of a task without a known duration (default: {DEFAULT_TASK_MINUTES})"
+    )
+    parser.add_argument(
+        "--durations",
+        metavar="PATH",
+        help="Task durations in minutes per table (JSON or CSV)"
+    )
+    parser.add_argument(
+        "--source-landing",
+        default=DEFAULT_SOURCE_LANDING,
+        metavar="HH:MM",
+        help=f"When tables not built in the tree are complete, UTC (default: {DEFAULT_SOURCE_LANDING})"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=3,
+        help="Number of DAG recommendations to show (default: 3)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "text"],
+        default="text",
+        help="Output format (default: text)"
+    )
+
+    args = parser.parse_args()
+    if not args.tables and not args.query:
+        parser.error("provide tables or --query")
+
+    if not Path(args.sql_dir).exists():
+        print(f"Error: SQL directory not found: {args.sql_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        durations = load_durations(args.durations) if args.durations else None
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not load durations {args.durations}: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    try:
+        model = LandingModel(
+            args.sql_dir,
+            load_dags(args.dags_file),
+            build_lineage_graph(args.sql_dir),
+            args.task_minutes,
+            parse_clock(args.source_landing),
+            durations,
+        )
+        results = []
+        for table in args.tables:
+            fqn = qualify_table(table)
+            if fqn not in model.graph or model.graph.ids[fqn] not in model.graph.defined:
+                print(f"Warning: {table} has no query.sql or view.sql in {args.sql_dir}", file=sys.stderr)
+            results.append(analyze_table(model, fqn, args.cadence, args.top))
+        for query in args.query:
+            results.append(analyze_query(model, Path(query), args.cadence, args.top))
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(format_output(results, args.format))
+
+
+if __name__ == "__main__":
+    main()
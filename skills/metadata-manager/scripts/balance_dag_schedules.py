@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+DAG Slot-Load Balancer
+
+Builds an hour-by-hour histogram of the load that scheduled queries put on
+BigQuery slots over an average day, and suggests new start times for DAGs that
+can move without changing the order in which tables land.
+
+Load model:
+    - Every table with a query.sql and a `scheduling.dag_name` is a task. Its start
+      and end come from analyze_dag_latency.py: DAG start time (dags.yaml),
+      upstream landing times and --task-minutes / --durations.
+    - With --stats, a task weighs the bytes one run scans: one day (partition) of
+      each upstream table, reading through views. Tasks whose sources have no stats
+      get the median of the known weights, spread evenly over the hours a run
+      covers. DAGs running several times a day split the daily weight across runs.
+    - Without --stats each run counts the fraction of every hour it is running, so
+      the histogram shows average concurrent tasks (two 30-minute tasks in the same
+      hour are 1.0, hourly tasks count in every hour).
+    - Weekly DAGs count 1/7 of a day.
+
+Movable DAGs: daily DAGs with a cron schedule none of whose tables read from a table
+built in another DAG (only stable/live tables and other sources). A shift keeps
+the DAG after --source-landing and its tables landing before any consumer in
+another DAG starts, so no downstream task starts later than today.
+
+Usage:
+    python scripts/balance_dag_schedules.py [--stats table_stats.csv] [options]
+
+Examples:
+    # Concurrent-task histogram and suggested shifts
+    python scripts/balance_dag_schedules.py
+
+    # Weighted by scanned bytes, with measured task durations
+    python scripts/balance_dag_schedules.py --stats table_stats.csv --durations durations.csv
+
+    # Only consider moving some DAGs, in 15 minute steps, as JSON
+    python scripts/balance_dag_schedules.py --dag bqetl_search --dag bqetl_ads --step 15 --format json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from analyze_dag_latency import (
+    DEFAULT_SOURCE_LANDING,
+    DEFAULT_TASK_MINUTES,
+    LandingModel,
+    load_durations,
+    parse_clock,
+)
+from dag_schedule import DEFAULT_DAGS_FILE, load_dags, parse_schedule
+from datahub_lineage import DEFAULT_SQL_DIR, build_lineage_graph, find_lineage_files
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(SKILLS_DIR / "model-requirements" / "scripts"))
+from check_aggregated_alternatives import estimate_daily_scan_bytes, format_bytes, load_table_stats  # noqa: E402
+
+
+DEFAULT_STEP_MINUTES = 30
+HOURS = 24
+BAR_WIDTH = 40
+
+
+def source_tables(model: LandingModel, fqn: str) -> List[str]:
+    """Upstream tables a query scans, reading through views."""
+    tables, stack, seen = [], list(model.upstream(fqn)), set()
+    while stack:
+        table = stack.pop()
+        if table in seen:
+            continue
+        seen.add(table)
+        if table in model.views:
+            stack.extend(model.upstream(table))
+        else:
+            tables.append(table)
+    return tables
+
+
+def task_weights(model: LandingModel, tasks: List[str], stats: Optional[Dict[str, Dict]]) -> Dict[str, float]:
+    """Weight per task: bytes scanned per run with stats, otherwise 1."""
+    if not stats:
+        return {task: 1.0 for task in tasks}
+
+    weights = {}
+    for task in tasks:
+        estimates = [estimate_daily_scan_bytes(stats.get(source), None) for source in source_tables(model, task)]
+        known = [estimate for estimate in estimates if estimate is not None]
+        if known:
+            weights[task] = float(sum(known))
+    fallback = statistics.median(weights.values()) if weights else 1.0
+    return {task: weights.get(task, fallback) for task in tasks}
+
+
+def task_intervals(
+    model: LandingModel,
+    task: str,
+    weight: float,
+    concurrency: bool = False,
+) -> List[Tuple[float, float, float]]:
+    """
+    (start, end, weight) per run of a task over an average day.
+
+    With concurrency, weight is the task-hours of a run (one running task times its
+    duration), so histogram() gives the average number of tasks running per hour.
+    """
+    landing = model.landing(task)
+    schedule = parse_schedule((model.dags.get(landing["dag_name"]) or {}).get("schedule_interval"))
+    runs = schedule["start_minutes"]
+    offset = landing["start"] - landing["dag_start"]
+    duration = max(landing["landing"] - landing["start"], 1)
+    if concurrency:
+        per_run = weight * min(1.0, schedule["runs_per_day"] / len(runs)) * duration / 60
+    else:
+        per_run = weight * min(1.0, schedule["runs_per_day"]) / len(runs)
+    return [(run + offset, run + offset + duration, per_run) for run in runs]
+
+
+def histogram(intervals: List[Tuple[float, float, float]], shift: float = 0) -> List[float]:
+    """Spread each interval's weight evenly over the hours it covers (wrapping past midnight)."""
+    load = [0.0] * HOURS
+    for start, end, weight in intervals:
+        start, end = start + shift, end + shift
+        rate = weight / (end - start)
+        hour_start = (start // 60) * 60
+        while hour_start < end:
+            overlap = min(end, hour_start + 60) - max(start, hour_start)
+            load[int(hour_start // 60) % HOURS] += rate * overlap
+            hour_start += 60
+    return load
+
+
+def shift_cron(schedule_interval: str, shift: int) -> Optional[str]:
+    """Move a single-run daily cron schedule by shift minutes."""
+    fields = str(schedule_interval).split()
+    if len(fields) != 5 or not (fields[0].isdigit() and fields[1].isdigit()):
+        return None
+    start = (int(fields[1]) * 60 + int(fields[0]) + shift) % 1440
+    return " ".join([str(start % 60), str(start // 60)] + fields[2:])
+
+
+def consumers_outside_dag(model: LandingModel, task: str, dag_name: str) -> List[str]:
+    """Scheduled tables in other DAGs that read from task, directly or through views."""
+    consumers, stack, seen = [], [task], {task}
+    while stack:
+        table = stack.pop()
+        if table not in model.graph:
+            continue
+        for node in model.graph.neighbors(model.graph.ids[table], "downstream"):
+            consumer = model.graph.names[node]
+            if consumer in seen:
+                continue
+            seen.add(consumer)
+            if consumer in model.views:
+                stack.append(consumer)
+            elif model.landing(consumer).get("kind") == "scheduled" and model.landing(consumer)["dag_name"] != dag_name:
+                consumers.append(consumer)
+    return consumers
+
+
+def shift_window(model: LandingModel, dag_name: str, tasks: List[str]) -> Optional[Tuple[int, int]]:
+    """
+    Range of start-time shifts (minutes) that keep the DAG's lineage order.
+
+    Returns:
+        (earliest, latest) shift, or None when the DAG cannot move (not a single-run
+        daily cron DAG, or it reads from tables built in other DAGs)
+    """
+    config = model.dags.get(dag_name) or {}
+    schedule = parse_schedule(config.get("schedule_interval"))
+    if not schedule or schedule["runs_per_day"] != 1 or len(schedule["start_minutes"]) != 1:
+        return None
+    if shift_cron(config.get("schedule_interval"), 0) is None:
+        return None
+
+    dag_start = schedule["start_minutes"][0]
+    latest = 1440 - dag_start - 1  # stay on the same day
+    for task in tasks:
+        for source in source_tables(model, task):
+            source_landing = model.landing(source)
+            if source_landing["kind"] == "scheduled" and source_landing["dag_name"] != dag_name:
+                return None
+        task_landing = model.landing(task)["landing"]
+        for consumer in consumers_outside_dag(model, task, dag_name):
+            latest = min(latest, model.landing(consumer)["start"] - task_landing)
+
+    earliest = model.source_landing - dag_start
+    if latest < earliest:
+        return None
+    return int(earliest), int(latest)
+
+
+def balance_schedules(
+    model: LandingModel,
+    stats: Optional[Dict[str, Dict]] = None,
+    step: int = DEFAULT_STEP_MINUTES,
+    only_dags: Optional[List[str]] = None,
+) -> Dict:
+    """
+    Build the load histogram and greedily shift movable DAGs to lower the peak.
+
+    Returns:
+        Dict with unit (bytes or tasks), histogram, balanced_histogram, peak_hour,
+        balanced_peak_hour, dags (per-DAG tasks, daily weight and peak-hour share)
+        and suggestions (dag_name, schedule_interval, suggested_schedule, shift_minutes,
+        window)
+    """
+    tasks_by_dag = defaultdict(list)
+    for fqn, sql_path in find_lineage_files(model.sql_dir):
+        if sql_path.name != "query.sql":
+            continue
+        landing = model.landing(fqn)
+        if landing["kind"] == "scheduled":
+            tasks_by_dag[landing["dag_name"]].append(fqn)
+
+    weights = task_weights(model, [task for tasks in tasks_by_dag.values() for task in tasks], stats)
+    dag_intervals = {
+        dag_name: [
+            interval for task in tasks for interval in task_intervals(model, task, weights[task], not stats)
+        ]
+        for dag_name, tasks in tasks_by_dag.items()
+    }
+    dag_load = {dag_name: histogram(intervals) for dag_name, intervals in dag_intervals.items()}
+    total = [sum(load[hour] for load in dag_load.values()) for hour in range(HOURS)]
+    peak_hour = max(range(HOURS), key=lambda hour: total[hour]) if dag_load else None
+
+    # Greedy: heaviest movable DAGs first, each to the shift with the lowest resulting peak
+    balanced = list(total)
+    suggestions = []
+    for dag_name in sorted(dag_load, key=lambda name: -sum(dag_load[name])):
+        if only_dags and dag_name not in only_dags:
+            continue
+        window = shift_window(model, dag_name, tasks_by_dag[dag_name])
+        if not window:
+            continue
+        without = [balanced[hour] - dag_load[dag_name][hour] for hour in range(HOURS)]
+        best_shift, best_load = 0, balanced
+        for shift in range(window[0] - window[0] % step, window[1] + 1, step):
+            if not window[0] <= shift <= window[1]:
+                continue
+            moved = histogram(dag_intervals[dag_name], shift)
+            candidate = [without[hour] + moved[hour] for hour in range(HOURS)]
+            if (max(candidate), abs(shift)) < (max(best_load), abs(best_shift)):
+                best_shift, best_load = shift, candidate
+        if best_shift:
+            schedule_interval = model.dags[dag_name]["schedule_interval"]
+            suggestions.append({
+                "dag_name": dag_name,
+                "schedule_interval": schedule_interval,
+                "suggested_schedule": shift_cron(schedule_interval, best_shift),
+                "shift_minutes": best_shift,
+                "window": list(window),
+                "peak_before": max(balanced),
+                "peak_after": max(best_load),
+            })
+            balanced = best_load
+
+    return {
+        "unit": "bytes" if stats else "tasks",
+        "histogram": total,
+        "peak_hour": peak_hour,
+        "balanced_histogram": balanced,
+        "balanced_peak_hour": max(range(HOURS), key=lambda hour: balanced[hour]) if dag_load else None,
+        "dags": sorted(
+            (
+                {
+                    "dag_name": dag_name,
+                    "tasks": len(tasks_by_dag[dag_name]),
+                    "daily_load": sum(dag_load[dag_name]),
+                    "peak_hour_load": dag_load[dag_name][peak_hour],
+                }
+                for dag_name in dag_load
+            ),
+            key=lambda dag: -dag["peak_hour_load"],
+        ),
+        "suggestions": suggestions,
+    }
+
+
+def format_load(value: float, unit: str) -> str:
+    return format_bytes(value) if unit == "bytes" else f"{value:.2f} tasks"
+
+
+def format_histogram(load: List[float], unit: str, scale: float) -> List[str]:
+    lines = []
+    for hour, value in enumerate(load):
+        bar = "█" * round(BAR_WIDTH * value / scale) if scale else ""
+        lines.append(f"   {hour:02d}:00 {bar:<{BAR_WIDTH}} {format_load(value, unit)}")
+    return lines
+
+
+def format_output(result: Dict, output_format: str = "text") -> str:
+    """Format the balancing result as JSON or text."""
+    if output_format == "json":
+        return json.dumps(result, indent=2)
+
+    unit = result["unit"]
+    if result["peak_hour"] is None:
+        return "No scheduled queries found"
+    scale = max(result["histogram"])
+    label = "bytes scanned per hour" if unit == "bytes" else "average concurrent tasks"
+    output = [f"📊 Load by hour (UTC, {label})"]
+    output.extend(format_histogram(result["histogram"], unit, scale))
+    output.append(f"   Peak: {result['peak_hour']:02d}:00 ({format_load(max(result['histogram']), unit)})")
+    output.append("")
+
+    output.append(f"Top DAGs in the {result['peak_hour']:02d}:00 peak:")
+    for dag in result["dags"][:5]:
+        if dag["peak_hour_load"]:
+            output.append(f"   • {dag['dag_name']}: {format_load(dag['peak_hour_load'], unit)} ({dag['tasks']} task(s))")
+    output.append("")
+
+    if not result["suggestions"]:
+        output.append("No start-time shift lowers the peak without delaying downstream DAGs.")
+        return "\n".join(output)
+
+    output.append("💡 Suggested schedule changes (dags.yaml):")
+    for suggestion in result["suggestions"]:
+        direction = "later" if suggestion["shift_minutes"] > 0 else "earlier"
+        output.append(
+            f"   • {suggestion['dag_name']}: \"{suggestion['schedule_interval']}\" → "
+            f"\"{suggestion['suggested_schedule']}\" ({abs(suggestion['shift_minutes'])} min {direction}; "
+            f"peak {format_load(suggestion['peak_before'], unit)} → {format_load(suggestion['peak_after'], unit)})"
+        )
+    output.append("")
+    output.append("📊 Load by hour after the changes")
+    output.extend(format_histogram(result["balanced_histogram"], unit, scale))
+    output.append(
+        f"   Peak: {result['balanced_peak_hour']:02d}:00 ({format_load(max(result['balanced_histogram']), unit)})"
+    )
+    output.append("Check with the DAG owners before moving: a start time may also wait for data delivered outside bqetl.")
+    return "\n".join(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Histogram of scheduled query load by hour and DAG start-time shifts to flatten it",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "--stats",
+        metavar="PATH",
+        help="Table-statistics snapshot (JSON or CSV) to weigh tasks by scanned bytes"
+    )
+    parser.add_argument(
+        "--dag",
+        action="append",
+        default=[],
+        help="Only suggest shifts for this DAG (repeatable; default: every movable DAG)"
+    )
+    parser.add_argument(
+        "--step",
+        type=int,
+        default=DEFAULT_STEP_MINUTES,
+        help=f"Granularity of suggested shifts in minutes (default: {DEFAULT_STEP_MINUTES})"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Root of the bigquery-etl sql/ tree (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--dags-file",
+        default=DEFAULT_DAGS_FILE,
+        help=f"Path to dags.yaml (default: {DEFAULT_DAGS_FILE})"
+    )
+    parser.add_argument(
+        "--task-minutes",
+        type=float,
+        default=DEFAULT_TASK_MINUTES,
+        help=f"Assumed run time of a task without a known duration (default: {DEFAULT_TASK_MINUTES})"
+    )
+    parser.add_argument(
+        "--durations",
+        metavar="PATH",
+        help="Task durations in minutes per table (JSON or CSV)"
+    )
+    parser.add_argument(
+        "--source-landing",
+        default=DEFAULT_SOURCE_LANDING,
+        metavar="HH:MM",
+        help=f"When tables not built in the tree are complete, UTC (default: {DEFAULT_SOURCE_LANDING})"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "text"],
+        default="text",
+        help="Output format (default: text)"
+    )
+
+    args = parser.parse_args()
+    if args.step <= 0:
+        parser.error("--step must be positive")
+
+    if not Path(args.sql_dir).exists():
+        print(f"Error: SQL directory not found: {args.sql_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        stats = load_table_stats(args.stats) if args.stats else None
+        durations = load_durations(args.durations) if args.durations else None
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not load {args.stats or args.durations}: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    try:
+        model = LandingModel(
+            args.sql_dir,
+            load_dags(args.dags_file),
+            build_lineage_graph(args.sql_dir),
+            args.task_minutes,
+            parse_clock(args.source_landing),
+            durations,
+        )
+        result = balance_schedules(model, stats, args.step, args.dag)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(format_output(result, args.format))
+
+
+if __name__ == "__main__":
+    main()
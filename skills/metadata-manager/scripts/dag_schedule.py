@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+DAG Schedule Lookup
+
+Resolves which Airflow DAG a table is scheduled in (`scheduling.dag_name` in its
+metadata.yaml) and how often that DAG runs (`schedule_interval` in dags.yaml).
+Used by the advisor scripts to weigh queries by run frequency, and handy on its own
+when deciding where a new query should be scheduled.
+
+schedule_interval formats understood:
+    - Cron: "0 2 * * *", "0 */6 * * *", "0 2,14 * * 1-5", "0 0 1 * *"
+    - Intervals: "3h", "30m", "1d"
+    - Presets: "@hourly", "@daily", "@weekly", "@monthly", "@yearly", "@once"
+
+Usage:
+    python scripts/dag_schedule.py <table> [<table>...] [--sql-dir sql] [--dags-file dags.yaml]
+    python scripts/dag_schedule.py --dag <dag_name>
+
+Examples:
+    # Which DAG runs clients_daily_v1, and how often?
+    python scripts/dag_schedule.py telemetry_derived.clients_daily_v1
+
+    # Schedule of a DAG
+    python scripts/dag_schedule.py --dag bqetl_main_summary --format json
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+
+
+DEFAULT_PROJECT = "moz-fx-data-shared-prod"
+DEFAULT_SQL_DIR = "sql"
+DEFAULT_DAGS_FILE = "dags.yaml"
+
+_PRESETS = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+_INTERVAL_RE = re.compile(r"^(\d+)\s*([mhd])$")
+_MINUTES = {"m": 1, "h": 60, "d": 1440}
+
+
+def load_dags(dags_file: str = DEFAULT_DAGS_FILE) -> Dict[str, Dict]:
+    """Load dags.yaml as a mapping of DAG name to its configuration."""
+    path = Path(dags_file)
+    if not path.exists():
+        print(f"Warning: {dags_file} not found; schedules are unknown", file=sys.stderr)
+        return {}
+    try:
+        with open(path) as f:
+            return yaml.safe_load(f) or {}
+    except Exception as e:
+        print(f"Warning: Could not parse {dags_file}: {e}", file=sys.stderr)
+        return {}
+
+
+def _cron_field(field: str, low: int, high: int) -> List[int]:
+    """Expand one cron field (*, */n, a-b, a-b/n, lists) into its values."""
+    values = set()
+    for part in field.split(","):
+        part, _, step = part.partition("/")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+        else:
+            start = end = int(part)
+            if step:
+                end = high
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return sorted(values)
+
+
+def parse_schedule(schedule_interval) -> Optional[Dict]:
+    """
+    Parse a schedule_interval.
+
+    Returns:
+        Dict with runs_per_day (float) and start_minutes (minutes after midnight UTC
+        of each run on a day it runs), or None for @once/None/unrecognised values
+    """
+    if schedule_interval is None:
+        return None
+    schedule = str(schedule_interval).strip().strip('"')
+    schedule = _PRESETS.get(schedule, schedule)
+
+    interval = _INTERVAL_RE.match(schedule)
+    if interval:
+        every = int(interval.group(1)) * _MINUTES[interval.group(2)]
+        if not every:
+            return None
+        return {
+            "runs_per_day": 1440 / every,
+            "start_minutes": list(range(0, 1440, every)) if every < 1440 else [0],
+        }
+
+    fields = schedule.split()
+    if len(fields) != 5:
+        return None
+    try:
+        minutes = _cron_field(fields[0], 0, 59)
+        hours = _cron_field(fields[1], 0, 23)
+        days_of_month = None if fields[2] == "*" else _cron_field(fields[2], 1, 31)
+        months = None if fields[3] == "*" else _cron_field(fields[3], 1, 12)
+        days_of_week = None if fields[4] == "*" else sorted({d % 7 for d in _cron_field(fields[4], 0, 7)})
+    except ValueError:
+        return None
+
+    day_fraction = 1.0
+    if days_of_month is not None:
+        day_fraction = len(days_of_month) / 30.44
+    if days_of_week is not None:
+        week_fraction = len(days_of_week) / 7
+        # Cron runs when either restricted day field matches
+        day_fraction = week_fraction if days_of_month is None else min(1.0, day_fraction + week_fraction)
+    if months is not None:
+        day_fraction *= len(months) / 12
+
+    return {
+        "runs_per_day": len(minutes) * len(hours) * day_fraction,
+        "start_minutes": [h * 60 + m for h in hours for m in minutes],
+    }
+
+
+def table_scheduling(sql_dir: str, fqn: str) -> Dict:
+    """Return the scheduling section of a table's metadata.yaml (empty if none)."""
+    project, dataset, table = fqn.split(".")
+    metadata_path = Path(sql_dir) / project / dataset / table / "metadata.yaml"
+    if not metadata_path.exists():
+        return {}
+    try:
+        with open(metadata_path) as f:
+            return (yaml.safe_load(f) or {}).get("scheduling") or {}
+    except Exception as e:
+        print(f"Warning: Could not parse {metadata_path}: {e}", file=sys.stderr)
+        return {}
+
+
+def table_schedule(sql_dir: str, fqn: str, dags: Dict[str, Dict]) -> Dict:
+    """
+    Resolve a table's DAG and schedule.
+
+    Returns:
+        Dict with dag_name (None if unscheduled), schedule_interval and schedule
+        (parse_schedule result, None if unknown)
+    """
+    dag_name = table_scheduling(sql_dir, fqn).get("dag_name")
+    schedule_interval = (dags.get(dag_name) or {}).get("schedule_interval") if dag_name else None
+    return {
+        "dag_name": dag_name,
+        "schedule_interval": schedule_interval,
+        "schedule": parse_schedule(schedule_interval),
+    }
+
+
+def runs_per_day(sql_dir: str, fqn: str, dags: Dict[str, Dict], default: float = 1.0) -> float:
+    """Runs per day of a table's DAG, falling back to default when unscheduled or unknown."""
+    schedule = table_schedule(sql_dir, fqn, dags)["schedule"]
+    return schedule["runs_per_day"] if schedule else default
+
+
+def qualify_table(identifier: str) -> str:
+    """Turn dataset.table or project.dataset.table into project.dataset.table."""
+    parts = identifier.replace("`", "").split(".")
+    if len(parts) == 2:
+        return f"{DEFAULT_PROJECT}.{parts[0]}.{parts[1]}"
+    if len(parts) == 3:
+        return ".".join(parts)
+    raise ValueError(f"Invalid table identifier: {identifier}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Show the DAG and schedule of tables or DAGs",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "tables",
+        nargs="*",
+        help="Tables (dataset.table or project.dataset.table)"
+    )
+    parser.add_argument(
+        "--dag",
+        action="append",
+        default=[],
+        help="DAG name to look up (repeatable)"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Root of the bigquery-etl sql/ tree (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--dags-file",
+        default=DEFAULT_DAGS_FILE,
+        help=f"Path to dags.yaml (default: {DEFAULT_DAGS_FILE})"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "text"],
+        default="text",
+        help="Output format (default: text)"
+    )
+
+    args = parser.parse_args()
+    if not args.tables and not args.dag:
+        parser.error("provide tables or --dag")
+
+    dags = load_dags(args.dags_file)
+    results = []
+    try:
+        for table in args.tables:
+            results.append({"table": table, **table_schedule(args.sql_dir, qualify_table(table), dags)})
+        for dag_name in args.dag:
+            schedule_interval = (dags.get(dag_name) or {}).get("schedule_interval")
+            results.append({
+                "dag_name": dag_name,
+                "schedule_interval": schedule_interval,
+                "schedule": parse_schedule(schedule_interval),
+            })
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.format == "json":
+        print(json.dumps(results, indent=2))
+        return
+
+    for result in results:
+        label = result.get("table") or result["dag_name"]
+        if not result["dag_name"]:
+            print(f"{label}: not scheduled (no scheduling.dag_name)")
+            continue
+        schedule = result["schedule"]
+        runs = f"{schedule['runs_per_day']:.2f} runs/day" if schedule else "unknown schedule"
+        print(f"{label}: {result['dag_name']} ({result['schedule_interval']}, {runs})")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,15 @@
 """
 DataHub Lineage Helper Script
 
-This script queries DataHub for table lineage and returns filtered, essential information.
-Use this instead of direct DataHub MCP calls to avoid verbose responses and save tokens.
+This script answers table lineage questions from the local sql/ tree and falls back
+to DataHub only when the local tree cannot answer. Lineage is computed offline from
+the FROM/JOIN references of every query.sql and view.sql, so most lookups need no
+DataHub round trip at all. Use this instead of direct DataHub MCP calls to avoid
+verbose responses and save tokens.
 
 Usage:
     python datahub_lineage.py <table_identifier> [--direction upstream|downstream] [--max-hops N]
+                              [--source auto|local|datahub] [--sql-dir PATH]
 
 Examples:
     # Get upstream tables
@@ -18,6 +22,48 @@ Examples:
     # Get lineage 2 hops away
     python datahub_lineage.py search_derived.search_clients_daily_v8 --max-hops 2
 
+    # Map the inputs of several tables at once (shared ancestors are expanded once)
+    python datahub_lineage.py telemetry_derived.clients_last_seen_v1 search_derived.search_clients_daily_v8 \
+        --max-hops 3
+
+    # Only use the local sql/ tree (fail instead of falling back to DataHub)
+    python datahub_lineage.py telemetry_derived.clients_daily_v1 --source local
+
+    # Always generate the DataHub MCP call (local tree and response cache are skipped)
+    python datahub_lineage.py telemetry_derived.clients_daily_v1 --source datahub
+
+    # Store a DataHub MCP response in the local cache (response JSON on stdin)
+    python datahub_lineage.py telemetry.main --direction downstream --ingest < response.json
+
+    # Format a large saved response incrementally, keeping only _derived tables
+    python datahub_lineage.py telemetry.main --direction downstream --max-hops 3 \
+        --response response.json --dataset-suffix _derived
+
+Lineage sources:
+    - local:   Parsed from sql/<project>/<dataset>/<table>/{query,view}.sql. Two-part
+               references (dataset.table) resolve to the project of the referencing file.
+    - datahub: MCP call template for mcp__datahub-cloud__get_lineage. Needed for tables
+               that are not produced in bqetl (ingestion, syndicated datasets) when
+               looking upstream.
+    - auto:    local when the table's lineage is known locally, then the response
+               cache, otherwise datahub.
+
+Batch lookups:
+    With several tables, lineage is computed for all of them in one walk with a
+    shared visited set. The output has a result per table, the merged DAG
+    (source -> consumer edges) and the minimal list of MCP calls needed for tables
+    whose lineage is not known locally (one call per table, with the remaining hop
+    budget; tables answered by the cache are skipped).
+
+Response cache:
+    DataHub responses stored with --ingest are cached on disk, keyed by
+    (urn, direction, max_hops, column), and answer later lookups without another
+    MCP call until they expire (--cache-ttl) or are evicted (--cache-max-entries,
+    least recently used first). A cached lookup with more hops also answers
+    lookups with fewer hops. --source datahub and --no-cache skip the cache.
+    Several agents can share the cache file: saves merge with it and replace it
+    atomically. Default location: ~/.cache/bigquery-etl-skills/.
+
 Table identifier formats accepted:
     - dataset.table (e.g., telemetry_derived.clients_daily_v1)
     - project.dataset.table (e.g., moz-fx-data-shared-prod.telemetry_derived.clients_daily_v1)
@@ -25,9 +71,52 @@ Table identifier formats accepted:
 """
 
 import argparse
+import hashlib
 import json
+import os
+import re
 import sys
-from typing import Dict, List, Set
+import tempfile
+import time
+from array import array
+from collections import deque
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are still atomic, but not serialized
+    fcntl = None
+
+# Reuse the FROM/JOIN parser from the glean-description-lookup skill
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "glean-description-lookup" / "scripts"))
+from extract_query_fields import (  # noqa: E402
+    extract_source_tables,
+    strip_comments,
+    strip_jinja,
+    strip_string_literals,
+)
+from render_jinja import render_sql_both_modes  # noqa: E402
+
+
+DEFAULT_PROJECT = "moz-fx-data-shared-prod"
+DEFAULT_SQL_DIR = "sql"
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "bigquery-etl-skills"
+DEFAULT_CACHE_TTL = 24 * 60 * 60  # seconds
+DEFAULT_CACHE_MAX_ENTRIES = 256
+
+# Read size for streaming large DataHub responses
+STREAM_CHUNK_SIZE = 1 << 16
+
+# Files whose FROM/JOIN references define a table's upstream lineage
+LINEAGE_SQL_FILES = ("query.sql", "view.sql")
+
+# EXTRACT(<part> FROM <expr>) would otherwise be read as a FROM clause
+_EXTRACT_RE = re.compile(r"\bEXTRACT\s*\([^()]*\)", re.IGNORECASE)
+
+# Start of an entity array in a DataHub lineage response
+_ENTITY_ARRAY_RE = re.compile(r'"(?:entities|searchResults)"\s*:\s*\[')
 
 
 def parse_table_identifier(identifier: str) -> dict:
@@ -53,7 +142,7 @@ def parse_table_identifier(identifier: str) -> dict:
     if len(parts) == 2:
         # dataset.table format (default project)
         dataset, table = parts
-        project = "moz-fx-data-shared-prod"
+        project = DEFAULT_PROJECT
     elif len(parts) == 3:
         # project.dataset.table format
         project, dataset, table = parts
@@ -72,6 +161,51 @@ def parse_table_identifier(identifier: str) -> dict:
     }
 
 
+def entity_table_info(entity: dict) -> Optional[dict]:
+    """
+    Extract essential table information from a single DataHub lineage entity.
+
+    Accepts both bare entities ({"urn": ..., "type": ...}) and search results
+    that wrap them ({"entity": {...}, "degree": N}).
+
+    Returns:
+        dict with urn, fqn, type, project, dataset, table (and hops when known),
+        or None if the entity is not a BigQuery dataset
+    """
+    if isinstance(entity.get("entity"), dict):
+        entity = {**entity["entity"], **{k: v for k, v in entity.items() if k != "entity"}}
+
+    urn = entity.get("urn", "")
+
+    # Extract table name from URN
+    if "bigquery" not in urn or "dataset:" not in urn:
+        return None
+
+    # urn:li:dataset:(urn:li:dataPlatform:bigquery,project.dataset.table,PROD)
+    parts = urn.split(",")
+    if len(parts) < 2:
+        return None
+
+    fqn = parts[1]
+    table_info = {
+        "urn": urn,
+        "fqn": fqn,
+        "type": entity.get("type", "dataset")
+    }
+
+    # Extract dataset and table name
+    fqn_parts = fqn.split(".")
+    if len(fqn_parts) >= 3:
+        table_info["project"] = fqn_parts[0]
+        table_info["dataset"] = fqn_parts[1]
+        table_info["table"] = ".".join(fqn_parts[2:])
+
+    if "degree" in entity:
+        table_info["hops"] = entity["degree"]
+
+    return table_info
+
+
 def format_lineage_result(lineage_data: dict, direction: str) -> dict:
     """
     Filter and format DataHub lineage response to essential information.
@@ -96,33 +230,511 @@ def format_lineage_result(lineage_data: dict, direction: str) -> dict:
     # Parse lineage entities
     entities = lineage_data.get("entities", [])
     for entity in entities:
-        urn = entity.get("urn", "")
-
-        # Extract table name from URN
-        if "bigquery" in urn and "dataset:" in urn:
-            # urn:li:dataset:(urn:li:dataPlatform:bigquery,project.dataset.table,PROD)
-            parts = urn.split(",")
-            if len(parts) >= 2:
-                fqn = parts[1]
-                table_info = {
-                    "urn": urn,
-                    "fqn": fqn,
-                    "type": entity.get("type", "dataset")
-                }
+        table_info = entity_table_info(entity)
+        if table_info:
+            result["tables"].append(table_info)
+
+    return result
+
+
+def iter_lineage_entities(stream: TextIO, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Yield entities from a DataHub lineage response one at a time.
+
+    The response is read in chunks and only the entity currently being decoded is
+    held in memory, so multi-megabyte responses can be processed without loading
+    them whole. Every "entities" / "searchResults" array in the response is read.
+
+    Raises:
+        ValueError: If the response ends in the middle of an entity array
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    eof = False
+
+    def read_more() -> str:
+        nonlocal eof
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+        return chunk
 
-                # Extract dataset and table name
-                fqn_parts = fqn.split(".")
-                if len(fqn_parts) >= 3:
-                    table_info["project"] = fqn_parts[0]
-                    table_info["dataset"] = fqn_parts[1]
-                    table_info["table"] = ".".join(fqn_parts[2:])
+    while True:
+        # Find the next entity array, keeping a tail in case the key straddles chunks
+        match = _ENTITY_ARRAY_RE.search(buf)
+        while not match:
+            if eof:
+                return
+            buf = buf[-64:] + read_more()
+            match = _ENTITY_ARRAY_RE.search(buf)
+        buf = buf[match.end():]
+        pos = 0
 
-                result["tables"].append(table_info)
+        # Decode array items one at a time
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf) or buf[pos] != "]":
+                try:
+                    if pos >= len(buf):
+                        raise json.JSONDecodeError("Need more data", buf, pos)
+                    item, pos = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise ValueError("Truncated or invalid DataHub lineage response")
+                    buf = buf[pos:] + read_more()
+                    pos = 0
+                    continue
+                if isinstance(item, dict):
+                    yield item
+                if pos > chunk_size:
+                    buf = buf[pos:]
+                    pos = 0
+                continue
+
+            buf = buf[pos + 1:]
+            break
+
+
+def stream_lineage_result(
+    stream: TextIO,
+    direction: str,
+    dataset_suffixes: Optional[List[str]] = None,
+    projects: Optional[List[str]] = None,
+) -> dict:
+    """
+    Streaming counterpart of format_lineage_result.
+
+    Reads the raw response incrementally, keeps only BigQuery dataset URNs,
+    drops duplicates and applies the dataset-suffix and project filters as each
+    entity is read, so memory use is proportional to the output.
+
+    Args:
+        stream: Text stream with the raw DataHub get_lineage response
+        direction: "upstream" or "downstream"
+        dataset_suffixes: Only keep tables whose dataset ends with one of these
+        projects: Only keep tables in one of these projects
+
+    Returns:
+        Filtered dict with only essential lineage info
+    """
+    result = {
+        "direction": direction,
+        "tables": []
+    }
+    seen: Dict[str, Optional[dict]] = {}
+
+    for entity in iter_lineage_entities(stream):
+        table_info = entity_table_info(entity)
+        if not table_info:
+            continue
+
+        urn = table_info["urn"]
+        if urn in seen:
+            # Keep the shortest path when a table is reachable at several depths
+            kept = seen[urn]
+            if kept and "hops" in table_info and table_info["hops"] < kept.get("hops", table_info["hops"]):
+                kept["hops"] = table_info["hops"]
+            continue
+
+        if table_matches(table_info, dataset_suffixes, projects):
+            seen[urn] = table_info
+            result["tables"].append(table_info)
+        else:
+            seen[urn] = None
 
     return result
 
 
-def get_lineage_via_mcp(table_urn: str, direction: str = "upstream", max_hops: int = 1) -> dict:
+def table_matches(
+    table_info: dict,
+    dataset_suffixes: Optional[List[str]] = None,
+    projects: Optional[List[str]] = None,
+) -> bool:
+    """Check a formatted table entry against optional dataset-suffix and project filters."""
+    if dataset_suffixes and not table_info.get("dataset", "").endswith(tuple(dataset_suffixes)):
+        return False
+    if projects and table_info.get("project") not in projects:
+        return False
+    return True
+
+
+def filter_lineage_result(
+    result: dict,
+    dataset_suffixes: Optional[List[str]] = None,
+    projects: Optional[List[str]] = None,
+) -> dict:
+    """Apply dataset-suffix and project filters to an already formatted lineage result."""
+    if not dataset_suffixes and not projects:
+        return result
+    return {
+        **result,
+        "tables": [t for t in result["tables"] if table_matches(t, dataset_suffixes, projects)],
+    }
+
+
+class LineageGraph:
+    """
+    Table-level lineage graph with integer-interned table IDs.
+
+    Each table's fully qualified name is interned once; edges are stored in
+    compressed sparse row form (one offsets array and one targets array per
+    direction), so the neighbours of table ``i`` are
+    ``targets[offsets[i]:offsets[i + 1]]``.
+    """
+
+    def __init__(self, names: List[str], edges: Iterable[Tuple[int, int]], defined: Set[int]):
+        """
+        Args:
+            names: Fully qualified table names, indexed by table ID
+            edges: (source_id, consumer_id) pairs, i.e. consumer reads from source
+            defined: IDs of tables that have a query.sql or view.sql in the tree
+        """
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.defined = defined
+
+        edges = sorted(set(edges))
+        self._downstream = self._to_csr(len(names), edges)
+        self._upstream = self._to_csr(len(names), [(dst, src) for src, dst in edges])
+        self.edge_count = len(edges)
+
+    @staticmethod
+    def _to_csr(node_count: int, edges: List[Tuple[int, int]]) -> Tuple[array, array]:
+        """Pack (from, to) pairs into CSR offsets/targets arrays."""
+        offsets = array("i", [0] * (node_count + 1))
+        for src, _ in edges:
+            offsets[src + 1] += 1
+        for i in range(node_count):
+            offsets[i + 1] += offsets[i]
+
+        targets = array("i", [0] * len(edges))
+        cursor = array("i", offsets[:-1])
+        for src, dst in edges:
+            targets[cursor[src]] = dst
+            cursor[src] += 1
+        return offsets, targets
+
+    def __contains__(self, fqn: str) -> bool:
+        return fqn in self.ids
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def neighbors(self, node_id: int, direction: str) -> array:
+        """Return the IDs one hop away from node_id in the given direction."""
+        offsets, targets = self._upstream if direction == "upstream" else self._downstream
+        return targets[offsets[node_id]:offsets[node_id + 1]]
+
+    def can_answer(self, fqn: str, direction: str) -> bool:
+        """
+        Check whether the local tree knows the lineage of a table.
+
+        Upstream lineage is only known for tables defined in the tree; downstream
+        lineage is known for any table that local queries read from.
+        """
+        node_id = self.ids.get(fqn)
+        if node_id is None:
+            return False
+        if direction == "upstream":
+            return node_id in self.defined
+        return True
+
+    def bfs(self, fqn: str, direction: str, max_hops: int) -> List[Tuple[str, int]]:
+        """
+        Breadth-first walk from a table.
+
+        Returns:
+            List of (fqn, hops) in BFS order, excluding the starting table
+        """
+        start = self.ids[fqn]
+        seen = {start}
+        queue = deque([(start, 0)])
+        found = []
+
+        while queue:
+            node_id, hops = queue.popleft()
+            if hops >= max_hops:
+                continue
+            for neighbor in self.neighbors(node_id, direction):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    found.append((self.names[neighbor], hops + 1))
+                    queue.append((neighbor, hops + 1))
+
+        return found
+
+
+def read_lineage_sql(sql_path: Path, sql_dir: str = DEFAULT_SQL_DIR) -> str:
+    """Read a query/view file (Jinja rendered for scheduled and init runs) and strip everything that is not a table reference."""
+    sql = strip_string_literals(strip_jinja(strip_comments(render_sql_both_modes(sql_path.read_text(), sql_dir))))
+    return _EXTRACT_RE.sub(" ", sql)
+
+
+def resolve_table_reference(reference: str, default_project: str) -> Optional[str]:
+    """Resolve a dataset.table or project.dataset.table reference to a fully qualified name."""
+    parts = reference.split(".")
+    if len(parts) == 2:
+        return f"{default_project}.{parts[0]}.{parts[1]}"
+    if len(parts) == 3:
+        return reference
+    return None
+
+
+def find_lineage_files(sql_dir: str = DEFAULT_SQL_DIR) -> List[Tuple[str, Path]]:
+    """
+    Find every query.sql / view.sql in the tree.
+
+    Returns:
+        List of (fqn, sql_path) where fqn is derived from sql/<project>/<dataset>/<table>/
+    """
+    files = []
+    for filename in LINEAGE_SQL_FILES:
+        for sql_path in Path(sql_dir).glob(f"*/*/*/{filename}"):
+            project, dataset, table = sql_path.parts[-4:-1]
+            files.append((f"{project}.{dataset}.{table}", sql_path))
+    return sorted(files)
+
+
+def lineage_tree_signature(sql_dir: str = DEFAULT_SQL_DIR) -> str:
+    """
+    Fingerprint the lineage files of a sql tree.
+
+    Derived from the path, size and modification time of every query.sql and
+    view.sql, so caches built from the tree can detect when it changed without
+    re-reading any SQL.
+    """
+    digest = hashlib.sha256()
+    for _, sql_path in find_lineage_files(sql_dir):
+        stat = sql_path.stat()
+        digest.update(f"{sql_path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def build_lineage_graph(sql_dir: str = DEFAULT_SQL_DIR) -> LineageGraph:
+    """Build the table-level lineage graph from the FROM/JOIN references in sql_dir."""
+    ids: Dict[str, int] = {}
+    names: List[str] = []
+
+    def intern(fqn: str) -> int:
+        node_id = ids.get(fqn)
+        if node_id is None:
+            node_id = ids[fqn] = len(names)
+            names.append(fqn)
+        return node_id
+
+    edges = []
+    defined = set()
+
+    for fqn, sql_path in find_lineage_files(sql_dir):
+        consumer = intern(fqn)
+        defined.add(consumer)
+        project = fqn.split(".")[0]
+
+        try:
+            sql = read_lineage_sql(sql_path, sql_dir)
+        except OSError as e:
+            print(f"Warning: Could not read {sql_path}: {e}", file=sys.stderr)
+            continue
+
+        for reference in extract_source_tables(sql):
+            source_fqn = resolve_table_reference(reference, project)
+            if source_fqn and source_fqn != fqn:
+                edges.append((intern(source_fqn), consumer))
+
+    return LineageGraph(names, edges, defined)
+
+
+def get_local_lineage(graph: LineageGraph, fqn: str, direction: str = "upstream", max_hops: int = 1) -> dict:
+    """
+    Compute lineage from the local graph.
+
+    Returns:
+        Lineage result in the same shape as format_lineage_result
+    """
+    entities = [
+        {
+            "urn": parse_table_identifier(name)["urn"],
+            "type": "dataset",
+            "degree": hops,
+        }
+        for name, hops in graph.bfs(fqn, direction, max_hops)
+    ]
+    return format_lineage_result({"entities": entities}, direction)
+
+
+class JsonFileCache:
+    """
+    On-disk TTL/LRU cache of JSON results in a single file, safe to share between processes.
+
+    Expired entries are dropped on access; when the cache grows past max_entries
+    the least recently used entries are evicted. Hits only update access times in
+    memory; they are persisted with the next put(). Saves hold a lock file, merge
+    with the file as it is on disk (newest entry per key wins) and replace it
+    atomically, so concurrent writers sharing a cache directory do not clobber
+    each other.
+    """
+
+    FILENAME = "cache.json"
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        ttl: int = DEFAULT_CACHE_TTL,
+        max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+    ):
+        self.path = Path(cache_dir) / self.FILENAME
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, dict) else {}
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable cache {self.path}: {e}", file=sys.stderr)
+            return {}
+
+    def _write(self, entries: Dict[str, dict]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp", delete=False
+        ) as f:
+            json.dump(entries, f)
+        os.replace(f.name, self.path)
+
+    @contextmanager
+    def _locked(self):
+        """Serialize read-merge-write cycles between processes (advisory lock file)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self.path.with_name(self.path.name + ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _save(self):
+        with self._locked():
+            self._merge_and_write()
+
+    def _merge_and_write(self):
+        merged = self._load()
+        for key, entry in self._entries.items():
+            other = merged.get(key)
+            if other is None or entry["stored_at"] >= other["stored_at"]:
+                merged[key] = entry
+            else:
+                other["accessed_at"] = max(other["accessed_at"], entry["accessed_at"])
+        self._entries = merged
+        now = time.time()
+        self._expire(now)
+        self._evict()
+        self._write(self._entries)
+
+    def _expire(self, now: float):
+        expired = [k for k, entry in self._entries.items() if now - entry["stored_at"] > self.ttl]
+        for k in expired:
+            del self._entries[k]
+
+    def _evict(self):
+        overflow = len(self._entries) - self.max_entries
+        if overflow > 0:
+            by_age = sorted(self._entries, key=lambda k: self._entries[k]["accessed_at"])
+            for k in by_age[:overflow]:
+                del self._entries[k]
+
+    def _get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        self._expire(now)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        entry["accessed_at"] = now
+        return entry
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached result for a key, or None."""
+        entry = self._get(key)
+        return entry["result"] if entry else None
+
+    def put(self, key: str, result: dict):
+        """Store a result, evicting least recently used entries if full."""
+        now = time.time()
+        self._entries[key] = {"stored_at": now, "accessed_at": now, "result": result}
+        self._save()
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        """Yield (key, result) for every unexpired entry."""
+        self._expire(time.time())
+        for key, entry in self._entries.items():
+            yield key, entry["result"]
+
+    def clear(self):
+        self._entries = {}
+        with self._locked():
+            self._write(self._entries)
+
+
+class LineageCache(JsonFileCache):
+    """
+    On-disk cache of formatted DataHub lineage responses.
+
+    Entries are keyed by (urn, direction, max_hops, column); see JsonFileCache for
+    expiry, eviction and sharing between processes.
+    """
+
+    FILENAME = "datahub_lineage_cache.json"
+
+    @staticmethod
+    def key(urn: str, direction: str, max_hops: int, column: Optional[str] = None) -> str:
+        return json.dumps([urn, direction, max_hops, column])
+
+    def get(self, urn: str, direction: str, max_hops: int, column: Optional[str] = None) -> Optional[dict]:
+        """
+        Look up a cached lineage result.
+
+        An exact key match is preferred; otherwise an entry for the same urn,
+        direction and column with more hops is filtered down to max_hops, provided
+        its tables carry hop counts.
+        """
+        entry = self._get(self.key(urn, direction, max_hops, column))
+        if entry is not None:
+            return entry["result"]
+
+        for hops in range(max_hops + 1, 4):
+            wider = self._get(self.key(urn, direction, hops, column))
+            if wider and all("hops" in t for t in wider["result"]["tables"]):
+                return {
+                    **wider["result"],
+                    "tables": [t for t in wider["result"]["tables"] if t["hops"] <= max_hops],
+                }
+        return None
+
+    def results(self) -> Iterator[Tuple[str, str, int, Optional[str], dict]]:
+        """Yield (urn, direction, max_hops, column, result) for every unexpired entry."""
+        for key, result in self.items():
+            urn, direction, max_hops, column = json.loads(key)
+            yield urn, direction, max_hops, column, result
+
+    def put(self, urn: str, direction: str, max_hops: int, result: dict, column: Optional[str] = None):
+        """Store a formatted lineage result, evicting least recently used entries if full."""
+        super().put(self.key(urn, direction, max_hops, column), result)
+
+
+def get_lineage_via_mcp(
+    table_urn: str,
+    direction: str = "upstream",
+    max_hops: int = 1,
+    column: Optional[str] = None,
+) -> dict:
     """
     Query DataHub via MCP tool for lineage.
 
@@ -133,6 +745,7 @@ def get_lineage_via_mcp(table_urn: str, direction: str = "upstream", max_hops: i
         table_urn: Full URN of the table
         direction: "upstream" or "downstream"
         max_hops: Number of hops (1-3)
+        column: Optional column name for column-level lineage
 
     Returns:
         Formatted lineage result
@@ -147,29 +760,200 @@ def get_lineage_via_mcp(table_urn: str, direction: str = "upstream", max_hops: i
     print("", file=sys.stderr)
     print("Use this information with the mcp__datahub-cloud__get_lineage tool:", file=sys.stderr)
 
-    mcp_call = {
+    return mcp_call_params(table_urn, direction, max_hops, column)
+
+
+def mcp_call_params(
+    table_urn: str,
+    direction: str = "upstream",
+    max_hops: int = 1,
+    column: Optional[str] = None,
+) -> dict:
+    """Build the mcp__datahub-cloud__get_lineage call for a table."""
+    return {
         "tool": "mcp__datahub-cloud__get_lineage",
         "parameters": {
             "urn": table_urn,
-            "column": None,
+            "column": column,
             "upstream": direction == "upstream",
             "max_hops": max_hops,
             "filters": None
         }
     }
 
-    return mcp_call
+
+def get_batch_lineage(
+    graph: Optional[LineageGraph],
+    fqns: List[str],
+    direction: str = "upstream",
+    max_hops: int = 1,
+    cache: Optional[LineageCache] = None,
+) -> dict:
+    """
+    Compute lineage for several tables in one pass.
+
+    All roots share a single visited set: the walk starts from every root at once
+    and each table is expanded exactly once, at its smallest distance from any
+    root (which leaves it the largest remaining hop budget). The expanded edges
+    form the merged DAG, and per-root results are read back from that DAG.
+
+    Tables whose lineage the local graph does not know become gaps. Each gap is
+    reported once, with the hop budget it still needs; gaps already answered by
+    the cache are listed separately instead of producing an MCP call.
+
+    Returns:
+        dict with "roots" (format_lineage_result-shaped result per root),
+        "merged" (tables and source -> consumer edges of the union DAG),
+        "cached" (gap tables served from the cache) and "mcp_calls"
+    """
+    roots = list(dict.fromkeys(fqns))
+    depth = {fqn: 0 for fqn in roots}
+    adjacency: Dict[str, List[str]] = {}
+    gaps: Dict[str, int] = {}
+    queue = deque(roots)
+
+    while queue:
+        fqn = queue.popleft()
+        remaining = max_hops - depth[fqn]
+        if remaining <= 0:
+            continue
+        if graph is None or not graph.can_answer(fqn, direction):
+            gaps[fqn] = remaining
+            continue
+
+        neighbors = [graph.names[i] for i in graph.neighbors(graph.ids[fqn], direction)]
+        adjacency[fqn] = neighbors
+        for neighbor in neighbors:
+            if neighbor not in depth:
+                depth[neighbor] = depth[fqn] + 1
+                queue.append(neighbor)
+
+    def walk(root: str) -> List[Tuple[str, int]]:
+        seen = {root}
+        frontier = [root]
+        found = []
+        for hops in range(1, max_hops + 1):
+            next_frontier = []
+            for fqn in frontier:
+                for neighbor in adjacency.get(fqn, []):
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        found.append((neighbor, hops))
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return found
+
+    per_root = {}
+    for root in roots:
+        entities = [
+            {"urn": parse_table_identifier(name)["urn"], "type": "dataset", "degree": hops}
+            for name, hops in walk(root)
+        ]
+        per_root[root] = format_lineage_result({"entities": entities}, direction)
+
+    edges = sorted(
+        (neighbor, fqn) if direction == "upstream" else (fqn, neighbor)
+        for fqn, neighbors in adjacency.items()
+        for neighbor in neighbors
+    )
+
+    cached = {}
+    mcp_calls = []
+    for fqn, remaining in sorted(gaps.items()):
+        urn = parse_table_identifier(fqn)["urn"]
+        hit = cache.get(urn, direction, remaining) if cache else None
+        if hit is not None:
+            cached[fqn] = hit
+        else:
+            mcp_calls.append(mcp_call_params(urn, direction, remaining))
+
+    return {
+        "direction": direction,
+        "max_hops": max_hops,
+        "roots": per_root,
+        "merged": {"tables": sorted(depth), "edges": [list(edge) for edge in edges]},
+        "cached": cached,
+        "mcp_calls": mcp_calls,
+    }
+
+
+def print_lineage_result(table_info: dict, result: dict, max_hops: int, source: str = "local sql tree"):
+    """Print a lineage result computed locally or served from the cache."""
+    print(f"\n📊 Lineage for: {table_info['fqn']} ({source})\n")
+    print(f"Direction: {result['direction']}")
+    print(f"Max Hops: {max_hops}")
+    print()
+
+    if not result["tables"]:
+        print(f"No {result['direction']} tables found.\n")
+        return
+
+    for table in result["tables"]:
+        hops = table.get("hops")
+        print(f"  [{hops}] {table['fqn']}" if hops else f"  {table['fqn']}")
+    print(f"\n{len(result['tables'])} table(s)\n")
+
+
+def print_mcp_call(table_info: dict, mcp_call: dict, direction: str, max_hops: int):
+    """Print the DataHub MCP call for a table the local tree cannot answer."""
+    print(f"\n📊 Lineage Query for: {table_info['fqn']}\n")
+    print(f"Direction: {direction}")
+    print(f"Max Hops: {max_hops}")
+    print(f"\nURN: {table_info['urn']}")
+    print(f"\n🔧 MCP Tool Call:\n")
+    print(json.dumps(mcp_call, indent=2))
+    print("\n💡 This script provides the parameters for Claude Code to query DataHub efficiently.")
+    print("   Claude Code will filter the results to show only essential lineage information.\n")
+
+
+def print_batch_result(batch: dict):
+    """Print the per-root results, merged DAG and outstanding MCP calls of a batch lookup."""
+    print(f"\n📊 Batch Lineage for {len(batch['roots'])} tables\n")
+    print(f"Direction: {batch['direction']}")
+    print(f"Max Hops: {batch['max_hops']}")
+
+    for root, result in batch["roots"].items():
+        print(f"\n{root}")
+        if not result["tables"]:
+            print("  (nothing known locally)")
+        for table in result["tables"]:
+            print(f"  [{table['hops']}] {table['fqn']}")
+
+    merged = batch["merged"]
+    print(f"\nMerged DAG: {len(merged['tables'])} tables, {len(merged['edges'])} edges")
+
+    for fqn, result in batch["cached"].items():
+        print(f"\n{fqn} (DataHub, cached)")
+        for table in result["tables"]:
+            hops = table.get("hops")
+            print(f"  [{hops}] {table['fqn']}" if hops else f"  {table['fqn']}")
+
+    if batch["mcp_calls"]:
+        print(f"\n🔧 {len(batch['mcp_calls'])} MCP call(s) needed to fill gaps in the local graph:\n")
+        print(json.dumps(batch["mcp_calls"], indent=2))
+    print()
+
+
+def emit_result(table_info: dict, result: dict, source: str, args):
+    """Print a lineage result in the requested format."""
+    if args.format == "json":
+        print(json.dumps({"table": table_info["fqn"], "source": source, **result}, indent=2))
+    else:
+        label = {"local": "local sql tree", "cache": "DataHub, cached"}.get(source, "DataHub")
+        print_lineage_result(table_info, result, args.max_hops, label)
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Query DataHub for table lineage with filtered results",
+        description="Query table lineage from the local sql tree, with DataHub as fallback",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog=__doc__
     )
     parser.add_argument(
-        "table",
-        help="Table identifier (dataset.table or project.dataset.table)"
+        "tables",
+        nargs="+",
+        metavar="table",
+        help="Table identifier(s) (dataset.table or project.dataset.table)"
     )
     parser.add_argument(
         "--direction",
@@ -184,37 +968,153 @@ def main():
         choices=[1, 2, 3],
         help="Maximum hops for lineage (default: 1)"
     )
+    parser.add_argument(
+        "--column",
+        help="Column name for column-level lineage (DataHub only)"
+    )
     parser.add_argument(
         "--format",
         choices=["json", "text"],
         default="text",
         help="Output format (default: text)"
     )
+    parser.add_argument(
+        "--source",
+        choices=["auto", "local", "datahub"],
+        default="auto",
+        help="Lineage source (default: auto - local sql tree, DataHub as fallback)"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Path to sql directory (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--ingest",
+        action="store_true",
+        help="Read a raw DataHub MCP lineage response from stdin and store it in the cache"
+    )
+    parser.add_argument(
+        "--response",
+        metavar="PATH",
+        help="Format a raw DataHub MCP lineage response read incrementally from PATH ('-' for stdin)"
+    )
+    parser.add_argument(
+        "--dataset-suffix",
+        action="append",
+        help="Only report tables whose dataset ends with this suffix (repeatable, e.g. _derived)"
+    )
+    parser.add_argument(
+        "--project",
+        action="append",
+        help="Only report tables in this project (repeatable)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(DEFAULT_CACHE_DIR),
+        help=f"Directory for the DataHub response cache (default: {DEFAULT_CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=DEFAULT_CACHE_TTL,
+        help=f"Seconds before a cached DataHub response expires (default: {DEFAULT_CACHE_TTL})"
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=DEFAULT_CACHE_MAX_ENTRIES,
+        help=f"Maximum number of cached DataHub responses (default: {DEFAULT_CACHE_MAX_ENTRIES})"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read from the DataHub response cache"
+    )
 
     args = parser.parse_args()
 
     try:
+        cache = LineageCache(Path(args.cache_dir), args.cache_ttl, args.cache_max_entries)
+        # --source datahub always generates the MCP call
+        use_cache = not args.no_cache and args.source != "datahub"
+        filters = (args.dataset_suffix, args.project)
+
+        if len(args.tables) > 1:
+            if args.ingest or args.response or args.column:
+                raise ValueError("--ingest, --response and --column take a single table")
+
+            fqns = [parse_table_identifier(t)["fqn"] for t in args.tables]
+            graph = None
+            if args.source != "datahub" and Path(args.sql_dir).exists():
+                graph = build_lineage_graph(args.sql_dir)
+            elif args.source == "local":
+                raise ValueError(f"SQL directory not found: {args.sql_dir}")
+
+            batch = get_batch_lineage(
+                graph, fqns, args.direction, args.max_hops, cache if use_cache else None
+            )
+            batch["roots"] = {k: filter_lineage_result(v, *filters) for k, v in batch["roots"].items()}
+            batch["cached"] = {k: filter_lineage_result(v, *filters) for k, v in batch["cached"].items()}
+
+            if args.format == "json":
+                print(json.dumps(batch, indent=2))
+            else:
+                print_batch_result(batch)
+            return
+
         # Parse table identifier
-        table_info = parse_table_identifier(args.table)
+        table_info = parse_table_identifier(args.tables[0])
+
+        if args.ingest:
+            result = stream_lineage_result(sys.stdin, args.direction)
+            cache.put(table_info["urn"], args.direction, args.max_hops, result, args.column)
+            emit_result(table_info, filter_lineage_result(result, *filters), "cache", args)
+            return
+
+        if args.response:
+            if args.response == "-":
+                result = stream_lineage_result(sys.stdin, args.direction, *filters)
+            else:
+                with open(args.response) as f:
+                    result = stream_lineage_result(f, args.direction, *filters)
+            emit_result(table_info, result, "datahub", args)
+            return
+
+        if args.source != "datahub" and not args.column:
+            if not Path(args.sql_dir).exists():
+                if args.source == "local":
+                    raise ValueError(f"SQL directory not found: {args.sql_dir}")
+            else:
+                graph = build_lineage_graph(args.sql_dir)
+                if graph.can_answer(table_info.get("fqn"), args.direction):
+                    result = get_local_lineage(graph, table_info["fqn"], args.direction, args.max_hops)
+                    emit_result(table_info, filter_lineage_result(result, *filters), "local", args)
+                    return
+                if args.source == "local":
+                    raise ValueError(
+                        f"{args.direction.capitalize()} lineage of {table_info.get('fqn')} "
+                        f"is not known in {args.sql_dir}"
+                    )
+
+        if use_cache:
+            result = cache.get(table_info["urn"], args.direction, args.max_hops, args.column)
+            if result is not None:
+                emit_result(table_info, filter_lineage_result(result, *filters), "cache", args)
+                return
 
         # Generate MCP call template
         mcp_call = get_lineage_via_mcp(
             table_info["urn"],
             args.direction,
-            args.max_hops
+            args.max_hops,
+            args.column
         )
 
         if args.format == "json":
             print(json.dumps(mcp_call, indent=2))
         else:
-            print(f"\n📊 Lineage Query for: {table_info['fqn']}\n")
-            print(f"Direction: {args.direction}")
-            print(f"Max Hops: {args.max_hops}")
-            print(f"\nURN: {table_info['urn']}")
-            print(f"\n🔧 MCP Tool Call:\n")
-            print(json.dumps(mcp_call, indent=2))
-            print("\n💡 This script provides the parameters for Claude Code to query DataHub efficiently.")
-            print("   Claude Code will filter the results to show only essential lineage information.\n")
+            print_mcp_call(table_info, mcp_call, args.direction, args.max_hops)
 
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
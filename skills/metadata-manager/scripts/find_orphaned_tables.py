@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Orphaned Table Detector
+
+Lists tables that are built by a query in the repository but that no other
+query.sql or view.sql reads, together with how often they run and who owns them,
+so dead weight can be decommissioned or moved to a slower schedule.
+
+Downstream readers come from the local lineage graph (every FROM/JOIN in
+query.sql/view.sql, see datahub_lineage.py). Schedules come from
+scheduling.dag_name + dags.yaml (dag_schedule.py) and owners from metadata.yaml
+(`owners`, with GitHub teams picked out the same way as detect_teams.py).
+
+Readers outside the repository (Looker, dashboards, ad hoc analysis, other
+projects) are invisible here: confirm with DataHub lineage or the table's owners
+before deleting anything. Tables marked `deprecated: true` are flagged as such.
+
+Usage:
+    python scripts/find_orphaned_tables.py [--dataset PATTERN] [options]
+
+Examples:
+    # All orphaned _derived tables
+    python scripts/find_orphaned_tables.py
+
+    # One dataset, with storage size from a table-stats snapshot, as JSON
+    python scripts/find_orphaned_tables.py --dataset search_derived --stats table_stats.csv --format json
+
+    # Only scheduled tables (the ones costing slots every day)
+    python scripts/find_orphaned_tables.py --scheduled-only
+"""
+
+import argparse
+import fnmatch
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(SKILLS_DIR / "model-requirements" / "scripts"))
+from check_aggregated_alternatives import format_bytes, load_table_stats  # noqa: E402
+from dag_schedule import DEFAULT_DAGS_FILE, load_dags, table_schedule  # noqa: E402
+from datahub_lineage import DEFAULT_SQL_DIR, build_lineage_graph, find_lineage_files  # noqa: E402
+from detect_teams import extract_teams_from_metadata  # noqa: E402
+
+
+DEFAULT_DATASET_PATTERN = "*_derived"
+
+
+def read_metadata(metadata_path: Path) -> Dict:
+    if not metadata_path.exists():
+        return {}
+    try:
+        with open(metadata_path) as f:
+            return yaml.safe_load(f) or {}
+    except Exception as e:
+        print(f"Warning: Could not parse {metadata_path}: {e}", file=sys.stderr)
+        return {}
+
+
+def suggest_action(runs_per_day: Optional[float], deprecated: bool) -> str:
+    if deprecated:
+        return "marked deprecated: remove the query and table"
+    if runs_per_day is None:
+        return "not scheduled: delete if obsolete"
+    if runs_per_day > 1:
+        return "decommission, or reduce to a daily schedule"
+    if runs_per_day == 1:
+        return "decommission, or move to a weekly DAG if still needed"
+    return "decommission if no longer used"
+
+
+def find_orphaned_tables(
+    sql_dir: str = DEFAULT_SQL_DIR,
+    dags: Optional[Dict[str, Dict]] = None,
+    dataset_pattern: str = DEFAULT_DATASET_PATTERN,
+    stats: Optional[Dict[str, Dict]] = None,
+) -> List[Dict]:
+    """
+    Find query-built tables that no query or view in the tree reads.
+
+    Returns:
+        One dict per orphaned table: table, dag_name, schedule_interval, runs_per_day,
+        owners, teams, deprecated, bytes (None without stats) and suggestion; sorted
+        by runs/day, then size, descending
+    """
+    dags = dags or {}
+    graph = build_lineage_graph(sql_dir)
+
+    orphans = []
+    for fqn, sql_path in find_lineage_files(sql_dir):
+        if sql_path.name != "query.sql":
+            continue
+        dataset = fqn.split(".")[1]
+        if not fnmatch.fnmatch(dataset, dataset_pattern):
+            continue
+        if fqn in graph and len(graph.neighbors(graph.ids[fqn], "downstream")):
+            continue
+
+        metadata_path = sql_path.parent / "metadata.yaml"
+        metadata = read_metadata(metadata_path)
+        owners = [o for o in metadata.get("owners") or [] if isinstance(o, str)]
+        schedule = table_schedule(sql_dir, fqn, dags)
+        runs = schedule["schedule"]["runs_per_day"] if schedule["schedule"] else None
+        deprecated = bool(metadata.get("deprecated"))
+        table_stats = (stats or {}).get(fqn)
+
+        orphans.append({
+            "table": fqn,
+            "dag_name": schedule["dag_name"],
+            "schedule_interval": schedule["schedule_interval"],
+            "runs_per_day": runs,
+            "owners": [o for o in owners if "@" in o],
+            "teams": extract_teams_from_metadata(metadata_path) if owners else [],
+            "deprecated": deprecated,
+            "bytes": table_stats["bytes"] if table_stats else None,
+            "suggestion": suggest_action(runs if schedule["dag_name"] else None, deprecated),
+        })
+
+    return sorted(orphans, key=lambda o: (-(o["runs_per_day"] or 0), -(o["bytes"] or 0), o["table"]))
+
+
+def format_output(orphans: List[Dict], output_format: str = "text") -> str:
+    """Format orphaned tables as JSON or text, grouped by dataset."""
+    if output_format == "json":
+        return json.dumps(orphans, indent=2)
+
+    by_dataset = defaultdict(list)
+    for orphan in orphans:
+        by_dataset[orphan["table"].split(".")[1]].append(orphan)
+
+    output = []
+    for dataset in sorted(by_dataset):
+        output.append(f"📁 {dataset}")
+        for orphan in by_dataset[dataset]:
+            if orphan["dag_name"]:
+                runs = orphan["runs_per_day"]
+                schedule = f"{orphan['dag_name']} ({orphan['schedule_interval']}"
+                schedule += f", {runs:.3g} runs/day)" if runs is not None else ")"
+            else:
+                schedule = "not scheduled"
+            owners = ", ".join(orphan["teams"] + orphan["owners"]) or "no owners"
+            size = f" | {format_bytes(orphan['bytes'])}" if orphan["bytes"] is not None else ""
+            deprecated = " [deprecated]" if orphan["deprecated"] else ""
+            output.append(f"   • {orphan['table'].split('.')[-1]}{deprecated}")
+            output.append(f"      {schedule}{size}")
+            output.append(f"      Owners: {owners}")
+            output.append(f"      → {orphan['suggestion']}")
+        output.append("")
+
+    scheduled = sum(1 for o in orphans if o["dag_name"])
+    daily_runs = sum(o["runs_per_day"] or 0 for o in orphans if o["dag_name"])
+    output.append(
+        f"{len(orphans)} table(s) with no downstream readers in the repo; "
+        f"{scheduled} scheduled ({daily_runs:.3g} runs/day)"
+    )
+    output.append("Readers outside the repo are not visible: confirm with DataHub lineage and owners first.")
+    return "\n".join(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="List tables that no query or view in the repository reads",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "--dataset",
+        default=DEFAULT_DATASET_PATTERN,
+        metavar="PATTERN",
+        help=f"Only report datasets matching this fnmatch pattern (default: {DEFAULT_DATASET_PATTERN})"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Root of the bigquery-etl sql/ tree (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--dags-file",
+        default=DEFAULT_DAGS_FILE,
+        help=f"Path to dags.yaml (default: {DEFAULT_DAGS_FILE})"
+    )
+    parser.add_argument(
+        "--stats",
+        metavar="PATH",
+        help="Table-statistics snapshot (JSON or CSV) to include storage size"
+    )
+    parser.add_argument(
+        "--scheduled-only",
+        action="store_true",
+        help="Only list tables that are scheduled in a DAG"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "text"],
+        default="text",
+        help="Output format (default: text)"
+    )
+
+    args = parser.parse_args()
+
+    if not Path(args.sql_dir).exists():
+        print(f"Error: SQL directory not found: {args.sql_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        stats = load_table_stats(args.stats) if args.stats else None
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not load table stats {args.stats}: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    try:
+        orphans = find_orphaned_tables(args.sql_dir, load_dags(args.dags_file), args.dataset, stats)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.scheduled_only:
+        orphans = [o for o in orphans if o["dag_name"]]
+    print(format_output(orphans, args.format))
+
+
+if __name__ == "__main__":
+    main()
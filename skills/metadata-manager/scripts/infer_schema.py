@@ -0,0 +1,755 @@
+#!/usr/bin/env python3
+"""
+Offline Schema Inference
+
+Drafts a schema.yaml for a query without a dry run, by propagating column types
+from upstream schema.yaml files through CTEs, subqueries and views.
+
+Each output expression of the final SELECT is typed from:
+    - columns of the tables it reads (schema.yaml, or view.sql inferred in turn),
+      including nested STRUCT paths and UNNEST aliases (element of a REPEATED field)
+    - literals, CAST/SAFE_CAST, typed literals (DATE '...'), @*_date parameters
+    - a built-in table of BigQuery functions: COUNT -> INTEGER, SUM over INTEGER
+      -> INTEGER (FLOAT otherwise), AVG -> FLOAT, DATE(...) -> DATE,
+      ARRAY_AGG(x) -> REPEATED x, STRUCT(...) -> RECORD, MIN/MAX/ANY_VALUE -> type
+      of the argument, window functions, ...
+    - `RETURNS <type>` of UDFs defined in the sql/ tree (mozfun.*, udf.*)
+    - comparisons and logical operators (BOOLEAN), arithmetic (INTEGER/FLOAT/NUMERIC
+      widening, `/` -> FLOAT), CASE and IF branches, scalar and ARRAY subqueries
+
+Descriptions are carried over from upstream for columns passed through unchanged,
+kept from an existing schema.yaml, and (with --use-global-schema) taken from
+bigquery_etl/schema/global.yaml. Expressions that cannot be typed are written as
+`type: UNKNOWN` with a TODO comment and reported, so the draft fails loudly until
+they are fixed. `./bqetl query schema update` remains the source of truth.
+
+Usage:
+    python scripts/infer_schema.py <query.sql | dataset.table> [options]
+
+Examples:
+    # Print a draft schema
+    python scripts/infer_schema.py telemetry_derived.clients_last_seen_v1
+
+    # Write schema.yaml next to query.sql, with global descriptions
+    python scripts/infer_schema.py sql/moz-fx-data-shared-prod/telemetry_derived/my_table_v1/query.sql --write --use-global-schema
+
+    # Replace an existing schema.yaml (its descriptions are kept)
+    python scripts/infer_schema.py telemetry_derived.my_table_v1 --write --force
+"""
+
+import argparse
+import copy
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from preview_base_schema import find_field_in_base_schema, load_schema_file  # noqa: E402
+from validate_schema_sync import (  # noqa: E402
+    DEFAULT_PROJECT,
+    DEFAULT_SQL_DIR,
+    MAX_EXPANSION_DEPTH,
+    STAR_RE,
+    clean_sql,
+    closing_paren,
+    column_name,
+    find_top_level,
+    mask_depths,
+    parse_select,
+    read_schema_fields,
+    split_top_level,
+    star_entries,
+)
+
+
+DEFAULT_BASE_SCHEMAS_DIR = "bigquery_etl/schema"
+UNKNOWN = "UNKNOWN"
+
+# Standard SQL type names -> schema.yaml (legacy) type names
+TYPE_NAMES = {
+    "INT64": "INTEGER", "INT": "INTEGER", "INTEGER": "INTEGER", "SMALLINT": "INTEGER",
+    "BIGINT": "INTEGER", "TINYINT": "INTEGER", "BYTEINT": "INTEGER",
+    "FLOAT64": "FLOAT", "FLOAT": "FLOAT", "NUMERIC": "NUMERIC", "DECIMAL": "NUMERIC",
+    "BIGNUMERIC": "BIGNUMERIC", "BIGDECIMAL": "BIGNUMERIC", "BOOL": "BOOLEAN", "BOOLEAN": "BOOLEAN",
+    "STRING": "STRING", "BYTES": "BYTES", "DATE": "DATE", "DATETIME": "DATETIME", "TIME": "TIME",
+    "TIMESTAMP": "TIMESTAMP", "JSON": "JSON", "GEOGRAPHY": "GEOGRAPHY", "INTERVAL": "INTERVAL",
+}
+NUMERIC_RANK = {"INTEGER": 0, "NUMERIC": 1, "BIGNUMERIC": 2, "FLOAT": 3}
+
+# Functions with a fixed result type
+FUNCTION_TYPES = {
+    "INTEGER": [
+        "COUNT", "COUNTIF", "APPROX_COUNT_DISTINCT", "HLL_COUNT.EXTRACT", "HLL_COUNT.MERGE",
+        "ROW_NUMBER", "RANK", "DENSE_RANK", "NTILE", "DATE_DIFF", "DATETIME_DIFF", "TIMESTAMP_DIFF",
+        "TIME_DIFF", "LENGTH", "CHAR_LENGTH", "CHARACTER_LENGTH", "BYTE_LENGTH", "ARRAY_LENGTH",
+        "FARM_FINGERPRINT", "UNIX_DATE", "UNIX_SECONDS", "UNIX_MILLIS", "UNIX_MICROS", "STRPOS",
+        "INSTR", "BIT_COUNT", "SIGN", "DIV", "ASCII", "UNICODE", "BIT_AND", "BIT_OR", "BIT_XOR",
+    ],
+    "FLOAT": [
+        "SAFE_DIVIDE", "IEEE_DIVIDE", "RAND", "SQRT", "POW", "POWER", "EXP", "LN", "LOG", "LOG10",
+        "STDDEV", "STDDEV_POP", "STDDEV_SAMP", "VARIANCE", "VAR_POP", "VAR_SAMP", "CORR",
+        "COVAR_POP", "COVAR_SAMP", "PERCENT_RANK", "CUME_DIST", "PERCENTILE_CONT", "COS", "SIN",
+        "TAN", "ACOS", "ASIN", "ATAN", "ATAN2", "ST_DISTANCE", "ST_AREA", "ST_LENGTH",
+    ],
+    "STRING": [
+        "STRING_AGG", "LOWER", "UPPER", "CONCAT", "FORMAT", "SUBSTR", "SUBSTRING", "REPLACE",
+        "TRIM", "LTRIM", "RTRIM", "LPAD", "RPAD", "REVERSE", "REPEAT", "INITCAP", "NORMALIZE",
+        "REGEXP_EXTRACT", "REGEXP_REPLACE", "REGEXP_SUBSTR", "JSON_VALUE", "JSON_EXTRACT_SCALAR",
+        "JSON_EXTRACT", "JSON_QUERY", "TO_JSON_STRING", "TO_HEX", "TO_BASE64", "FORMAT_DATE",
+        "FORMAT_TIMESTAMP", "FORMAT_DATETIME", "FORMAT_TIME", "GENERATE_UUID", "ARRAY_TO_STRING",
+        "SESSION_USER", "NET.HOST", "NET.REG_DOMAIN", "NET.PUBLIC_SUFFIX", "CODE_POINTS_TO_STRING",
+        "SAFE_CONVERT_BYTES_TO_STRING", "LEFT", "RIGHT", "SOUNDEX", "TRANSLATE", "STRING",
+    ],
+    "BOOLEAN": [
+        "LOGICAL_AND", "LOGICAL_OR", "STARTS_WITH", "ENDS_WITH", "REGEXP_CONTAINS", "CONTAINS_SUBSTR",
+        "IS_INF", "IS_NAN", "ST_CONTAINS", "ST_INTERSECTS", "ST_DWITHIN", "EXISTS", "BOOL",
+    ],
+    "DATE": [
+        "DATE", "DATE_TRUNC", "DATE_SUB", "DATE_ADD", "CURRENT_DATE", "PARSE_DATE", "DATE_FROM_UNIX_DATE",
+        "LAST_DAY",
+    ],
+    "TIMESTAMP": [
+        "TIMESTAMP", "TIMESTAMP_TRUNC", "TIMESTAMP_SUB", "TIMESTAMP_ADD", "CURRENT_TIMESTAMP",
+        "PARSE_TIMESTAMP", "TIMESTAMP_SECONDS", "TIMESTAMP_MILLIS", "TIMESTAMP_MICROS",
+    ],
+    "DATETIME": ["DATETIME", "DATETIME_TRUNC", "DATETIME_SUB", "DATETIME_ADD", "CURRENT_DATETIME", "PARSE_DATETIME"],
+    "TIME": ["TIME", "TIME_TRUNC", "TIME_SUB", "TIME_ADD", "CURRENT_TIME", "PARSE_TIME"],
+    "BYTES": ["SHA256", "SHA1", "SHA512", "MD5", "FROM_HEX", "FROM_BASE64", "HLL_COUNT.INIT", "KEYS.NEW_KEYSET"],
+    "JSON": ["JSON_QUERY_ARRAY", "PARSE_JSON", "TO_JSON", "JSON_OBJECT", "JSON_ARRAY"],
+    "GEOGRAPHY": ["ST_GEOGPOINT", "ST_GEOGFROMTEXT", "ST_CENTROID", "ST_UNION_AGG"],
+}
+FIXED_TYPES = {name: field_type for field_type, names in FUNCTION_TYPES.items() for name in names}
+# Functions returning the type of an argument (index), e.g. MIN(x) -> type of x
+ARGUMENT_FUNCTIONS = {
+    "MIN": 0, "MAX": 0, "ANY_VALUE": 0, "LAG": 0, "LEAD": 0, "FIRST_VALUE": 0, "LAST_VALUE": 0,
+    "NTH_VALUE": 0, "ABS": 0, "NULLIF": 0, "MOD": 0, "ARRAY_CONCAT": 0, "ARRAY_CONCAT_AGG": 0,
+    "ARRAY_REVERSE": 0, "MAX_BY": 0, "MIN_BY": 0, "ARRAY_FILTER": 0,
+}
+# Functions returning the first typable argument (from the given index)
+COALESCING_FUNCTIONS = {"COALESCE": 0, "IFNULL": 0, "GREATEST": 0, "LEAST": 0, "IF": 1}
+# Functions returning an array of a fixed type
+ARRAY_FUNCTIONS = {
+    "SPLIT": "STRING", "REGEXP_EXTRACT_ALL": "STRING", "GENERATE_ARRAY": "INTEGER",
+    "GENERATE_DATE_ARRAY": "DATE", "GENERATE_TIMESTAMP_ARRAY": "TIMESTAMP",
+    "JSON_EXTRACT_ARRAY": "STRING", "JSON_VALUE_ARRAY": "STRING", "JSON_EXTRACT_STRING_ARRAY": "STRING",
+}
+# Date parts EXTRACT returns as something other than INTEGER
+EXTRACT_PART_TYPES = {"DATE": "DATE", "TIME": "TIME", "DATETIME": "DATETIME"}
+
+_BOOLEAN_OPERATOR_RE = re.compile(
+    r"\b(?:AND|OR|NOT|IS|IN|LIKE|BETWEEN|EXISTS)\b|<=|>=|<>|!=|=|<|>", re.IGNORECASE
+)
+_ARITHMETIC_RE = re.compile(r"(?<=[\w)\]'`\s])\s*([+\-*/])\s*(?=[\w(@'`.\-])")
+_CASE_RE = re.compile(r"\bCASE\b|\bEND\b", re.IGNORECASE)
+# Function names, including backticked (hyphenated) parts: `moz-fx-data-shared-prod.udf.f`(x)
+_CALL_RE = re.compile(r"((?:SAFE\.)?(?:`[\w.\-]+`|[A-Za-z_]\w*)(?:\.(?:`[\w\-]+`|\w+))*)\s*\(", re.IGNORECASE)
+_RETURNS_RE = re.compile(r"\bRETURNS\s+(.+?)\s+(?:LANGUAGE|AS|DETERMINISTIC|NOT\s+DETERMINISTIC)\b", re.IGNORECASE | re.DOTALL)
+
+
+def typed(field_type: str, mode: str = "NULLABLE", fields: Optional[List[Dict]] = None) -> Dict:
+    result = {"type": field_type, "mode": mode}
+    if fields is not None:
+        result["fields"] = fields
+    return result
+
+
+def element(value: Optional[Dict]) -> Optional[Dict]:
+    """Element type of an array value (the value itself if it is not REPEATED)."""
+    if value is None:
+        return None
+    result = copy.deepcopy(value)
+    result["mode"] = "NULLABLE"
+    result.pop("name", None)
+    result.pop("description", None)
+    return result
+
+
+def repeated(value: Optional[Dict]) -> Optional[Dict]:
+    if value is None:
+        return None
+    result = copy.deepcopy(value)
+    result["mode"] = "REPEATED"
+    result.pop("name", None)
+    result.pop("description", None)
+    return result
+
+
+def parse_type(type_sql: str) -> Optional[Dict]:
+    """Type from a SQL type name: INT64, ARRAY<STRING>, STRUCT<a INT64, b ARRAY<DATE>>, NUMERIC(10, 2)."""
+    type_sql = type_sql.strip()
+    array = re.fullmatch(r"ARRAY\s*<(.*)>", type_sql, re.IGNORECASE | re.DOTALL)
+    if array:
+        return repeated(parse_type(array.group(1)))
+    struct = re.fullmatch(r"STRUCT\s*<(.*)>", type_sql, re.IGNORECASE | re.DOTALL)
+    if struct:
+        fields = []
+        for member in split_top_level(struct.group(1)):
+            name, _, member_type = member.partition(" ")
+            member_typed = parse_type(member_type)
+            if member_typed is None:
+                return None
+            fields.append({"name": name.strip("`"), **member_typed})
+        return typed("RECORD", fields=fields)
+    name = re.sub(r"\(.*\)$", "", type_sql).strip().upper()
+    return typed(TYPE_NAMES[name]) if name in TYPE_NAMES else None
+
+
+def widen(types: List[Optional[Dict]]) -> Optional[Dict]:
+    """Common type of arithmetic operands (None if any is unknown or not numeric)."""
+    if not types or any(t is None or t["type"] not in NUMERIC_RANK for t in types):
+        return None
+    return typed(max((t["type"] for t in types), key=NUMERIC_RANK.get))
+
+
+def expression_depths(sql: str) -> List[int]:
+    """mask_depths, with CASE ... END and the inside of backticked names also counted as a nesting level."""
+    depths = mask_depths(sql)
+    offsets = [0] * (len(sql) + 1)
+    for match in _CASE_RE.finditer(sql):
+        if match.group().upper() == "CASE":
+            offsets[match.start()] += 1
+        else:
+            offsets[match.end()] -= 1
+    # `moz-fx-data-shared-prod.udf.f`: hyphens in names are not operators
+    for match in re.finditer(r"`[^`]*`", sql):
+        offsets[match.start() + 1] += 1
+        offsets[match.end() - 1] -= 1
+    level = 0
+    for i in range(len(sql)):
+        level += offsets[i]
+        depths[i] += level
+    return depths
+
+
+def split_operands(sql: str, pattern: re.Pattern) -> Tuple[List[str], List[str]]:
+    """Split an expression on operators at nesting depth 0 (CASE counted); returns operands and operators."""
+    depths = expression_depths(sql)
+    operands, operators, last = [], [], 0
+    for match in pattern.finditer(sql):
+        if depths[match.start(1)] == 0:
+            operands.append(sql[last:match.start()])
+            operators.append(match.group(1))
+            last = match.end()
+    operands.append(sql[last:])
+    return [o.strip() for o in operands], operators
+
+
+class SchemaInference:
+    """Types SELECT expressions from upstream schemas in the sql/ tree."""
+
+    def __init__(self, sql_dir: str = DEFAULT_SQL_DIR, project: str = DEFAULT_PROJECT):
+        self.sql_dir = Path(sql_dir)
+        self.project = project
+        self._tables: Dict[str, Optional[List[Dict]]] = {}
+        self._udfs: Dict[str, Optional[Dict]] = {}
+        self._ctes: Dict[str, Optional[List[Dict]]] = {}
+
+    # Sources
+
+    def table_fields(self, reference: str, depth: int) -> Optional[List[Dict]]:
+        """Fields of a table from its schema.yaml, or of a view inferred from its view.sql."""
+        parts = reference.replace("`", "").split(".")
+        if len(parts) == 2:
+            parts = [self.project] + parts
+        if len(parts) != 3:
+            return None
+        fqn = ".".join(parts)
+        if fqn not in self._tables:
+            self._tables[fqn] = None  # guards against cycles
+            table_dir = self.sql_dir.joinpath(*parts)
+            fields = None
+            if (table_dir / "schema.yaml").exists():
+                fields = read_schema_fields(table_dir / "schema.yaml")
+            elif (table_dir / "view.sql").exists() and depth < MAX_EXPANSION_DEPTH:
+                fields, _ = self.query_fields(clean_sql((table_dir / "view.sql").read_text(), str(self.sql_dir)), depth + 1)
+            self._tables[fqn] = fields
+        return self._tables[fqn]
+
+    def udf_type(self, name: str) -> Optional[Dict]:
+        """Return type of a UDF in the sql/ tree (mozfun.<ns>.<fn>, udf.<fn>, <project>.udf.<fn>)."""
+        parts = name.replace("`", "").split(".")
+        if parts[0] == "mozfun" and len(parts) == 3:
+            udf_path = self.sql_dir.joinpath(*parts) / "udf.sql"
+        elif len(parts) == 2:
+            udf_path = self.sql_dir / self.project / parts[0] / parts[1] / "udf.sql"
+        elif len(parts) == 3:
+            udf_path = self.sql_dir.joinpath(*parts) / "udf.sql"
+        else:
+            return None
+        key = str(udf_path)
+        if key not in self._udfs:
+            returns = _RETURNS_RE.search(udf_path.read_text()) if udf_path.exists() else None
+            self._udfs[key] = parse_type(returns.group(1)) if returns else None
+        return copy.deepcopy(self._udfs[key])
+
+    def scope(
+        self, from_items: List[Dict], ctes: Dict[str, str], depth: int, outer_scope: Optional[List[Dict]] = None
+    ) -> List[Dict]:
+        """FROM items with the fields they make visible (None if unknown)."""
+        scope: List[Dict] = []
+        for item in from_items:
+            fields = None
+            if item["kind"] == "subquery":
+                fields, _ = self.query_fields(item["source"], depth + 1, ctes)
+            elif item["kind"] == "table":
+                body = ctes.get(item["source"].lower())
+                if body is not None and depth < MAX_EXPANSION_DEPTH:
+                    if body not in self._ctes:
+                        self._ctes[body], _ = self.query_fields(body, depth + 1, ctes)
+                    fields = copy.deepcopy(self._ctes[body])
+                else:
+                    fields = self.table_fields(item["source"], depth)
+            elif item["kind"] == "unnest" and item["alias"]:
+                # The alias is a value: the array's element
+                value = element(self.infer(item["source"], scope + (outer_scope or []), ctes, depth))
+                fields = [{"name": item["alias"], **(value or {"type": UNKNOWN, "mode": "NULLABLE"})}]
+            scope.append({**item, "fields": fields})
+        return scope
+
+    def resolve(self, path: str, scope: List[Dict]) -> Optional[Dict]:
+        """Field for a column path, through table aliases and nested RECORDs."""
+        parts = [part.strip("`") for part in path.split(".")]
+        candidates = []
+        for item in scope:
+            if item["kind"] != "unnest" and len(parts) > 1 and item["alias"] == parts[0].lower():
+                candidates.append((item["fields"], parts[1:]))
+        candidates += [(item["fields"], parts) for item in scope]
+        for fields, remaining in candidates:
+            field = None
+            for part in remaining:
+                children = fields if field is None else field.get("fields")
+                field = next((f for f in children or [] if str(f.get("name", "")).lower() == part.lower()), None)
+                if field is None:
+                    break
+            if field is not None:
+                result = copy.deepcopy(field)
+                result.pop("name", None)
+                result.setdefault("mode", "NULLABLE")
+                if result.get("type") == UNKNOWN:
+                    return None
+                return result
+        return None
+
+    # Expressions
+
+    def infer(self, expr: str, scope: List[Dict], ctes: Dict[str, str], depth: int = 0) -> Optional[Dict]:
+        """Type of an expression ({type, mode[, fields][, description]}), or None if unknown."""
+        expr = expr.strip()
+        if not expr or depth > MAX_EXPANSION_DEPTH * 4:
+            return None
+        depths = expression_depths(expr)
+
+        if expr.startswith("(") and closing_paren(expr, 0) == len(expr) - 1:
+            inner = expr[1:-1].strip()
+            if re.match(r"(?:SELECT|WITH)\b", inner, re.IGNORECASE):
+                fields, _ = self.query_fields(inner, depth + 1, ctes)
+                return element(fields[0]) if fields and len(fields) == 1 else None
+            return self.infer(inner, scope, ctes, depth + 1)
+
+        # Typed constructors: ARRAY<STRING>[...], STRUCT<a INT64, b STRING>(...)
+        constructor = re.match(r"(?:ARRAY|STRUCT)\s*<", expr, re.IGNORECASE)
+        if constructor:
+            close = next((i for i in range(constructor.end(), len(expr)) if expr[i] == ">" and depths[i] == 0), None)
+            return parse_type(expr[:close + 1]) if close is not None else None
+
+        for match in _BOOLEAN_OPERATOR_RE.finditer(expr):
+            i = match.start()
+            # < and > of STRUCT<...>/ARRAY<...> open or close a nesting level
+            angle = match.group() in "<>" and (
+                (i + 1 < len(expr) and depths[i + 1] > depths[i]) or (i > 0 and depths[i - 1] > depths[i])
+            )
+            if depths[i] == 0 and not angle:
+                return typed("BOOLEAN")
+        if "||" in expr and find_top_level(re.compile(r"\|\|"), expr, 0, depths):
+            return typed("STRING")
+        operands, operators = split_operands(expr, _ARITHMETIC_RE)
+        if operators:
+            types = [self.infer(operand, scope, ctes, depth + 1) for operand in operands]
+            numeric = widen(types)
+            if "/" in operators and numeric is not None:
+                return typed("NUMERIC" if numeric["type"] in ("NUMERIC", "BIGNUMERIC") else "FLOAT")
+            return numeric
+        if expr.startswith("-"):
+            return self.infer(expr[1:], scope, ctes, depth + 1)
+
+        if re.fullmatch(r"CASE\b.*\bEND", expr, re.IGNORECASE | re.DOTALL):
+            return self.infer_case(expr, scope, ctes, depth)
+        literal = self.infer_literal(expr)
+        if literal is not None or re.fullmatch(r"NULL", expr, re.IGNORECASE):
+            return literal
+        if re.fullmatch(r"[A-Za-z_`][\w`.]*", expr):
+            return self.resolve(expr, scope)
+
+        # arr[OFFSET(0)], arr[SAFE_ORDINAL(1)]
+        if expr.endswith("]") and not expr.startswith("["):
+            open_index = max(i for i, d in enumerate(depths) if d == 0 and expr[i] == "[")
+            if open_index > 0:
+                return element(self.infer(expr[:open_index], scope, ctes, depth + 1))
+        if expr.startswith("["):
+            first = split_top_level(expr[1:expr.rindex("]")])
+            return repeated(self.infer(first[0], scope, ctes, depth + 1)) if first else None
+
+        call = _CALL_RE.match(expr)
+        if call:
+            close = closing_paren(expr, call.end() - 1)
+            rest = expr[close + 1:].strip()
+            if rest and not re.match(r"OVER\b", rest, re.IGNORECASE):
+                # Field access on a call result: f(x).field
+                access = re.fullmatch(r"\.([\w.]+)", rest)
+                if not access:
+                    return None
+                value = self.infer(expr[:close + 1], scope, ctes, depth + 1)
+                fake_scope = [{"kind": "table", "alias": "", "fields": (value or {}).get("fields")}]
+                return self.resolve(access.group(1), fake_scope)
+            return self.infer_call(call.group(1), expr[call.end():close], scope, ctes, depth)
+        return None
+
+    def infer_literal(self, expr: str) -> Optional[Dict]:
+        if re.fullmatch(r"\d+", expr) or re.fullmatch(r"0x[0-9a-f]+", expr, re.IGNORECASE):
+            return typed("INTEGER")
+        if re.fullmatch(r"(?:\d+\.\d*|\.\d+)(?:e[+-]?\d+)?|\d+e[+-]?\d+", expr, re.IGNORECASE):
+            return typed("FLOAT")
+        if re.fullmatch(r"[rR]?''", expr):
+            return typed("STRING")
+        if re.fullmatch(r"[bB]''", expr):
+            return typed("BYTES")
+        if re.fullmatch(r"TRUE|FALSE", expr, re.IGNORECASE):
+            return typed("BOOLEAN")
+        prefixed = re.fullmatch(r"(DATE|TIMESTAMP|DATETIME|TIME|NUMERIC|BIGNUMERIC|JSON)\s*''", expr, re.IGNORECASE)
+        if prefixed:
+            return typed(TYPE_NAMES[prefixed.group(1).upper()])
+        if re.fullmatch(r"INTERVAL\b.*", expr, re.IGNORECASE | re.DOTALL):
+            return typed("INTERVAL")
+        parameter = re.fullmatch(r"@(\w+)", expr)
+        if parameter:
+            name = parameter.group(1).lower()
+            if name.endswith("date"):
+                return typed("DATE")
+            if name.endswith("timestamp"):
+                return typed("TIMESTAMP")
+        return None
+
+    def infer_case(self, expr: str, scope: List[Dict], ctes: Dict[str, str], depth: int) -> Optional[Dict]:
+        """First typable THEN/ELSE branch of the outermost CASE (numeric branches widened)."""
+        depths = expression_depths(expr)
+        tokens = [
+            m for m in re.finditer(r"\b(?:WHEN|THEN|ELSE|END)\b", expr, re.IGNORECASE)
+            if depths[m.start()] == 1
+        ]
+        branches = [
+            expr[token.end():following.start()]
+            for token, following in zip(tokens, tokens[1:])
+            if token.group().upper() in ("THEN", "ELSE")
+        ]
+        return self.first_typed(branches, scope, ctes, depth)
+
+    def first_typed(self, expressions: List[str], scope: List[Dict], ctes: Dict[str, str], depth: int) -> Optional[Dict]:
+        """Type shared by alternative expressions: the first known one, numeric types widened."""
+        types = [self.infer(e, scope, ctes, depth + 1) for e in expressions]
+        known = [t for t in types if t is not None]
+        if not known:
+            return None
+        numeric = widen(known)
+        return numeric if numeric is not None else known[0]
+
+    def infer_call(self, name: str, args_sql: str, scope: List[Dict], ctes: Dict[str, str], depth: int) -> Optional[Dict]:
+        """Type of a function call from the built-in tables, UDF definitions or its arguments."""
+        upper = name.upper()
+        if upper.startswith("SAFE."):
+            upper, name = upper[5:], name[5:]
+        args = split_top_level(args_sql)
+        first = args[0] if args else ""
+        # ARRAY_AGG(DISTINCT x IGNORE NULLS ORDER BY y LIMIT 1)
+        first = re.sub(r"^DISTINCT\s+", "", first, flags=re.IGNORECASE)
+        first = re.sub(r"\s+(?:(?:IGNORE|RESPECT)\s+NULLS|ORDER\s+BY|LIMIT|HAVING\s+(?:MIN|MAX))\b.*$", "", first,
+                       flags=re.IGNORECASE | re.DOTALL)
+
+        if upper in ("CAST", "SAFE_CAST"):
+            cast = re.fullmatch(r"(.*)\s+AS\s+(.+)", args_sql.strip(), re.IGNORECASE | re.DOTALL)
+            return parse_type(cast.group(2)) if cast else None
+        if upper == "EXTRACT":
+            part = re.match(r"\s*(\w+)", args_sql)
+            return typed(EXTRACT_PART_TYPES.get(part.group(1).upper(), "INTEGER") if part else "INTEGER")
+        if upper in FIXED_TYPES and not (upper in ("DATE", "TIMESTAMP", "DATETIME", "TIME") and "." in name):
+            return typed(FIXED_TYPES[upper])
+        if upper in ARRAY_FUNCTIONS:
+            return typed(ARRAY_FUNCTIONS[upper], "REPEATED")
+        if upper in ARGUMENT_FUNCTIONS:
+            return element(self.infer(first, scope, ctes, depth + 1)) if upper not in (
+                "ARRAY_CONCAT", "ARRAY_CONCAT_AGG", "ARRAY_REVERSE", "ARRAY_FILTER"
+            ) else repeated(self.infer(first, scope, ctes, depth + 1))
+        if upper in COALESCING_FUNCTIONS:
+            return self.first_typed(args[COALESCING_FUNCTIONS[upper]:], scope, ctes, depth)
+        if upper in ("SUM", "AVG", "ROUND", "TRUNC", "CEIL", "CEILING", "FLOOR"):
+            argument = self.infer(first, scope, ctes, depth + 1)
+            if argument is None:
+                return None
+            if argument["type"] in ("NUMERIC", "BIGNUMERIC", "INTERVAL"):
+                return typed(argument["type"])
+            return typed("INTEGER" if upper == "SUM" and argument["type"] == "INTEGER" else "FLOAT")
+        if upper == "ARRAY_AGG":
+            return repeated(self.infer(first, scope, ctes, depth + 1))
+        if upper == "APPROX_QUANTILES":
+            return repeated(self.infer(first, scope, ctes, depth + 1))
+        if upper == "APPROX_TOP_COUNT":
+            value = element(self.infer(first, scope, ctes, depth + 1))
+            if value is None:
+                return None
+            return typed("RECORD", "REPEATED", [{"name": "value", **value}, {"name": "count", **typed("INTEGER")}])
+        if upper == "STRUCT":
+            fields = []
+            for member in args:
+                member_name = column_name(member)
+                member_expr = re.sub(r"\s+AS\s+`?\w+`?\s*$", "", member, flags=re.IGNORECASE)
+                member_typed = self.infer(member_expr, scope, ctes, depth + 1)
+                if member_name is None or member_typed is None:
+                    return None
+                member_typed.pop("description", None)
+                fields.append({"name": member_name, **member_typed})
+            return typed("RECORD", fields=fields)
+        if upper == "ARRAY" and re.match(r"\s*(?:SELECT|WITH)\b", args_sql, re.IGNORECASE):
+            query = parse_select(args_sql, ctes)
+            fields, unknown = self.query_fields(args_sql, depth + 1, ctes, scope)
+            if not fields or unknown:
+                return None
+            if query and query["as_struct"]:
+                return typed("RECORD", "REPEATED", [
+                    {key: value for key, value in f.items() if key != "description"} for f in fields
+                ])
+            return repeated(fields[0]) if len(fields) == 1 else None
+        if "." in name or upper not in FIXED_TYPES:
+            return self.udf_type(name)
+        return None
+
+    # Queries
+
+    def expand_star(self, match: re.Match, scope: List[Dict]) -> Optional[List[Dict]]:
+        """Fields selected by `*` or `<alias>.*`, minus EXCEPT columns, with REPLACE retyped later."""
+        qualifier = (match.group("qualifier") or "").replace("`", "").lower()
+        selected = [item for item in scope if item["alias"] == qualifier.split(".")[-1]] if qualifier else scope
+        if qualifier and not selected:
+            return None
+        fields = star_entries(selected, "fields", lambda field: str(field.get("name", "")))
+        if fields is None:
+            return None
+        fields = copy.deepcopy(fields)
+        excluded = {c.strip().replace("`", "").lower() for c in (match.group("except") or "").split(",")}
+        return [f for f in fields if str(f.get("name", "")).lower() not in excluded]
+
+    def query_fields(
+        self,
+        sql: str,
+        depth: int = 0,
+        outer_ctes: Optional[Dict[str, str]] = None,
+        outer_scope: Optional[List[Dict]] = None,
+    ) -> Tuple[Optional[List[Dict]], List[Tuple[str, str]]]:
+        """
+        Output fields of a query expression.
+
+        Args:
+            outer_scope: Enclosing query's FROM items, for correlated subqueries
+                (ARRAY(SELECT ... FROM UNNEST(t.events)))
+
+        Returns:
+            (fields with name, type, mode and nested fields/description where known,
+            or None if a `*` cannot be expanded; (name, expression) of outputs whose
+            type is unknown)
+        """
+        query = parse_select(sql, outer_ctes)
+        if query is None or depth > MAX_EXPANSION_DEPTH * 2:
+            return None, []
+        scope = self.scope(query["from"], query["ctes"], depth, outer_scope)
+        full_scope = scope + [item for item in outer_scope or [] if item not in scope]
+
+        fields: Optional[List[Dict]] = []
+        unknown: List[Tuple[str, str]] = []
+        for item in query["select"]:
+            star = STAR_RE.fullmatch(item)
+            if star:
+                expanded = self.expand_star(star, scope)
+                if expanded is None or fields is None:
+                    fields = None
+                    continue
+                replaced = re.search(r"\bREPLACE\s*\((.*)\)\s*$", item, re.IGNORECASE | re.DOTALL)
+                for replacement in split_top_level(replaced.group(1)) if replaced else []:
+                    replacement_name = column_name(replacement)
+                    replacement_expr = re.sub(r"\s+AS\s+`?\w+`?\s*$", "", replacement, flags=re.IGNORECASE)
+                    for field in expanded:
+                        if replacement_name and str(field.get("name")).lower() == replacement_name.lower():
+                            retyped = self.infer(replacement_expr, full_scope, query["ctes"], depth)
+                            field.clear()
+                            field.update({"name": replacement_name, **(retyped or typed(UNKNOWN))})
+                            if retyped is None:
+                                unknown.append((replacement_name, " ".join(replacement.split())))
+                fields.extend(expanded)
+                continue
+
+            name = column_name(item) or f"f{len(fields or [])}_"
+            expression = re.sub(r"\s+(?:AS\s+)?`?\w+`?\s*$", "", item, flags=re.IGNORECASE) \
+                if column_name(item) and not re.fullmatch(r"[\w`.]+", item) else item
+            value = self.infer(expression, full_scope, query["ctes"], depth)
+            if value is None:
+                unknown.append((name, " ".join(item.split())))
+                value = typed(UNKNOWN)
+            if fields is not None:
+                fields.append({"name": name, **value})
+        return fields, unknown
+
+
+def order_field(field: Dict) -> Dict:
+    """Field keys in schema.yaml order: name, type, mode, description, fields."""
+    ordered = {key: field[key] for key in ("name", "type", "mode", "description") if field.get(key) is not None}
+    ordered.setdefault("mode", "NULLABLE")
+    ordered = {key: ordered[key] for key in ("name", "type", "mode", "description") if key in ordered}
+    if field.get("type") == "RECORD" and field.get("fields"):
+        ordered["fields"] = [order_field(f) for f in field["fields"]]
+    return ordered
+
+
+def apply_descriptions(fields: List[Dict], existing: Optional[List[Dict]], base_schema: Optional[Dict]) -> None:
+    """Fill missing descriptions from an existing schema.yaml (same path), then the base schema (top level)."""
+    by_name = {str(f.get("name", "")).lower(): f for f in existing or []}
+    for field in fields:
+        previous = by_name.get(str(field.get("name", "")).lower())
+        if previous and previous.get("description"):
+            field["description"] = previous["description"]
+        elif not field.get("description") and base_schema:
+            base_field, _ = find_field_in_base_schema(field["name"], base_schema)
+            if base_field and base_field.get("description"):
+                field["description"] = base_field["description"].strip()
+        if field.get("fields"):
+            apply_descriptions(field["fields"], previous.get("fields") if previous else None, None)
+
+
+def infer_query_schema(
+    query_path: Path,
+    sql_dir: str = DEFAULT_SQL_DIR,
+    base_schema: Optional[Dict] = None,
+) -> Tuple[List[Dict], List[Tuple[str, str]]]:
+    """
+    Draft schema fields for a query.sql.
+
+    Returns:
+        (fields in schema.yaml order, (name, expression) of outputs typed UNKNOWN)
+    """
+    parts = query_path.parts
+    project = parts[-4] if len(parts) >= 4 else DEFAULT_PROJECT
+    inference = SchemaInference(sql_dir, project)
+    fields, unknown = inference.query_fields(clean_sql(query_path.read_text(), sql_dir))
+    if fields is None:
+        raise ValueError("SELECT * reads a source without a local schema.yaml or view.sql; name the columns")
+    schema_path = query_path.parent / "schema.yaml"
+    existing = read_schema_fields(schema_path) if schema_path.exists() else None
+    apply_descriptions(fields, existing, base_schema)
+    return [order_field(f) for f in fields], unknown
+
+
+def to_yaml(fields: List[Dict], unknown: List[Tuple[str, str]]) -> str:
+    """schema.yaml text, with a TODO comment on each UNKNOWN type."""
+    text = yaml.safe_dump({"fields": fields}, sort_keys=False, default_flow_style=False, allow_unicode=True, width=100)
+    todo = {name: expression for name, expression in unknown}
+    lines, current = [], None
+    for line in text.splitlines():
+        name = re.match(r"\s*- name: (\S+)", line)
+        if name:
+            current = name.group(1).strip("'\"")
+        if re.match(rf"\s*type: {UNKNOWN}$", line) and current in todo:
+            line += f"  # TODO: could not infer type of: {todo[current][:80]}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def find_query(target: str, sql_dir: str) -> Path:
+    path = Path(target)
+    if path.is_file():
+        return path
+    if path.is_dir() and (path / "query.sql").exists():
+        return path / "query.sql"
+    parts = target.split(".")
+    if len(parts) == 2:
+        parts = [DEFAULT_PROJECT] + parts
+    candidate = Path(sql_dir).joinpath(*parts) / "query.sql"
+    if len(parts) == 3 and candidate.exists():
+        return candidate
+    raise FileNotFoundError(f"No query.sql found for {target}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Draft schema.yaml for a query offline by propagating upstream column types",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "query",
+        help="Path to query.sql (or its directory), or dataset.table / project.dataset.table"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Root of the bigquery-etl sql/ tree (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--write",
+        action="store_true",
+        help="Write schema.yaml next to query.sql instead of printing it"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="With --write, replace an existing schema.yaml (its descriptions are kept)"
+    )
+    parser.add_argument(
+        "--use-global-schema",
+        action="store_true",
+        help="Fill missing top-level descriptions from global.yaml, like ./bqetl query schema update"
+    )
+    parser.add_argument(
+        "--base-schemas-dir",
+        default=DEFAULT_BASE_SCHEMAS_DIR,
+        help=f"Directory with global.yaml (default: {DEFAULT_BASE_SCHEMAS_DIR})"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["yaml", "json"],
+        default="yaml",
+        help="Output format when printing (default: yaml)"
+    )
+
+    args = parser.parse_args()
+
+    base_schema = None
+    if args.use_global_schema:
+        base_schema = load_schema_file(Path(args.base_schemas_dir) / "global.yaml")
+        if base_schema is None:
+            print(f"Warning: {args.base_schemas_dir}/global.yaml not found; descriptions not applied", file=sys.stderr)
+
+    try:
+        query_path = find_query(args.query, args.sql_dir)
+        fields, unknown = infer_query_schema(query_path, args.sql_dir, base_schema)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for name, expression in unknown:
+        print(f"Warning: could not infer the type of {name}: {expression}", file=sys.stderr)
+
+    if args.write:
+        schema_path = query_path.parent / "schema.yaml"
+        if schema_path.exists() and not args.force:
+            print(f"Error: {schema_path} exists (use --force to replace it)", file=sys.stderr)
+            sys.exit(1)
+        schema_path.write_text(to_yaml(fields, unknown))
+        print(f"✅ Wrote {schema_path} ({len(fields)} fields, {len(unknown)} to fix)")
+    elif args.format == "json":
+        print(json.dumps({"fields": fields, "unknown": [{"name": n, "expression": e} for n, e in unknown]}, indent=2))
+    else:
+        print(to_yaml(fields, unknown), end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+Table Lineage Reachability Index
+
+Precomputes the transitive closure of the table lineage graph so impact-analysis
+questions ("is X upstream of Y?", "what depends on X?") are answered with a bitset
+lookup instead of a graph walk or a DataHub round trip.
+
+The index is built from the local sql/ tree (same parser as datahub_lineage.py) and,
+optionally, from DataHub lineage responses: entries in the datahub_lineage.py response
+cache and/or JSON files written by `datahub_lineage.py --format json`. The interned
+edge list is saved to disk so later runs skip SQL parsing, and is rebuilt
+automatically when any of its inputs change. The closure bitsets are derived from it
+once per run (well under a second for ~15k tables); every query after that is a
+bitset operation.
+
+Usage:
+    python scripts/lineage_index.py --is-upstream <table_x> <table_y>
+    python scripts/lineage_index.py --descendants <table> [--max-hops N]
+    python scripts/lineage_index.py --ancestors <table> [--max-hops N]
+    python scripts/lineage_index.py --build
+
+Examples:
+    # Does search_clients_daily_v8 (transitively) read from telemetry_stable.main_v5?
+    python scripts/lineage_index.py --is-upstream telemetry_stable.main_v5 search_derived.search_clients_daily_v8
+
+    # Everything downstream of clients_daily_v1
+    python scripts/lineage_index.py --descendants telemetry_derived.clients_daily_v1
+
+    # Tables within 2 hops upstream of clients_last_seen_v1
+    python scripts/lineage_index.py --ancestors telemetry_derived.clients_last_seen_v1 --max-hops 2
+
+    # Include cached DataHub responses and a saved lineage result
+    python scripts/lineage_index.py --build --datahub-cache --lineage-json main_downstream.json
+
+Table identifier formats accepted (same as datahub_lineage.py):
+    - dataset.table (e.g., telemetry_derived.clients_daily_v1)
+    - project.dataset.table (e.g., moz-fx-data-shared-prod.telemetry_derived.clients_daily_v1)
+    - Full URN (e.g., urn:li:dataset:(urn:li:dataPlatform:bigquery,...))
+
+DataHub responses with more than one hop do not say which table each hop came from,
+so tables beyond the first hop only contribute to reachability, not to --max-hops
+distances.
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from datahub_lineage import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_SQL_DIR,
+    LineageCache,
+    build_lineage_graph,
+    lineage_tree_signature,
+    parse_table_identifier,
+)
+
+
+DEFAULT_INDEX_PATH = DEFAULT_CACHE_DIR / "lineage_index.json"
+INDEX_VERSION = 2
+
+
+def iter_bits(bits: int) -> Iterable[int]:
+    """Yield the positions of the set bits of an integer bitset."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def strongly_connected_components(adjacency: List[List[int]]) -> List[List[int]]:
+    """
+    Tarjan's algorithm, iterative to cope with deep lineage chains.
+
+    Returns:
+        Components in reverse topological order (a component is emitted after
+        every component reachable from it)
+    """
+    node_count = len(adjacency)
+    index = [-1] * node_count
+    low = [0] * node_count
+    on_stack = [False] * node_count
+    stack: List[int] = []
+    components = []
+    counter = 0
+
+    for root in range(node_count):
+        if index[root] != -1:
+            continue
+
+        work = [(root, 0)]
+        while work:
+            node, position = work.pop()
+            if position == 0:
+                index[node] = low[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack[node] = True
+
+            descended = False
+            neighbors = adjacency[node]
+            for i in range(position, len(neighbors)):
+                neighbor = neighbors[i]
+                if index[neighbor] == -1:
+                    work.append((node, i + 1))
+                    work.append((neighbor, 0))
+                    descended = True
+                    break
+                if on_stack[neighbor]:
+                    low[node] = min(low[node], index[neighbor])
+            if descended:
+                continue
+
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+
+    return components
+
+
+def transitive_closure(adjacency: List[List[int]]) -> List[int]:
+    """
+    Compute the set of nodes reachable from every node as integer bitsets.
+
+    Cycles are collapsed into strongly connected components first, so each
+    component's closure is computed once from its already-finished successors.
+    """
+    closure = [0] * len(adjacency)
+
+    for component in strongly_connected_components(adjacency):
+        members = set(component)
+        reach = 0
+        if len(component) > 1:
+            for node in component:
+                reach |= 1 << node
+        for node in component:
+            for neighbor in adjacency[node]:
+                if neighbor in members:
+                    reach |= 1 << neighbor
+                else:
+                    reach |= (1 << neighbor) | closure[neighbor]
+        for node in component:
+            closure[node] = reach
+
+    return closure
+
+
+class ReachabilityIndex:
+    """
+    Precomputed upstream/downstream closure of a table lineage graph.
+
+    Every table gets an integer ID; descendants and ancestors of each table are
+    stored as integer bitsets indexed by those IDs, so reachability is a single
+    bit test and "all descendants" is a bitset decode. One-hop adjacency bitsets
+    answer "within N hops" by N frontier expansions.
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        edges: Iterable[Tuple[int, int]],
+        reach_edges: Iterable[Tuple[int, int]] = (),
+        signature: str = "",
+    ):
+        """
+        Args:
+            names: Fully qualified table names, indexed by table ID
+            edges: (source_id, consumer_id) one-hop lineage edges
+            reach_edges: (source_id, consumer_id) pairs known to be connected by an
+                unknown number of hops; used for reachability only
+            signature: Fingerprint of the inputs the index was built from
+        """
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.signature = signature
+        self.edges = sorted(set(edges))
+        self.reach_edges = sorted(set(reach_edges) - set(self.edges))
+
+        node_count = len(names)
+        self.down_adjacency = [0] * node_count
+        self.up_adjacency = [0] * node_count
+        down_lists: List[List[int]] = [[] for _ in range(node_count)]
+        up_lists: List[List[int]] = [[] for _ in range(node_count)]
+
+        for src, dst in self.edges:
+            self.down_adjacency[src] |= 1 << dst
+            self.up_adjacency[dst] |= 1 << src
+        for src, dst in self.edges + self.reach_edges:
+            down_lists[src].append(dst)
+            up_lists[dst].append(src)
+
+        self.descendants = transitive_closure(down_lists)
+        self.ancestors = transitive_closure(up_lists)
+
+    def _id(self, identifier: str) -> Optional[int]:
+        return self.ids.get(parse_table_identifier(identifier)["fqn"])
+
+    def _names(self, bits: int) -> List[str]:
+        return sorted(self.names[i] for i in iter_bits(bits))
+
+    def is_upstream(self, upstream: str, downstream: str) -> bool:
+        """Check whether `downstream` transitively reads from `upstream`."""
+        src, dst = self._id(upstream), self._id(downstream)
+        if src is None or dst is None:
+            return False
+        return bool(self.descendants[src] >> dst & 1)
+
+    def reachable(self, identifier: str, direction: str = "downstream", max_hops: Optional[int] = None) -> List[str]:
+        """
+        Return all tables upstream or downstream of a table.
+
+        Without max_hops this is a lookup in the precomputed closure; with
+        max_hops it expands one-hop adjacency bitsets max_hops times.
+        """
+        node_id = self._id(identifier)
+        if node_id is None:
+            return []
+
+        own_bit = 1 << node_id
+        if max_hops is None:
+            closure = self.descendants if direction == "downstream" else self.ancestors
+            return self._names(closure[node_id] & ~own_bit)
+
+        adjacency = self.down_adjacency if direction == "downstream" else self.up_adjacency
+        seen = own_bit
+        frontier = own_bit
+        for _ in range(max_hops):
+            next_frontier = 0
+            for i in iter_bits(frontier):
+                next_frontier |= adjacency[i]
+            frontier = next_frontier & ~seen
+            if not frontier:
+                break
+            seen |= frontier
+        return self._names(seen & ~own_bit)
+
+    def to_json(self) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "signature": self.signature,
+            "names": self.names,
+            "edges": self.edges,
+            "reach_edges": self.reach_edges,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "ReachabilityIndex":
+        return cls(
+            data["names"],
+            [tuple(e) for e in data["edges"]],
+            [tuple(e) for e in data["reach_edges"]],
+            data["signature"],
+        )
+
+
+def collect_datahub_edges(
+    results: Iterable[Tuple[str, dict]],
+) -> Tuple[Set[Tuple[str, str]], Set[Tuple[str, str]]]:
+    """
+    Turn formatted DataHub lineage results into table edges.
+
+    Args:
+        results: (root_fqn, format_lineage_result-shaped dict) pairs
+
+    Returns:
+        (one_hop_edges, reach_only_edges) as (source_fqn, consumer_fqn) pairs
+    """
+    edges = set()
+    reach_edges = set()
+    for root, result in results:
+        for table in result.get("tables", []):
+            fqn = table.get("fqn")
+            if not fqn or fqn == root:
+                continue
+            edge = (fqn, root) if result.get("direction") == "upstream" else (root, fqn)
+            if table.get("hops", 1) == 1:
+                edges.add(edge)
+            else:
+                reach_edges.add(edge)
+    return edges, reach_edges
+
+
+def load_datahub_results(cache_dir: Optional[Path], lineage_json: List[str]) -> List[Tuple[str, dict]]:
+    """Load formatted DataHub lineage results from the response cache and saved JSON output."""
+    results = []
+
+    if cache_dir is not None:
+        for urn, _, _, column, result in LineageCache(cache_dir).results():
+            if column is None:
+                results.append((parse_table_identifier(urn)["fqn"], result))
+
+    for path in lineage_json:
+        with open(path) as f:
+            data = json.load(f)
+        if "roots" in data:
+            # Batch output: one result per root
+            results.extend(data["roots"].items())
+        elif "table" in data and "tables" in data:
+            results.append((parse_table_identifier(data["table"])["fqn"], data))
+        else:
+            print(f"Warning: {path} is not datahub_lineage.py JSON output, skipping", file=sys.stderr)
+
+    return results
+
+
+def input_signature(sql_dir: Optional[str], cache_dir: Optional[Path], lineage_json: List[str]) -> str:
+    """Fingerprint every input the index is built from."""
+    digest = hashlib.sha256()
+    if sql_dir and Path(sql_dir).exists():
+        digest.update(lineage_tree_signature(sql_dir).encode())
+    extra_files = list(lineage_json)
+    if cache_dir is not None:
+        extra_files.append(str(Path(cache_dir) / LineageCache.FILENAME))
+    for path in extra_files:
+        path = Path(path)
+        if path.exists():
+            stat = path.stat()
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def build_index(
+    sql_dir: Optional[str] = DEFAULT_SQL_DIR,
+    cache_dir: Optional[Path] = None,
+    lineage_json: Optional[List[str]] = None,
+) -> ReachabilityIndex:
+    """Build a reachability index from the local sql tree and optional DataHub results."""
+    lineage_json = lineage_json or []
+    ids: Dict[str, int] = {}
+    names: List[str] = []
+
+    def intern(fqn: str) -> int:
+        if fqn not in ids:
+            ids[fqn] = len(names)
+            names.append(fqn)
+        return ids[fqn]
+
+    edges = set()
+    reach_edges = set()
+
+    if sql_dir and Path(sql_dir).exists():
+        graph = build_lineage_graph(sql_dir)
+        for name in graph.names:
+            intern(name)
+        for node_id in range(len(graph)):
+            for neighbor in graph.neighbors(node_id, "downstream"):
+                edges.add((node_id, neighbor))
+
+    datahub_edges, datahub_reach = collect_datahub_edges(load_datahub_results(cache_dir, lineage_json))
+    edges.update((intern(src), intern(dst)) for src, dst in datahub_edges)
+    reach_edges.update((intern(src), intern(dst)) for src, dst in datahub_reach)
+
+    return ReachabilityIndex(names, edges, reach_edges, input_signature(sql_dir, cache_dir, lineage_json))
+
+
+def load_or_build_index(
+    index_path: Path = DEFAULT_INDEX_PATH,
+    sql_dir: Optional[str] = DEFAULT_SQL_DIR,
+    cache_dir: Optional[Path] = None,
+    lineage_json: Optional[List[str]] = None,
+    rebuild: bool = False,
+) -> ReachabilityIndex:
+    """Load the saved index if its inputs are unchanged, otherwise rebuild and save it."""
+    lineage_json = lineage_json or []
+    signature = input_signature(sql_dir, cache_dir, lineage_json)
+
+    if not rebuild and index_path.exists():
+        try:
+            with open(index_path) as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("signature") == signature:
+                return ReachabilityIndex.from_json(data)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Rebuilding unreadable index {index_path}: {e}", file=sys.stderr)
+
+    index = build_index(sql_dir, cache_dir, lineage_json)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(index_path, "w") as f:
+        json.dump(index.to_json(), f)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Precomputed table lineage reachability queries",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    query = parser.add_mutually_exclusive_group(required=True)
+    query.add_argument(
+        "--is-upstream",
+        nargs=2,
+        metavar=("UPSTREAM", "DOWNSTREAM"),
+        help="Check whether DOWNSTREAM transitively depends on UPSTREAM"
+    )
+    query.add_argument(
+        "--descendants",
+        metavar="TABLE",
+        help="List all tables downstream of TABLE"
+    )
+    query.add_argument(
+        "--ancestors",
+        metavar="TABLE",
+        help="List all tables upstream of TABLE"
+    )
+    query.add_argument(
+        "--build",
+        action="store_true",
+        help="Only (re)build the index"
+    )
+    parser.add_argument(
+        "--max-hops",
+        type=int,
+        help="Limit --descendants/--ancestors to N hops (default: unlimited)"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Path to sql directory (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--datahub-cache",
+        action="store_true",
+        help="Include DataHub responses from the datahub_lineage.py cache"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(DEFAULT_CACHE_DIR),
+        help=f"Directory of the datahub_lineage.py response cache (default: {DEFAULT_CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--lineage-json",
+        action="append",
+        default=[],
+        help="Include a saved `datahub_lineage.py --format json` result (repeatable)"
+    )
+    parser.add_argument(
+        "--index",
+        default=str(DEFAULT_INDEX_PATH),
+        help=f"Index file (default: {DEFAULT_INDEX_PATH})"
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Rebuild the index even if its inputs are unchanged"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "text"],
+        default="text",
+        help="Output format (default: text)"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        if not Path(args.sql_dir).exists() and not (args.datahub_cache or args.lineage_json):
+            raise ValueError(f"SQL directory not found: {args.sql_dir}")
+
+        index = load_or_build_index(
+            Path(args.index),
+            args.sql_dir,
+            Path(args.cache_dir) if args.datahub_cache else None,
+            args.lineage_json,
+            rebuild=args.rebuild or args.build,
+        )
+
+        if args.build:
+            result = {
+                "index": args.index,
+                "tables": len(index.names),
+                "edges": len(index.edges),
+                "reach_only_edges": len(index.reach_edges),
+            }
+            if args.format == "json":
+                print(json.dumps(result, indent=2))
+            else:
+                print(f"✅ Indexed {result['tables']} tables, {result['edges']} edges "
+                      f"({result['reach_only_edges']} reachability-only) → {args.index}")
+            return
+
+        if args.is_upstream:
+            upstream, downstream = (parse_table_identifier(t)["fqn"] for t in args.is_upstream)
+            answer = index.is_upstream(upstream, downstream)
+            if args.format == "json":
+                print(json.dumps({"upstream": upstream, "downstream": downstream, "is_upstream": answer}, indent=2))
+            else:
+                verdict = "✅ is upstream of" if answer else "❌ is not upstream of"
+                print(f"{upstream}\n  {verdict}\n{downstream}")
+            sys.exit(0 if answer else 1)
+
+        direction = "downstream" if args.descendants else "upstream"
+        table = parse_table_identifier(args.descendants or args.ancestors)["fqn"]
+        if table not in index.ids:
+            print(f"Warning: {table} is not in the lineage index", file=sys.stderr)
+        tables = index.reachable(table, direction, args.max_hops)
+
+        if args.format == "json":
+            print(json.dumps({"table": table, "direction": direction, "max_hops": args.max_hops, "tables": tables}, indent=2))
+        else:
+            hops = f" within {args.max_hops} hop(s)" if args.max_hops else ""
+            print(f"\n{direction.capitalize()} of {table}{hops}:\n")
+            for name in tables:
+                print(f"  {name}")
+            print(f"\n{len(tables)} table(s)\n")
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
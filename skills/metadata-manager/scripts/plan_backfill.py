@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Lineage-Aware Backfill Planner
+
+After a fix to a table, lists every downstream table that has to be backfilled and
+for which dates, in the order the backfills must run. Tables in the same wave only
+depend on earlier waves and can be backfilled in parallel.
+
+How date ranges propagate (per downstream query, from its metadata.yaml and SQL):
+    - Incremental queries (`date_partition_parameter`, bqetl's default is
+      submission_date, with `time_partitioning`) rerun every date whose run reads a
+      changed partition: a query reading `DATE_SUB(@submission_date, INTERVAL 27 DAY)`
+      onwards needs the changed range plus 27 days.
+    - Queries reading the full history of a source (no bounded partition filter) and
+      queries reading their own previous output (clients_last_seen style, including
+      the changed table itself) need every date from the start of the range up to
+      --until.
+    - Full-refresh queries (`date_partition_parameter: null`, or no partitioning)
+      need one run; their consumers inherit the changed dates.
+    - Views are not backfilled; queries reading through them are. When the changed
+      table is a view, its readers' lookbacks are taken on the tables behind it.
+    Overlapping ranges reaching a table over several paths are merged, so each table
+    appears once per contiguous range.
+
+Cost per wave: with --stats, one run of a query scans one partition of each source
+(lookback days of the changed source, the whole table for full-history reads and
+full refreshes). Without stats only the number of query runs is shown.
+
+Usage:
+    python scripts/plan_backfill.py <table> --start-date YYYY-MM-DD --end-date YYYY-MM-DD [options]
+
+Examples:
+    # Downstream backfills after fixing two weeks of clients_daily_v1
+    python scripts/plan_backfill.py telemetry_derived.clients_daily_v1 --start-date 2024-03-01 --end-date 2024-03-14
+
+    # With scanned-bytes estimates, as JSON
+    python scripts/plan_backfill.py telemetry_derived.clients_daily_v1 --start-date 2024-03-01 --end-date 2024-03-14 \\
+        --stats table_stats.csv --format json
+
+    # Downstream tables only (the fixed table is backfilled separately)
+    python scripts/plan_backfill.py telemetry_derived.clients_daily_v1 --start-date 2024-03-01 --end-date 2024-03-14 \\
+        --exclude-changed
+"""
+
+import argparse
+import json
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(SKILLS_DIR / "query-writer" / "scripts"))
+sys.path.insert(0, str(SKILLS_DIR / "model-requirements" / "scripts"))
+from check_aggregated_alternatives import estimate_daily_scan_bytes, format_bytes, load_table_stats  # noqa: E402
+from check_partition_pruning import read_yaml, source_partitioning  # noqa: E402
+from dag_schedule import DEFAULT_PROJECT, qualify_table  # noqa: E402
+from datahub_lineage import (  # noqa: E402
+    DEFAULT_SQL_DIR,
+    LineageGraph,
+    build_lineage_graph,
+    extract_source_tables,
+    find_lineage_files,
+    read_lineage_sql,
+    resolve_table_reference,
+)
+from recommend_partitioning import consumer_lookbacks  # noqa: E402
+
+
+DEFAULT_PARTITION_PARAMETER = "submission_date"
+
+Range = Tuple[date, date]
+
+
+def merge_ranges(ranges: List[Range]) -> List[Range]:
+    """Merge overlapping and adjacent date ranges."""
+    merged: List[Range] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def backfill_mode(sql_dir: str, fqn: str) -> Dict:
+    """
+    How a table is written.
+
+    Returns:
+        Dict with incremental (bool), parameter (date_partition_parameter or None)
+        and partition_field
+    """
+    project, dataset, table = fqn.split(".")
+    metadata = read_yaml(Path(sql_dir) / project / dataset / table / "metadata.yaml")
+    scheduling = metadata.get("scheduling") or {}
+    parameter = scheduling.get("date_partition_parameter", DEFAULT_PARTITION_PARAMETER)
+    field = ((metadata.get("bigquery") or {}).get("time_partitioning") or {}).get("field")
+    return {"incremental": bool(parameter and field), "parameter": parameter, "partition_field": field}
+
+
+def reads_itself(fqn: str, sql_path: Path, sql_dir: str = DEFAULT_SQL_DIR) -> bool:
+    """Whether a query reads its own table (cumulative tables like clients_last_seen)."""
+    project = fqn.split(".")[0]
+    try:
+        sql = read_lineage_sql(sql_path, sql_dir)
+    except OSError:
+        return False
+    return any(resolve_table_reference(ref, project) == fqn for ref in extract_source_tables(sql))
+
+
+def source_tables(graph: LineageGraph, paths: Dict[str, Path], fqn: str) -> List[str]:
+    """Upstream tables a query scans, reading through views."""
+    tables, stack, seen = [], [fqn], {fqn}
+    while stack:
+        table = stack.pop()
+        if table not in graph:
+            continue
+        for node in graph.neighbors(graph.ids[table], "upstream"):
+            source = graph.names[node]
+            if source in seen:
+                continue
+            seen.add(source)
+            path = paths.get(source)
+            if path is not None and path.name == "view.sql":
+                stack.append(source)
+            else:
+                tables.append(source)
+    return tables
+
+
+def run_cost(
+    stats: Dict[str, Dict],
+    sources: List[str],
+    lookbacks: Dict[str, Optional[float]],
+    full_refresh: bool,
+) -> Optional[int]:
+    """Estimated bytes one run scans, or None when no source has stats."""
+    total, known = 0, False
+    for source in sources:
+        table_stats = stats.get(source)
+        if not table_stats:
+            continue
+        known = True
+        lookback = lookbacks.get(source, 1)
+        if full_refresh or lookback is None:
+            total += table_stats["bytes"]
+        else:
+            total += int(estimate_daily_scan_bytes(table_stats, None) * max(lookback, 1))
+    return total if known else None
+
+
+def plan_backfill(
+    table: str,
+    start: date,
+    end: date,
+    until: date,
+    sql_dir: str = DEFAULT_SQL_DIR,
+    stats: Optional[Dict[str, Dict]] = None,
+    include_changed: bool = True,
+) -> Dict:
+    """
+    Plan the backfills needed after table changed for dates start..end.
+
+    Returns:
+        Dict with table, start_date, end_date, until and waves: lists of entries with
+        table, mode (incremental or full_refresh), ranges ([start, end] ISO dates),
+        runs, reason, run_bytes and bytes (None without stats), plus per-wave runs
+        and bytes totals
+    """
+    graph = build_lineage_graph(sql_dir)
+    paths = dict(find_lineage_files(sql_dir))
+    if table not in paths:
+        raise ValueError(f"{table} has no query.sql or view.sql in {sql_dir}")
+
+    # A changed view is not backfilled; its readers are, with lookbacks on the tables behind it
+    is_view = paths[table].name == "view.sql"
+    view_sources = source_tables(graph, paths, table) if is_view else []
+
+    # Walk downstream: edges (upstream -> consumer, lookback) over every affected table
+    edges: Dict[str, Dict[str, Optional[float]]] = {}
+    frontier, affected = [table], {table}
+    while frontier:
+        upstream = frontier.pop()
+        partitioning = source_partitioning(sql_dir, upstream)
+        if upstream == table and is_view:
+            consumers = view_consumer_lookbacks(sql_dir, table, view_sources, graph, paths)
+        elif partitioning:
+            consumers = consumer_lookbacks(sql_dir, upstream, partitioning["field"], graph, paths)
+        else:
+            # Unpartitioned source: its rows still carry dates; assume consumers read the same dates
+            consumers = [
+                {"table": consumer, "lookback_days": 1}
+                for consumer in consumers_through_views(graph, paths, upstream)
+            ]
+        for consumer in consumers:
+            edges.setdefault(consumer["table"], {})[upstream] = consumer["lookback_days"]
+            if consumer["table"] not in affected:
+                affected.add(consumer["table"])
+                frontier.append(consumer["table"])
+
+    # Topological waves: a table runs one wave after its latest affected upstream
+    wave_of = {table: 0}
+    ranges_of: Dict[str, List[Range]] = {table: [(start, end)]}
+    reasons: Dict[str, str] = {table: "changed table"}
+    if not is_view and reads_itself(table, paths[table], sql_dir):
+        # Every later run reads the changed dates back from its own output
+        ranges_of[table] = [(start, max(until, end))]
+        reasons[table] = "changed table; reads its own previous output"
+    pending = {consumer: set(upstreams) for consumer, upstreams in edges.items()}
+    ready = [table]
+    while ready:
+        current = ready.pop()
+        for consumer, upstreams in pending.items():
+            if current not in upstreams:
+                continue
+            upstreams.discard(current)
+            if not upstreams and consumer not in wave_of:
+                wave_of[consumer] = 1 + max(wave_of[u] for u in edges[consumer] if u in wave_of)
+                ranges_of[consumer], reasons[consumer] = consumer_ranges(
+                    consumer, paths[consumer], edges[consumer], ranges_of, until, sql_dir
+                )
+                ready.append(consumer)
+
+    unresolved = sorted(set(edges) - set(wave_of))
+    if unresolved:
+        print(f"Warning: Lineage cycle; not planned: {', '.join(unresolved)}", file=sys.stderr)
+
+    waves: List[List[Dict]] = []
+    for fqn, wave in sorted(wave_of.items(), key=lambda item: (item[1], item[0])):
+        if fqn == table and (is_view or not include_changed):
+            continue
+        mode = backfill_mode(sql_dir, fqn)
+        full_refresh = not mode["incremental"]
+        ranges = ranges_of[fqn]
+        runs = 1 if full_refresh else sum((range_end - range_start).days + 1 for range_start, range_end in ranges)
+        run_bytes = None
+        if stats:
+            lookbacks = dict(edges.get(fqn, {}))
+            if table in lookbacks and is_view:
+                lookbacks.update({source: lookbacks[table] for source in view_sources})
+            run_bytes = run_cost(stats, source_tables(graph, paths, fqn), lookbacks, full_refresh)
+        while len(waves) <= wave:
+            waves.append([])
+        waves[wave].append({
+            "table": fqn,
+            "mode": "full_refresh" if full_refresh else "incremental",
+            "ranges": [[range_start.isoformat(), range_end.isoformat()] for range_start, range_end in ranges],
+            "runs": runs,
+            "reason": reasons[fqn],
+            "run_bytes": run_bytes,
+            "bytes": run_bytes * runs if run_bytes is not None else None,
+        })
+
+    return {
+        "table": table,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "until": until.isoformat(),
+        "waves": [
+            {
+                "wave": i + 1,
+                "tables": entries,
+                "runs": sum(entry["runs"] for entry in entries),
+                "bytes": wave_bytes(entries),
+            }
+            for i, entries in enumerate(wave for wave in waves if wave)
+        ],
+    }
+
+
+def wave_bytes(entries: List[Dict]) -> Optional[int]:
+    """Estimated bytes of a wave, or None when no entry has an estimate."""
+    known = [entry["bytes"] for entry in entries if entry["bytes"] is not None]
+    return sum(known) if known else None
+
+
+def consumers_through_views(graph: LineageGraph, paths: Dict[str, Path], fqn: str) -> List[str]:
+    """Queries reading fqn directly or through views."""
+    consumers, stack, seen = [], [fqn], {fqn}
+    while stack:
+        table = stack.pop()
+        for node in graph.neighbors(graph.ids[table], "downstream") if table in graph else []:
+            consumer = graph.names[node]
+            if consumer in seen or consumer not in paths:
+                continue
+            seen.add(consumer)
+            if paths[consumer].name == "view.sql":
+                stack.append(consumer)
+            else:
+                consumers.append(consumer)
+    return sorted(consumers)
+
+
+def view_consumer_lookbacks(
+    sql_dir: str,
+    view: str,
+    view_sources: List[str],
+    graph: LineageGraph,
+    paths: Dict[str, Path],
+) -> List[Dict]:
+    """
+    Lookback of every query reading a view, on the partition fields of the tables behind it.
+
+    Returns:
+        List of dicts with table (consumer fqn) and lookback_days (None for the full history,
+        1 when no table behind the view is partitioned)
+    """
+    readers = consumers_through_views(graph, paths, view)
+    lookbacks: Dict[str, List[Optional[float]]] = {}
+    for source in view_sources:
+        partitioning = source_partitioning(sql_dir, source)
+        if not partitioning:
+            continue
+        for consumer in consumer_lookbacks(sql_dir, source, partitioning["field"], graph, paths):
+            if consumer["table"] in readers:
+                lookbacks.setdefault(consumer["table"], []).append(consumer["lookback_days"])
+
+    consumers = []
+    for reader in readers:
+        days = lookbacks.get(reader, [1])
+        consumers.append({"table": reader, "lookback_days": None if None in days else max(days)})
+    return consumers
+
+
+def consumer_ranges(
+    consumer: str,
+    sql_path: Path,
+    upstreams: Dict[str, Optional[float]],
+    ranges_of: Dict[str, List[Range]],
+    until: date,
+    sql_dir: str = DEFAULT_SQL_DIR,
+) -> Tuple[List[Range], str]:
+    """Dates a consumer must rerun for, from its affected upstreams' ranges and lookbacks."""
+    cumulative = reads_itself(consumer, sql_path, sql_dir)
+    ranges, reasons = [], []
+    for upstream, lookback in sorted(upstreams.items()):
+        name = ".".join(upstream.split(".")[1:])
+        if lookback is None:
+            reasons.append(f"reads the full history of {name}")
+        elif lookback > 1:
+            reasons.append(f"reads {lookback:g} days of {name}")
+        else:
+            reasons.append(f"reads {name}")
+        for range_start, range_end in ranges_of[upstream]:
+            if lookback is None or cumulative:
+                ranges.append((range_start, max(until, range_end)))
+            else:
+                extended = range_end + timedelta(days=int(lookback + 0.999) - 1)
+                ranges.append((range_start, max(range_end, min(extended, until))))
+    if cumulative:
+        reasons.append("reads its own previous output")
+    return merge_ranges(ranges), "; ".join(reasons)
+
+
+def backfill_command(entry: Dict) -> List[str]:
+    project, dataset, table = entry["table"].split(".")
+    project_flag = f" --project_id={project}" if project != DEFAULT_PROJECT else ""
+    if entry["mode"] == "full_refresh":
+        last = entry["ranges"][-1][1]
+        return [f"./bqetl query backfill {dataset}.{table}{project_flag} --start_date={last} --end_date={last}"]
+    return [
+        f"./bqetl query backfill {dataset}.{table}{project_flag} --start_date={range_start} --end_date={range_end}"
+        for range_start, range_end in entry["ranges"]
+    ]
+
+
+def format_output(plan: Dict, output_format: str = "text") -> str:
+    """Format a backfill plan as JSON or text."""
+    if output_format == "json":
+        return json.dumps(plan, indent=2)
+
+    output = [
+        f"🔁 Backfill plan for {plan['table']} ({plan['start_date']} to {plan['end_date']}, "
+        f"open-ended ranges until {plan['until']})",
+        "",
+    ]
+    total_runs, total_bytes = 0, 0
+    for wave in plan["waves"]:
+        cost = f", ~{format_bytes(wave['bytes'])} scanned" if wave["bytes"] is not None else ""
+        output.append(f"Wave {wave['wave']} ({len(wave['tables'])} table(s) in parallel, {wave['runs']} run(s){cost})")
+        for entry in wave["tables"]:
+            ranges = ", ".join(f"{s} → {e}" for s, e in entry["ranges"])
+            mode = "full refresh, 1 run" if entry["mode"] == "full_refresh" else f"{entry['runs']} run(s)"
+            output.append(f"   • {entry['table']}: {ranges} ({mode})")
+            output.append(f"      {entry['reason']}")
+            for command in backfill_command(entry):
+                output.append(f"      {command}")
+        output.append("")
+        total_runs += wave["runs"]
+        total_bytes += wave["bytes"] or 0
+
+    tables = sum(len(wave["tables"]) for wave in plan["waves"])
+    summary = f"{tables} table(s) in {len(plan['waves'])} wave(s), {total_runs} query run(s)"
+    if any(wave["bytes"] is not None for wave in plan["waves"]):
+        summary += f", ~{format_bytes(total_bytes)} scanned"
+    output.append(summary)
+    output.append("Consumers outside the repository (dashboards, other projects) are not included.")
+    return "\n".join(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Plan downstream backfills, in dependency order, after a table changed",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "table",
+        help="Changed table (dataset.table or project.dataset.table)"
+    )
+    parser.add_argument(
+        "--start-date",
+        required=True,
+        type=date.fromisoformat,
+        help="First changed date (YYYY-MM-DD)"
+    )
+    parser.add_argument(
+        "--end-date",
+        required=True,
+        type=date.fromisoformat,
+        help="Last changed date (YYYY-MM-DD)"
+    )
+    parser.add_argument(
+        "--until",
+        type=date.fromisoformat,
+        default=date.today() - timedelta(days=1),
+        help="End of open-ended ranges (full-history and cumulative readers; default: yesterday)"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Root of the bigquery-etl sql/ tree (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--stats",
+        metavar="PATH",
+        help="Table-statistics snapshot (JSON or CSV) to estimate scanned bytes per wave"
+    )
+    parser.add_argument(
+        "--exclude-changed",
+        action="store_true",
+        help="Leave the changed table itself out of the plan"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "text"],
+        default="text",
+        help="Output format (default: text)"
+    )
+
+    args = parser.parse_args()
+    if args.end_date < args.start_date:
+        parser.error("--end-date is before --start-date")
+
+    if not Path(args.sql_dir).exists():
+        print(f"Error: SQL directory not found: {args.sql_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        stats = load_table_stats(args.stats) if args.stats else None
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not load table stats {args.stats}: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    try:
+        plan = plan_backfill(
+            qualify_table(args.table),
+            args.start_date,
+            args.end_date,
+            args.until,
+            args.sql_dir,
+            stats,
+            not args.exclude_changed,
+        )
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(format_output(plan, args.format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Clustering-Key Advisor
+
+Recommends `bigquery.clustering.fields` for a table's metadata.yaml from how the
+queries downstream of it in the local sql/ tree actually read it.
+
+For every downstream query (found with the local lineage graph; reads through
+view.sql files are followed to the views' consumers) the columns of the table used
+in WHERE, JOIN (ON/USING) and GROUP BY clauses are collected. Each use is weighted
+by its kind and by how often the consuming query runs (its DAG's
+schedule_interval in dags.yaml, via dag_schedule.py):
+
+    WHERE col = x / col IN (...)   1.0    (clustering prunes blocks)
+    WHERE col > x / BETWEEN        0.6    (prunes when values are clustered)
+    JOIN ... ON / USING            0.5    (helps joins against pruned sides)
+    GROUP BY                       0.3    (cheaper aggregation)
+
+Up to four top-level, clusterable columns (not FLOAT, RECORD, REPEATED or JSON, and
+not the partition field) are recommended, highest score first, since BigQuery only
+prunes on a prefix of the clustering fields. The estimated pruning benefit of each
+field is the share of downstream runs per day that filter on it in WHERE.
+
+Usage:
+    python scripts/recommend_clustering.py <table> [<table>...] [options]
+
+Examples:
+    # Recommend clustering for clients_daily_v1
+    python scripts/recommend_clustering.py telemetry_derived.clients_daily_v1
+
+    # At most two fields, JSON output
+    python scripts/recommend_clustering.py telemetry_derived.clients_daily_v1 --max-fields 2 --format json
+
+    # Run from outside the bigquery-etl checkout
+    python scripts/recommend_clustering.py telemetry_derived.clients_daily_v1 --sql-dir ~/bigquery-etl/sql --dags-file ~/bigquery-etl/dags.yaml
+"""
+
+import argparse
+import bisect
+import json
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(SKILLS_DIR / "query-writer" / "scripts"))
+from check_partition_pruning import mask_sql_noise, predicate_around, read_yaml, source_partitioning  # noqa: E402
+from dag_schedule import DEFAULT_DAGS_FILE, load_dags, qualify_table, runs_per_day  # noqa: E402
+from datahub_lineage import (  # noqa: E402
+    DEFAULT_SQL_DIR,
+    LineageGraph,
+    build_lineage_graph,
+    find_lineage_files,
+    resolve_table_reference,
+)
+from extract_query_fields import extract_source_tables, extract_table_aliases  # noqa: E402
+
+
+MAX_CLUSTERING_FIELDS = 4
+USAGE_WEIGHTS = {"equality": 1.0, "range": 0.6, "join": 0.5, "group": 0.3}
+UNCLUSTERABLE_TYPES = {"FLOAT", "FLOAT64", "RECORD", "STRUCT", "JSON"}
+
+_CLAUSE_RE = re.compile(
+    r"\b(WHERE|ON|USING|GROUP\s+BY|SELECT|FROM|JOIN|HAVING|QUALIFY|ORDER\s+BY|PARTITION\s+BY|WINDOW|LIMIT)\b",
+    re.IGNORECASE,
+)
+_COLUMN_RE = re.compile(r"(?<![\w\.@])(?:([`\w\-]+(?:\.[`\w\-]+)*)\.)?([a-zA-Z_]\w*)\b(?!\s*\()")
+
+
+def table_metadata(sql_dir: str, fqn: str) -> Dict:
+    project, dataset, table = fqn.split(".")
+    return read_yaml(Path(sql_dir) / project / dataset / table / "metadata.yaml")
+
+
+def clusterable_columns(sql_dir: str, fqn: str) -> Optional[Dict[str, bool]]:
+    """
+    Map each top-level column of the table's schema.yaml to whether it can be clustered on.
+
+    Returns None when the table has no local schema.yaml.
+    """
+    project, dataset, table = fqn.split(".")
+    schema = read_yaml(Path(sql_dir) / project / dataset / table / "schema.yaml")
+    if not schema:
+        return None
+    return {
+        field["name"]: (
+            str(field.get("type", "")).upper() not in UNCLUSTERABLE_TYPES
+            and field.get("mode") != "REPEATED"
+        )
+        for field in schema.get("fields", [])
+        if field.get("name")
+    }
+
+
+def find_consumers(
+    sql_dir: str,
+    fqn: str,
+    graph: Optional[LineageGraph] = None,
+    paths: Optional[Dict[str, Path]] = None,
+) -> List[Tuple[str, Path, Set[str]]]:
+    """
+    Find the queries that read a table, directly or through views.
+
+    Args:
+        graph, paths: Prebuilt lineage graph and fqn -> sql path map, when checking many tables
+
+    Returns:
+        List of (consumer fqn, query path, fqns of the table or views it reads it through)
+    """
+    graph = graph or build_lineage_graph(sql_dir)
+    paths = paths if paths is not None else dict(find_lineage_files(sql_dir))
+    if fqn not in graph:
+        return []
+
+    consumers = {}
+    frontier = [(graph.ids[fqn], fqn)]
+    seen = {graph.ids[fqn]}
+    while frontier:
+        node_id, via = frontier.pop()
+        for consumer_id in graph.neighbors(node_id, "downstream"):
+            consumer = graph.names[consumer_id]
+            path = paths.get(consumer)
+            if path is None:
+                continue
+            if path.name == "view.sql":
+                if consumer_id not in seen:
+                    seen.add(consumer_id)
+                    frontier.append((consumer_id, consumer))
+                continue
+            consumers.setdefault(consumer, (path, set()))[1].add(via)
+
+    return [(consumer, path, via) for consumer, (path, via) in sorted(consumers.items())]
+
+
+def column_usages(
+    sql: str,
+    project: str,
+    targets: Set[str],
+    known_columns: Optional[Set[str]] = None,
+) -> Dict[str, str]:
+    """
+    Find the columns of the target table(s) a query uses in WHERE, JOIN and GROUP BY.
+
+    Args:
+        sql: Query text (comments, Jinja and strings are masked here)
+        project: Project of the query, for two-part table references
+        targets: Fully qualified names the table is read through
+        known_columns: Top-level columns of the table, used to attribute unqualified columns
+
+    Returns:
+        Mapping of top-level column to its strongest usage kind
+        ("equality", "range", "join" or "group")
+    """
+    sql = mask_sql_noise(sql)
+    sources = {
+        ref: resolve_table_reference(ref, project)
+        for ref in extract_source_tables(sql)
+    }
+    target_refs = {ref for ref, fqn in sources.items() if fqn in targets}
+    if not target_refs:
+        return {}
+    qualifiers = set(target_refs) | {ref.split(".")[-1] for ref in target_refs}
+    qualifiers |= {alias for alias, ref in extract_table_aliases(sql).items() if ref in target_refs}
+    sole_source = len(set(sources.values())) == 1
+
+    clauses = [(m.start(), re.sub(r"\s+", " ", m.group(1).upper())) for m in _CLAUSE_RE.finditer(sql)]
+    positions = [start for start, _ in clauses]
+
+    usages: Dict[str, str] = {}
+    for match in _COLUMN_RE.finditer(sql):
+        index = bisect.bisect_right(positions, match.start()) - 1
+        if index < 0 or clauses[index][0] == match.start():
+            continue
+        clause = clauses[index][1]
+        if clause not in ("WHERE", "ON", "USING", "GROUP BY"):
+            continue
+
+        qualifier = (match.group(1) or "").replace("`", "") or None
+        column = match.group(2)
+        if qualifier is not None:
+            if qualifier not in qualifiers:
+                continue
+        elif known_columns is not None:
+            if column not in known_columns:
+                continue
+        elif not sole_source or column.upper() in ("AND", "OR", "NOT", "IN", "IS", "NULL", "BETWEEN", "LIKE"):
+            continue
+
+        if clause == "WHERE":
+            predicate = predicate_around(sql, match.start(), match.end())
+            if re.search(r"\bBETWEEN\b|<|>", predicate, re.IGNORECASE):
+                kind = "range"
+            elif re.search(r"=|\bIN\b", predicate, re.IGNORECASE):
+                kind = "equality"
+            else:
+                continue
+        elif clause in ("ON", "USING"):
+            kind = "join"
+        else:
+            kind = "group"
+
+        if USAGE_WEIGHTS[kind] > USAGE_WEIGHTS.get(usages.get(column), 0):
+            usages[column] = kind
+    return usages
+
+
+def recommend_clustering(
+    table: str,
+    sql_dir: str = DEFAULT_SQL_DIR,
+    dags: Optional[Dict[str, Dict]] = None,
+    max_fields: int = MAX_CLUSTERING_FIELDS,
+    graph: Optional[LineageGraph] = None,
+    paths: Optional[Dict[str, Path]] = None,
+) -> Dict:
+    """
+    Recommend clustering fields for a table from downstream usage.
+
+    Args:
+        graph, paths: Prebuilt lineage graph and fqn -> sql path map, when checking many tables
+
+    Returns:
+        Dict with table, partition_field, current (clustering fields in metadata.yaml),
+        consumers (fqn, runs_per_day, usages), candidates (column, score, runs per
+        kind, filter_share, clusterable) and recommended (column list)
+    """
+    fqn = qualify_table(table)
+    dags = dags or {}
+    bigquery = table_metadata(sql_dir, fqn).get("bigquery") or {}
+    partition_field = (source_partitioning(sql_dir, fqn) or {}).get("field")
+    current = (bigquery.get("clustering") or {}).get("fields") or []
+    columns = clusterable_columns(sql_dir, fqn)
+
+    consumers = []
+    scores: Dict[str, float] = defaultdict(float)
+    runs_by_kind: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    total_runs = 0.0
+    for consumer, path, via in find_consumers(sql_dir, fqn, graph, paths):
+        try:
+            sql = path.read_text()
+        except OSError as e:
+            print(f"Warning: Could not read {path}: {e}", file=sys.stderr)
+            continue
+        runs = runs_per_day(sql_dir, consumer, dags)
+        usages = column_usages(sql, consumer.split(".")[0], via, set(columns) if columns else None)
+        consumers.append({"table": consumer, "runs_per_day": runs, "usages": usages})
+        total_runs += runs
+        for column, kind in usages.items():
+            scores[column] += runs * USAGE_WEIGHTS[kind]
+            runs_by_kind[column][kind] += runs
+
+    candidates = []
+    for column, score in sorted(scores.items(), key=lambda item: (-item[1], item[0])):
+        filter_runs = runs_by_kind[column].get("equality", 0.0) + runs_by_kind[column].get("range", 0.0)
+        candidates.append({
+            "column": column,
+            "score": round(score, 3),
+            "runs_per_day": {kind: round(runs, 3) for kind, runs in runs_by_kind[column].items()},
+            "filter_share": round(filter_runs / total_runs, 4) if total_runs else 0.0,
+            "clusterable": column != partition_field and (columns is None or columns.get(column, False)),
+        })
+
+    return {
+        "table": fqn,
+        "partition_field": partition_field,
+        "current": current,
+        "consumers": consumers,
+        "candidates": candidates,
+        "recommended": [c["column"] for c in candidates if c["clusterable"]][:max_fields],
+    }
+
+
+def format_output(results: List[Dict], output_format: str = "text") -> str:
+    """Format recommendations as JSON or text."""
+    if output_format == "json":
+        return json.dumps(results, indent=2)
+
+    output = []
+    for result in results:
+        output.append(f"📦 {result['table']}")
+        output.append(
+            f"   Downstream queries: {len(result['consumers'])} "
+            f"({sum(c['runs_per_day'] for c in result['consumers']):.2f} runs/day)"
+        )
+        output.append(f"   Partition field: {result['partition_field'] or 'none'}")
+        output.append(f"   Current clustering: {', '.join(result['current']) or 'none'}")
+
+        if not result["candidates"]:
+            output.append("   No WHERE/JOIN/GROUP BY usage of this table found downstream.")
+            output.append("")
+            continue
+
+        output.append("")
+        output.append("   Column usage (weighted by runs/day):")
+        for candidate in result["candidates"]:
+            kinds = ", ".join(f"{kind} {runs:g}/day" for kind, runs in candidate["runs_per_day"].items())
+            note = "" if candidate["clusterable"] else "  (not clusterable)"
+            output.append(f"      {candidate['column']}: score {candidate['score']:g} [{kinds}]{note}")
+
+        if result["recommended"]:
+            benefit = {c["column"]: c["filter_share"] for c in result["candidates"]}
+            output.append("")
+            output.append("   ✅ Recommended clustering (add to metadata.yaml):")
+            output.append("      bigquery:")
+            output.append("        clustering:")
+            output.append("          fields:")
+            for column in result["recommended"]:
+                output.append(
+                    f"          - {column}  # filtered in {benefit[column]:.0%} of downstream runs"
+                )
+            if result["current"] and result["current"] != result["recommended"]:
+                output.append(f"   ⚠️  Differs from current clustering: {', '.join(result['current'])}")
+        output.append("")
+
+    return "\n".join(output).rstrip()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recommend clustering fields from downstream query usage",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "tables",
+        nargs="+",
+        help="Tables to advise on (dataset.table or project.dataset.table)"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Root of the bigquery-etl sql/ tree (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--dags-file",
+        default=DEFAULT_DAGS_FILE,
+        help=f"Path to dags.yaml, for run frequencies (default: {DEFAULT_DAGS_FILE})"
+    )
+    parser.add_argument(
+        "--max-fields",
+        type=int,
+        choices=range(1, MAX_CLUSTERING_FIELDS + 1),
+        default=MAX_CLUSTERING_FIELDS,
+        help=f"Maximum clustering fields to recommend (default: {MAX_CLUSTERING_FIELDS})"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "text"],
+        default="text",
+        help="Output format (default: text)"
+    )
+
+    args = parser.parse_args()
+
+    dags = load_dags(args.dags_file)
+    try:
+        graph = build_lineage_graph(args.sql_dir)
+        paths = dict(find_lineage_files(args.sql_dir))
+        results = [
+            recommend_clustering(table, args.sql_dir, dags, args.max_fields, graph, paths)
+            for table in args.tables
+        ]
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(format_output(results, args.format))
+
+
+if __name__ == "__main__":
+    main()
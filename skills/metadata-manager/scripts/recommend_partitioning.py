@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Partition Granularity and Expiration Advisor
+
+Reports partitioning and retention changes for every table of one or more
+datasets (or for specific tables), by cross-referencing:
+
+    - The DAG cadence: runs/day of the table's DAG (scheduling.dag_name + dags.yaml)
+    - `bigquery.time_partitioning`: type, field and expiration_days in metadata.yaml
+    - Consumer lookback: how many days back downstream queries read, from their
+      predicates on the partition field (`= @submission_date` is 1 day,
+      `>= DATE_SUB(@submission_date, INTERVAL 27 DAY)` is 28 days, no filter or a
+      filter without a parameter is the full history)
+    - Retention policy from references/metadata_yaml_guide.md (775 days for
+      client-level data)
+
+Recommendations:
+    - `type: hour` for day-partitioned full-refresh tables (date_partition_parameter:
+      null) written by sub-daily DAGs, when a TIMESTAMP/DATETIME field exists to
+      partition on; `type: day` for hour-partitioned tables written at most daily
+    - Hour-partitioned tables kept longer than ~416 days hit BigQuery's 10,000
+      partition limit
+    - `expiration_days` raised when consumers read further back than it keeps
+    - `expiration_days: 775` for client-level tables without one
+    - Day partitioning for unpartitioned incremental tables (date_partition_parameter set)
+
+Usage:
+    python scripts/recommend_partitioning.py --dataset <dataset> [--dataset ...] [options]
+    python scripts/recommend_partitioning.py <table> [<table>...] [options]
+
+Examples:
+    # Report for a whole dataset
+    python scripts/recommend_partitioning.py --dataset telemetry_derived
+
+    # Include tables that need no changes, as JSON
+    python scripts/recommend_partitioning.py --dataset telemetry_derived --verbose --format json
+
+    # Specific tables
+    python scripts/recommend_partitioning.py telemetry_derived.clients_daily_v1 telemetry_derived.clients_last_seen_v1
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(SKILLS_DIR / "query-writer" / "scripts"))
+from check_partition_pruning import mask_sql_noise, partition_predicates, read_yaml  # noqa: E402
+from dag_schedule import DEFAULT_DAGS_FILE, load_dags, qualify_table, table_schedule  # noqa: E402
+from datahub_lineage import DEFAULT_SQL_DIR, build_lineage_graph, find_lineage_files  # noqa: E402
+from extract_query_fields import extract_table_aliases  # noqa: E402
+from recommend_clustering import find_consumers  # noqa: E402
+
+
+CLIENT_LEVEL_EXPIRATION_DAYS = 775
+MAX_PARTITIONS = 10000
+MAX_HOURLY_EXPIRATION_DAYS = MAX_PARTITIONS // 24
+HOURLY_FIELD_TYPES = {"TIMESTAMP", "DATETIME"}
+# bqetl's default for scheduling.date_partition_parameter; null means full refresh
+DEFAULT_PARTITION_PARAMETER = "submission_date"
+INTERVAL_DAYS = {"HOUR": 1 / 24, "DAY": 1, "WEEK": 7, "MONTH": 31, "QUARTER": 92, "YEAR": 366}
+
+_INTERVAL_RE = re.compile(r"\bINTERVAL\s+(\d+)\s+(HOUR|DAY|WEEK|MONTH|QUARTER|YEAR)\b", re.IGNORECASE)
+_COMPARISON_RE = re.compile(r"<=|>=|<>|!=|=|<|>|\bBETWEEN\b|\bIN\b", re.IGNORECASE)
+_FLIPPED = {"<": ">", ">": "<", "<=": ">=", ">=": "<="}
+
+
+def find_dataset_tables(sql_dir: str, dataset: str) -> List[str]:
+    """Find the tables (with a metadata.yaml) of a dataset in any project."""
+    return sorted(
+        ".".join(path.parts[-4:-1])
+        for path in Path(sql_dir).glob(f"*/{dataset}/*/metadata.yaml")
+    )
+
+
+def consumer_lookback(sql: str, field: str, qualifiers: List[str]) -> Optional[float]:
+    """
+    Estimate how many days of a table one run of a query reads.
+
+    Returns:
+        Days read back from the run date (1 for a single partition), or None when
+        the query reads the full history (no bounded filter on the partition field)
+    """
+    predicates = [p for p in partition_predicates(sql, field, qualifiers) if re.search(r"@\w+", p)]
+    intervals = [
+        int(count) * INTERVAL_DAYS[unit.upper()]
+        for predicate in predicates
+        for count, unit in _INTERVAL_RE.findall(predicate)
+    ]
+    if intervals:
+        return max(intervals) + 1
+
+    column = rf"(?:[\w`\.\-]+\.)?{re.escape(field)}\b\s*\)?"
+    for predicate in predicates:
+        if re.search(r"(?<![<>!])=|\bIN\b|\bBETWEEN\b", predicate, re.IGNORECASE):
+            return 1
+        # Lower bound only: `field > @date` or `@date < field`
+        if re.search(rf"{column}\s*>", predicate, re.IGNORECASE) or re.search(
+            rf"<\s*=?\s*(?:DATE\s*\(\s*)?{column}", predicate, re.IGNORECASE
+        ):
+            return 1
+    return None
+
+
+def parameter_offset(expression: str) -> Optional[float]:
+    """Days an expression lies from its @parameter (DATE_SUB(@d, INTERVAL 1 DAY) is -1), or None without one."""
+    if not re.search(r"@\w+", expression):
+        return None
+    days = sum(int(count) * INTERVAL_DAYS[unit.upper()] for count, unit in _INTERVAL_RE.findall(expression))
+    return -days if re.search(r"_SUB\s*\(|-\s*INTERVAL\b", expression, re.IGNORECASE) else days
+
+
+def read_window(sql: str, field: str, qualifiers: List[str]) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """
+    Partition days one run of a query reads, relative to the parameter date.
+
+    Returns:
+        (first, last) day offsets, e.g. (-1, -1) for `= DATE_SUB(@submission_date,
+        INTERVAL 1 DAY)`, with None for an unbounded side; None when no predicate
+        bounds the partition field with a parameter
+    """
+    column = re.compile(rf"(?:[\w`\.\-]+\.)?{re.escape(field)}\b", re.IGNORECASE)
+    firsts, lasts = [], []
+    for predicate in partition_predicates(sql, field, qualifiers):
+        match = _COMPARISON_RE.search(predicate)
+        if not match:
+            continue
+        operator = match.group().upper()
+        left, right = predicate[:match.start()], predicate[match.end():]
+        if not column.search(left):
+            right, operator = left, _FLIPPED.get(operator, operator)
+        if operator == "BETWEEN":
+            bounds = list(zip((">=", "<="), re.split(r"\bAND\b", right, maxsplit=1, flags=re.IGNORECASE)))
+        else:
+            bounds = [(operator, right)]
+        for operator, expression in bounds:
+            offset = parameter_offset(expression)
+            if offset is None:
+                continue
+            # Strict bounds on a whole day exclude it; on an hour they still read part of the day
+            strict = 1 if operator in ("<", ">") and offset == int(offset) else 0
+            if operator in ("=", "IN", ">=", ">"):
+                firsts.append(math.floor(offset) + strict)
+            if operator in ("=", "IN", "<=", "<"):
+                lasts.append(math.floor(offset) - strict)
+    if not firsts and not lasts:
+        return None
+    return (max(firsts) if firsts else None, min(lasts) if lasts else None)
+
+
+def consumer_lookbacks(
+    sql_dir: str,
+    fqn: str,
+    field: str,
+    graph=None,
+    paths: Optional[Dict[str, Path]] = None,
+) -> List[Dict]:
+    """
+    Lookback of every query reading a table (directly or through views) on its partition field.
+
+    Returns:
+        List of dicts with table (consumer fqn) and lookback_days (None for the full history)
+    """
+    consumers = []
+    for consumer, path, via in find_consumers(sql_dir, fqn, graph, paths):
+        try:
+            sql = mask_sql_noise(path.read_text())
+        except OSError as e:
+            print(f"Warning: Could not read {path}: {e}", file=sys.stderr)
+            continue
+        refs = {".".join(v.split(".")[1:]) for v in via} | via
+        qualifiers = list(refs) + [v.split(".")[-1] for v in via]
+        qualifiers += [alias for alias, ref in extract_table_aliases(sql).items() if ref in refs]
+        consumers.append({"table": consumer, "lookback_days": consumer_lookback(sql, field, qualifiers)})
+    return consumers
+
+
+def is_client_level(metadata: Dict, schema: Dict) -> bool:
+    if (metadata.get("labels") or {}).get("table_type") == "client_level":
+        return True
+    return any(field.get("name") == "client_id" for field in schema.get("fields", []))
+
+
+def advise_table(
+    fqn: str,
+    sql_dir: str,
+    dags: Dict[str, Dict],
+    graph=None,
+    paths: Optional[Dict[str, Path]] = None,
+) -> Dict:
+    """
+    Recommend partitioning and expiration changes for one table.
+
+    Returns:
+        Dict with table, dag_name, runs_per_day, partitioning (type, field,
+        expiration_days), consumers (table, lookback_days or None), max_lookback_days
+        (None if any consumer reads the full history), client_level and
+        recommendations (setting, current, recommended, reason)
+    """
+    project, dataset, table = fqn.split(".")
+    table_dir = Path(sql_dir) / project / dataset / table
+    metadata = read_yaml(table_dir / "metadata.yaml")
+    schema = read_yaml(table_dir / "schema.yaml")
+    field_types = {f.get("name"): str(f.get("type", "")).upper() for f in schema.get("fields", [])}
+    scheduling = metadata.get("scheduling") or {}
+    partitioning = (metadata.get("bigquery") or {}).get("time_partitioning") or {}
+    partition_type = str(partitioning.get("type", "day")).lower() if partitioning else None
+    field = partitioning.get("field")
+    expiration = partitioning.get("expiration_days")
+
+    schedule = table_schedule(sql_dir, fqn, dags)
+    runs = schedule["schedule"]["runs_per_day"] if schedule["schedule"] else None
+
+    consumers = consumer_lookbacks(sql_dir, fqn, field, graph, paths) if field else []
+
+    unbounded = [c["table"] for c in consumers if c["lookback_days"] is None]
+    bounded = [c["lookback_days"] for c in consumers if c["lookback_days"] is not None]
+    max_lookback = None if unbounded else (max(bounded) if bounded else 0)
+    client_level = is_client_level(metadata, schema)
+
+    recommendations = []
+
+    def recommend(setting: str, current, recommended, reason: str):
+        recommendations.append({
+            "setting": setting, "current": current, "recommended": recommended, "reason": reason,
+        })
+
+    if not partitioning:
+        if scheduling.get("date_partition_parameter"):
+            recommend(
+                "time_partitioning", None,
+                {"type": "day", "field": scheduling["date_partition_parameter"]},
+                "incremental query (date_partition_parameter set) writing an unpartitioned table",
+            )
+    else:
+        # A DATE field cannot be hour-partitioned, and date-parameterized runs
+        # overwrite a whole day partition, so only full-refresh tables qualify
+        date_parameterized = scheduling.get("date_partition_parameter", DEFAULT_PARTITION_PARAMETER) is not None
+        hourly_field = next(
+            (f for f in (field, "submission_timestamp") if field_types.get(f) in HOURLY_FIELD_TYPES), None
+        )
+        if partition_type == "day" and runs is not None and runs > 1 and hourly_field and not date_parameterized:
+            recommend(
+                "time_partitioning.type", "day", "hour",
+                f"written by {schedule['dag_name']} {runs:g} times/day ({schedule['schedule_interval']})"
+                + (f"; partition on {hourly_field} ({field_types[hourly_field]})" if hourly_field != field else ""),
+            )
+        elif partition_type == "hour" and runs is not None and runs <= 1:
+            new_field = "submission_date" if "submission_date" in field_types else field
+            recommend(
+                "time_partitioning.type", "hour", "day",
+                f"written at most daily by {schedule['dag_name']} ({schedule['schedule_interval']}); "
+                f"hourly partitions multiply partition count 24x"
+                + (f"; partition on {new_field}" if new_field != field else ""),
+            )
+
+        hourly = partition_type == "hour" and not any(r["setting"] == "time_partitioning.type" for r in recommendations)
+        if hourly and (expiration is None or expiration > MAX_HOURLY_EXPIRATION_DAYS):
+            recommend(
+                "time_partitioning.expiration_days", expiration, MAX_HOURLY_EXPIRATION_DAYS,
+                f"hour partitioning reaches BigQuery's {MAX_PARTITIONS:,} partition limit after "
+                f"{MAX_HOURLY_EXPIRATION_DAYS} days",
+            )
+        elif expiration is not None and bounded and max(bounded) > expiration:
+            recommend(
+                "time_partitioning.expiration_days", expiration, int(max(bounded) + 0.999),
+                f"downstream queries read {max(bounded):g} days back "
+                f"({', '.join(c['table'] for c in consumers if c['lookback_days'] == max(bounded))})",
+            )
+        elif expiration is not None and unbounded:
+            recommend(
+                "time_partitioning.expiration_days", expiration, expiration,
+                f"kept, but {', '.join(unbounded)} read(s) the full history; expired partitions change their results",
+            )
+        elif expiration is None and client_level:
+            recommended = max(CLIENT_LEVEL_EXPIRATION_DAYS, int(max(bounded) + 0.999) if bounded else 0)
+            recommend(
+                "time_partitioning.expiration_days", None, recommended,
+                "client-level data without expiration (retention policy: 775 days)"
+                + (f"; {', '.join(unbounded)} read(s) the full history" if unbounded else ""),
+            )
+
+    return {
+        "table": fqn,
+        "dag_name": schedule["dag_name"],
+        "runs_per_day": runs,
+        "partitioning": {"type": partition_type, "field": field, "expiration_days": expiration},
+        "consumers": consumers,
+        "max_lookback_days": max_lookback,
+        "client_level": client_level,
+        "recommendations": recommendations,
+    }
+
+
+def format_output(results: List[Dict], output_format: str = "text", verbose: bool = False) -> str:
+    """Format the report as JSON or text, grouped by dataset."""
+    if output_format == "json":
+        return json.dumps(results, indent=2)
+
+    by_dataset = defaultdict(list)
+    for result in results:
+        by_dataset[result["table"].split(".")[1]].append(result)
+
+    output = []
+    for dataset, dataset_results in sorted(by_dataset.items()):
+        flagged = [r for r in dataset_results if r["recommendations"]]
+        output.append(f"📁 {dataset}: {len(flagged)} of {len(dataset_results)} tables with recommendations")
+        output.append("")
+        for result in dataset_results if verbose else flagged:
+            partitioning = result["partitioning"]
+            table = result["table"].split(".")[-1]
+            cadence = f"{result['runs_per_day']:g} runs/day" if result["runs_per_day"] is not None else "unscheduled"
+            if partitioning["type"]:
+                layout = f"{partitioning['type']} on {partitioning['field']}, expiration {partitioning['expiration_days'] or 'none'}"
+            else:
+                layout = "not partitioned"
+            output.append(f"   {table}")
+            output.append(f"      {cadence} ({result['dag_name'] or 'no DAG'}) | {layout}")
+            if partitioning["type"] and not result["consumers"]:
+                output.append("      no downstream queries")
+            elif partitioning["type"]:
+                lookback = (
+                    "full history" if result["max_lookback_days"] is None
+                    else f"{result['max_lookback_days']:g} days"
+                )
+                output.append(f"      {len(result['consumers'])} downstream queries, max lookback: {lookback}")
+            for rec in result["recommendations"]:
+                if rec["current"] == rec["recommended"]:
+                    output.append(f"      ⚠️  {rec['setting']}: {rec['reason']}")
+                else:
+                    output.append(f"      ➡️  {rec['setting']}: {rec['current']} → {rec['recommended']}")
+                    output.append(f"          {rec['reason']}")
+            output.append("")
+
+    return "\n".join(output).rstrip()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recommend partition type and expiration changes across datasets",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "tables",
+        nargs="*",
+        help="Tables to check (dataset.table or project.dataset.table)"
+    )
+    parser.add_argument(
+        "--dataset",
+        action="append",
+        default=[],
+        help="Check every table of this dataset (repeatable)"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Root of the bigquery-etl sql/ tree (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--dags-file",
+        default=DEFAULT_DAGS_FILE,
+        help=f"Path to dags.yaml (default: {DEFAULT_DAGS_FILE})"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Also list tables that need no changes"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "text"],
+        default="text",
+        help="Output format (default: text)"
+    )
+
+    args = parser.parse_args()
+    if not args.tables and not args.dataset:
+        parser.error("provide tables or --dataset")
+
+    try:
+        tables = [qualify_table(t) for t in args.tables]
+        for dataset in args.dataset:
+            dataset_tables = find_dataset_tables(args.sql_dir, dataset)
+            if not dataset_tables:
+                print(f"Warning: No tables with metadata.yaml found for dataset {dataset}", file=sys.stderr)
+            tables.extend(dataset_tables)
+
+        dags = load_dags(args.dags_file)
+        graph = build_lineage_graph(args.sql_dir)
+        paths = dict(find_lineage_files(args.sql_dir))
+        results = [advise_table(fqn, args.sql_dir, dags, graph, paths) for fqn in tables]
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(format_output(results, args.format, args.verbose))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Schema Update Runner
+
+Runs a schema update step for many tables in dependency order, so descriptions
+added upstream reach downstream tables in the same pass. Tables are grouped into
+topological waves from the local lineage graph (datahub_lineage.py, read through
+views): a table runs one wave after the latest selected table it reads. Tables in
+a wave run in parallel in a bounded process pool; a wave starts when the previous
+one has finished.
+
+Steps (--step):
+    offline  - Edit schema.yaml in place, no credentials needed:
+               fill missing descriptions from upstream columns the query passes
+               through (types inferred as in infer_schema.py), then apply base
+               schema descriptions (--use-dataset-schema / --use-global-schema,
+               bigquery_etl/schema/<dataset>.yaml and global.yaml, which overwrite
+               like `./bqetl query schema update` does). Tables without a
+               schema.yaml are skipped.
+    bqetl    - Run `<bqetl> query schema update <dataset>.<table>` with the same
+               base-schema flags. --bqetl names the command (default ./bqetl), so a
+               local stub script can stand in for it in tests.
+
+Usage:
+    python scripts/run_schema_updates.py <dataset | dataset.table>... [options]
+
+Examples:
+    # Apply global descriptions to a dataset offline, upstream tables first
+    python scripts/run_schema_updates.py telemetry_derived --use-global-schema
+
+    # Show the waves only
+    python scripts/run_schema_updates.py telemetry_derived search_derived --dry-run
+
+    # Run bqetl for two datasets, 4 tables at a time, stopping after a failing wave
+    python scripts/run_schema_updates.py ads_derived --step bqetl --use-dataset-schema --use-global-schema \\
+        --jobs 4 --fail-fast
+
+    # With a stub instead of bqetl (prints its arguments, exits 0)
+    python scripts/run_schema_updates.py telemetry_derived --step bqetl --bqetl "python tests/fake_bqetl.py"
+"""
+
+import argparse
+import copy
+import json
+import os
+import shlex
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import yaml
+
+from datahub_lineage import DEFAULT_SQL_DIR, LineageGraph, build_lineage_graph, find_lineage_files
+from infer_schema import SchemaInference
+from preview_base_schema import find_field_in_base_schema, load_schema_file
+from validate_schema_sync import DEFAULT_PROJECT, clean_sql
+
+
+DEFAULT_BQETL = "./bqetl"
+DEFAULT_BASE_SCHEMAS_DIR = "bigquery_etl/schema"
+DEFAULT_TIMEOUT_SECONDS = 600
+
+
+def select_tables(targets: List[str], sql_dir: str = DEFAULT_SQL_DIR) -> List[str]:
+    """Resolve datasets, dataset.table and project.dataset.table (glob patterns allowed) to tables with a query.sql."""
+    tables = []
+    for target in targets:
+        parts = target.split(".")
+        if len(parts) == 1:
+            pattern = f"*/{target}/*/query.sql"
+        elif len(parts) == 2:
+            pattern = f"*/{parts[0]}/{parts[1]}/query.sql"
+        else:
+            pattern = f"{parts[0]}/{parts[1]}/{parts[2]}/query.sql"
+        matches = sorted(".".join(p.parts[-4:-1]) for p in Path(sql_dir).glob(pattern))
+        if not matches:
+            print(f"Warning: No query.sql found for {target} under {sql_dir}", file=sys.stderr)
+        tables.extend(matches)
+    return list(dict.fromkeys(tables))
+
+
+def selected_upstreams(graph: LineageGraph, paths: Dict[str, Path], fqn: str, selected: set) -> List[str]:
+    """Selected tables a table reads, directly or through views."""
+    found, stack, seen = [], [fqn], {fqn}
+    while stack:
+        table = stack.pop()
+        if table not in graph:
+            continue
+        for node in graph.neighbors(graph.ids[table], "upstream"):
+            source = graph.names[node]
+            if source in seen:
+                continue
+            seen.add(source)
+            if source in selected:
+                found.append(source)
+            elif paths.get(source) is not None and paths[source].name == "view.sql":
+                stack.append(source)
+    return found
+
+
+def dependency_waves(tables: List[str], graph: LineageGraph, paths: Dict[str, Path]) -> List[List[str]]:
+    """
+    Group tables into topological waves.
+
+    Tables in a cycle (or reading themselves through one) are placed in a final
+    wave with a warning.
+    """
+    selected = set(tables)
+    pending = {table: set(selected_upstreams(graph, paths, table, selected)) - {table} for table in tables}
+    waves = []
+    while pending:
+        wave = sorted(table for table, upstreams in pending.items() if not upstreams)
+        if not wave:
+            cycle = sorted(pending)
+            print(f"Warning: Lineage cycle; updated last, in one wave: {', '.join(cycle)}", file=sys.stderr)
+            waves.append(cycle)
+            break
+        waves.append(wave)
+        for table in wave:
+            del pending[table]
+        for upstreams in pending.values():
+            upstreams.difference_update(wave)
+    return waves
+
+
+def fill_descriptions(fields: List[Dict], inferred: Optional[List[Dict]]) -> int:
+    """Copy descriptions from inferred fields (same name) into fields without one; returns the count."""
+    by_name = {str(f.get("name", "")).lower(): f for f in inferred or []}
+    filled = 0
+    for field in fields:
+        source = by_name.get(str(field.get("name", "")).lower())
+        if source is None:
+            continue
+        if not str(field.get("description") or "").strip() and source.get("description"):
+            field["description"] = source["description"]
+            filled += 1
+        if field.get("fields"):
+            filled += fill_descriptions(field["fields"], source.get("fields"))
+    return filled
+
+
+def apply_base_schemas(fields: List[Dict], base_schemas: List[Dict]) -> int:
+    """Set top-level descriptions from base schemas (first match wins, like bqetl); returns the count changed."""
+    changed = 0
+    for field in fields:
+        for base_schema in base_schemas:
+            base_field, _ = find_field_in_base_schema(field.get("name"), base_schema)
+            if base_field and base_field.get("description"):
+                description = base_field["description"].strip()
+                if field.get("description") != description:
+                    field["description"] = description
+                    changed += 1
+                break
+    return changed
+
+
+def load_base_schemas(dataset: str, use_dataset: bool, use_global: bool, base_schemas_dir: str) -> List[Dict]:
+    """Base schemas in priority order: <dataset>.yaml, then global.yaml."""
+    names = ([f"{dataset}.yaml"] if use_dataset else []) + (["global.yaml"] if use_global else [])
+    schemas = [load_schema_file(Path(base_schemas_dir) / name) for name in names]
+    return [schema for schema in schemas if schema]
+
+
+def offline_step(
+    fqn: str,
+    sql_dir: str = DEFAULT_SQL_DIR,
+    use_dataset: bool = False,
+    use_global: bool = False,
+    base_schemas_dir: str = DEFAULT_BASE_SCHEMAS_DIR,
+) -> Dict:
+    """Update one table's schema.yaml descriptions from upstream columns and base schemas."""
+    project, dataset, table = fqn.split(".")
+    table_dir = Path(sql_dir) / project / dataset / table
+    schema_path = table_dir / "schema.yaml"
+    if not schema_path.exists():
+        return {"table": fqn, "status": "skipped", "message": "no schema.yaml (create it with infer_schema.py or bqetl)"}
+
+    schema = load_schema_file(schema_path)
+    if not schema or not isinstance(schema.get("fields"), list):
+        return {"table": fqn, "status": "failed", "message": "schema.yaml has no fields list"}
+    fields = copy.deepcopy(schema["fields"])
+
+    try:
+        inferred, _ = SchemaInference(sql_dir, project).query_fields(clean_sql((table_dir / "query.sql").read_text(), sql_dir))
+    except Exception as e:
+        return {"table": fqn, "status": "failed", "message": f"could not read query: {e}"}
+    upstream = fill_descriptions(fields, inferred)
+    base = apply_base_schemas(fields, load_base_schemas(dataset, use_dataset, use_global, base_schemas_dir))
+
+    if fields == schema["fields"]:
+        return {"table": fqn, "status": "unchanged", "message": ""}
+    schema["fields"] = fields
+    schema_path.write_text(yaml.safe_dump(schema, sort_keys=False, default_flow_style=False, allow_unicode=True))
+    return {
+        "table": fqn,
+        "status": "updated",
+        "message": f"{upstream} description(s) from upstream, {base} from base schemas",
+    }
+
+
+def bqetl_step(
+    fqn: str,
+    sql_dir: str = DEFAULT_SQL_DIR,
+    use_dataset: bool = False,
+    use_global: bool = False,
+    bqetl: str = DEFAULT_BQETL,
+    timeout: int = DEFAULT_TIMEOUT_SECONDS,
+) -> Dict:
+    """Run `bqetl query schema update` for one table."""
+    project, dataset, table = fqn.split(".")
+    schema_path = Path(sql_dir) / project / dataset / table / "schema.yaml"
+    before = schema_path.read_bytes() if schema_path.exists() else None
+
+    command = shlex.split(bqetl) + ["query", "schema", "update", f"{dataset}.{table}"]
+    if project != DEFAULT_PROJECT:
+        command.append(f"--project_id={project}")
+    if use_dataset:
+        command.append("--use-dataset-schema")
+    if use_global:
+        command.append("--use-global-schema")
+
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return {"table": fqn, "status": "failed", "message": str(e)}
+    if result.returncode != 0:
+        lines = (result.stderr or result.stdout).strip().splitlines()
+        return {"table": fqn, "status": "failed", "message": lines[-1] if lines else f"exit code {result.returncode}"}
+
+    after = schema_path.read_bytes() if schema_path.exists() else None
+    return {"table": fqn, "status": "updated" if after != before else "unchanged", "message": ""}
+
+
+STEPS: Dict[str, Callable[..., Dict]] = {
+    "offline": offline_step,
+    "bqetl": bqetl_step,
+}
+
+
+def run_waves(
+    waves: List[List[str]],
+    step: Callable[[str], Dict],
+    jobs: Optional[int] = None,
+    fail_fast: bool = False,
+) -> List[List[Dict]]:
+    """Run step for every table, one wave at a time, tables of a wave in a process pool."""
+    jobs = jobs or os.cpu_count() or 1
+    results: List[List[Dict]] = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for wave in waves:
+            wave_results = list(executor.map(step, wave)) if jobs > 1 and len(wave) > 1 else list(map(step, wave))
+            results.append(wave_results)
+            if fail_fast and any(r["status"] == "failed" for r in wave_results):
+                print(f"Warning: Stopping after wave {len(results)} (--fail-fast)", file=sys.stderr)
+                break
+    return results
+
+
+def format_output(waves: List[List[str]], results: Optional[List[List[Dict]]], output_format: str = "text") -> str:
+    if output_format == "json":
+        return json.dumps({
+            "waves": [
+                {"wave": i + 1, "tables": results[i] if results and i < len(results) else [{"table": t} for t in wave]}
+                for i, wave in enumerate(waves)
+            ],
+        }, indent=2)
+
+    icons = {"updated": "✏️ ", "unchanged": "✓ ", "skipped": "⏭️ ", "failed": "❌"}
+    output = []
+    for i, wave in enumerate(waves):
+        output.append(f"Wave {i + 1} ({len(wave)} table(s))")
+        if results is None or i >= len(results):
+            output.extend(f"   • {table}" for table in wave)
+            if results is not None:
+                output.append("   (not run)")
+        else:
+            for result in results[i]:
+                message = f": {result['message']}" if result.get("message") else ""
+                output.append(f"   {icons.get(result['status'], '')} {result['table']} {result['status']}{message}")
+        output.append("")
+
+    if results is None:
+        output.append(f"{sum(len(w) for w in waves)} table(s) in {len(waves)} wave(s) (dry run)")
+    else:
+        flat = [r for wave in results for r in wave]
+        counts = {status: sum(1 for r in flat if r["status"] == status) for status in icons}
+        output.append(", ".join(f"{count} {status}" for status, count in counts.items() if count) or "nothing run")
+    return "\n".join(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run schema updates for many tables in dependency order, waves in parallel",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "targets",
+        nargs="+",
+        help="Datasets, dataset.table or project.dataset.table names (glob patterns allowed)"
+    )
+    parser.add_argument(
+        "--step",
+        choices=sorted(STEPS),
+        default="offline",
+        help="Per-table update step (default: offline)"
+    )
+    parser.add_argument(
+        "--use-global-schema",
+        action="store_true",
+        help="Apply descriptions from global.yaml"
+    )
+    parser.add_argument(
+        "--use-dataset-schema",
+        action="store_true",
+        help="Apply descriptions from <dataset>.yaml (takes priority over global.yaml)"
+    )
+    parser.add_argument(
+        "--base-schemas-dir",
+        default=DEFAULT_BASE_SCHEMAS_DIR,
+        help=f"Directory with base schemas, offline step (default: {DEFAULT_BASE_SCHEMAS_DIR})"
+    )
+    parser.add_argument(
+        "--bqetl",
+        default=DEFAULT_BQETL,
+        help=f"bqetl command for the bqetl step, e.g. a stub script in tests (default: {DEFAULT_BQETL})"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=int,
+        default=DEFAULT_TIMEOUT_SECONDS,
+        help=f"Seconds before a bqetl call is abandoned (default: {DEFAULT_TIMEOUT_SECONDS})"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Root of the bigquery-etl sql/ tree (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Maximum tables updated at once within a wave (default: CPU count)"
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Stop after the first wave with a failed table"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the waves without running anything"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "text"],
+        default="text",
+        help="Output format (default: text)"
+    )
+
+    args = parser.parse_args()
+
+    if not Path(args.sql_dir).exists():
+        print(f"Error: SQL directory not found: {args.sql_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        tables = select_tables(args.targets, args.sql_dir)
+        if not tables:
+            print("Error: No tables selected", file=sys.stderr)
+            sys.exit(1)
+        paths = dict(find_lineage_files(args.sql_dir))
+        waves = dependency_waves(tables, build_lineage_graph(args.sql_dir), paths)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    results = None
+    if not args.dry_run:
+        options = {"sql_dir": args.sql_dir, "use_dataset": args.use_dataset_schema, "use_global": args.use_global_schema}
+        if args.step == "offline":
+            options["base_schemas_dir"] = args.base_schemas_dir
+        else:
+            options.update(bqetl=args.bqetl, timeout=args.timeout)
+        results = run_waves(waves, partial(STEPS[args.step], **options), args.jobs, args.fail_fast)
+
+    print(format_output(waves, results, args.format))
+    failed = results is not None and any(r["status"] == "failed" for wave in results for r in wave)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
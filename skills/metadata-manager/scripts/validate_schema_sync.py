@@ -0,0 +1,607 @@
+#!/usr/bin/env python3
+"""
+Schema Sync Validator
+
+Checks offline that each query.sql's output columns match its schema.yaml, so
+drift is caught locally instead of in a BigQuery dry run or on deploy.
+
+The top-level output column names are parsed from the final SELECT of the query
+(after any WITH clause, first branch of a UNION): `expr AS name`, bare or dotted
+columns (`t.client_info.client_id` -> client_id) and implicit aliases. `*`,
+`<alias>.*`, `* EXCEPT (...)` and `* REPLACE (...)` are expanded from CTEs,
+subqueries, and the schema.yaml (or view.sql) of referenced tables in the sql/ tree.
+
+Reported per query:
+    error    - output column missing from schema.yaml, schema.yaml field the query
+               no longer produces, unnamed expression (BigQuery would call it f0_),
+               duplicate output name
+    warning  - same columns in a different order, fields (nested included) without
+               a description (unless metadata.yaml sets
+               `require_column_descriptions: false`), no schema.yaml, or a `*` that cannot be expanded
+               offline (column checks are skipped for that query)
+
+Only top-level names are compared; types and nested STRUCT fields still need
+`./bqetl query schema update`. Names are compared case-insensitively. Queries
+with Jinja control flow ({% if %}) are parsed as rendered for a scheduled run
+(render_jinja.py, is_init() false); other branches may differ, so their column
+findings are downgraded to warnings.
+
+Usage:
+    python scripts/validate_schema_sync.py <dataset | dataset.table | path>... [options]
+
+Examples:
+    # One table
+    python scripts/validate_schema_sync.py telemetry_derived.clients_daily_v1
+
+    # A whole dataset, in parallel
+    python scripts/validate_schema_sync.py telemetry_derived
+
+    # Every query under a directory, failing on warnings too, as JSON
+    python scripts/validate_schema_sync.py sql/moz-fx-data-shared-prod/search_derived --strict --format json
+
+Exit code is 1 if any error (or, with --strict, any warning) is reported.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(SKILLS_DIR / "glean-description-lookup" / "scripts"))
+from extract_query_fields import strip_comments, strip_jinja, strip_string_literals  # noqa: E402
+from render_jinja import render_sql  # noqa: E402
+
+
+DEFAULT_SQL_DIR = "sql"
+DEFAULT_PROJECT = "moz-fx-data-shared-prod"
+PARALLEL_THRESHOLD = 50
+MAX_EXPANSION_DEPTH = 8
+MAX_LISTED_FIELDS = 10
+
+_CLAUSE_RE = re.compile(
+    r"\b(?:FROM|WHERE|GROUP\s+BY|HAVING|QUALIFY|WINDOW|ORDER\s+BY|LIMIT|UNION|INTERSECT|EXCEPT\s+DISTINCT)\b",
+    re.IGNORECASE,
+)
+_JOIN_RE = re.compile(r"\b(?:(?:LEFT|RIGHT|FULL|INNER|CROSS)\s+)?(?:OUTER\s+)?JOIN\b|,", re.IGNORECASE)
+STAR_RE = re.compile(
+    r"(?:(?P<qualifier>[\w`.\-]+)\.)?\*(?:\s+EXCEPT\s*\((?P<except>[^)]*)\))?(?:\s+REPLACE\s*\(.*\))?",
+    re.IGNORECASE | re.DOTALL,
+)
+# Words that end an expression without being an implicit alias
+_NOT_ALIASES = {
+    "end", "null", "true", "false", "asc", "desc", "day", "hour", "minute", "second",
+    "week", "month", "quarter", "year", "date", "timestamp", "datetime", "time", "distinct",
+}
+# Words after which a trailing identifier is an operand, not an implicit alias
+_OPERATORS = {"not", "and", "or", "is", "in", "like", "when", "then", "else", "interval", "by", "distinct", "select"}
+
+
+def mask_depths(sql: str) -> List[int]:
+    """Nesting depth of each character: (), [] and STRUCT<...>/ARRAY<...> type parameters."""
+    depths, stack = [], []
+    for i, char in enumerate(sql):
+        if char in "([" or (char == "<" and re.search(r"\b(?:STRUCT|ARRAY)\s*$", sql[max(0, i - 7):i], re.IGNORECASE)):
+            depths.append(len(stack))
+            stack.append(char)
+            continue
+        if stack and (char in ")]" or (char == ">" and stack[-1] == "<")):
+            stack.pop()
+        depths.append(len(stack))
+    return depths
+
+
+def find_top_level(pattern: re.Pattern, sql: str, start: int = 0, depths: Optional[List[int]] = None):
+    """First match of pattern at nesting depth 0, from start."""
+    depths = depths or mask_depths(sql)
+    for match in pattern.finditer(sql, start):
+        if depths[match.start()] == 0:
+            return match
+    return None
+
+
+def split_top_level(sql: str, pattern: re.Pattern = re.compile(",")) -> List[str]:
+    """Split on pattern matches at nesting depth 0."""
+    depths = mask_depths(sql)
+    parts, last = [], 0
+    for match in pattern.finditer(sql):
+        if depths[match.start()] == 0:
+            parts.append(sql[last:match.start()])
+            last = match.end()
+    parts.append(sql[last:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def closing_paren(sql: str, open_index: int) -> int:
+    """Index of the parenthesis closing the one at open_index (len(sql) if unbalanced)."""
+    level = 0
+    for i in range(open_index, len(sql)):
+        if sql[i] == "(":
+            level += 1
+        elif sql[i] == ")":
+            level -= 1
+            if level == 0:
+                return i
+    return len(sql)
+
+
+def clean_sql(raw_sql: str, sql_dir: str = DEFAULT_SQL_DIR) -> str:
+    """Jinja rendered, comments and string literal contents removed; the statement that produces the output."""
+    sql = strip_string_literals(strip_jinja(strip_comments(render_sql(raw_sql, sql_dir))))
+    sql = re.sub(r'"[^"]*"', "''", sql)
+    # Temporary functions and DECLAREs come first; the query is the last statement with a SELECT
+    statements = [s for s in split_top_level(sql, re.compile(";")) if re.search(r"\bSELECT\b", s, re.IGNORECASE)]
+    return statements[-1] if statements else ""
+
+
+def split_with(sql: str) -> Tuple[Dict[str, str], str]:
+    """Split a query into its CTEs (lowercased name -> body) and the main query expression."""
+    match = re.match(r"\s*WITH\s+(?:RECURSIVE\s+)?", sql, re.IGNORECASE)
+    if not match:
+        return {}, sql
+    ctes, position = {}, match.end()
+    cte_re = re.compile(r"\s*`?(\w+)`?\s+AS\s*\(", re.IGNORECASE)
+    while True:
+        cte = cte_re.match(sql, position)
+        if not cte:
+            break
+        close = closing_paren(sql, cte.end() - 1)
+        ctes[cte.group(1).lower()] = sql[cte.end():close]
+        position = close + 1
+        comma = re.match(r"\s*,", sql[position:])
+        if not comma:
+            break
+        position += comma.end()
+    return ctes, sql[position:]
+
+
+def column_name(item: str) -> Optional[str]:
+    """Output name of a select-list item (None if BigQuery would generate one)."""
+    alias = re.search(r"\bAS\s+`?([A-Za-z_]\w*)`?\s*$", item, re.IGNORECASE)
+    if alias:
+        return alias.group(1)
+    path = re.fullmatch(r"[\w`.]+", item)
+    if path and not item[0].isdigit():
+        return item.replace("`", "").split(".")[-1]
+    implicit = re.search(r"(\w*)[)\]`]?\s+`?([A-Za-z_]\w*)`?\s*$", item)
+    if (
+        implicit
+        and item[:implicit.start(2)].rstrip()[-1:] not in "+-*/<>=|&^~,("
+        and implicit.group(1).lower() not in _OPERATORS
+        and implicit.group(2).lower() not in _NOT_ALIASES
+    ):
+        return implicit.group(2)
+    return None
+
+
+def parse_from(from_sql: str) -> List[Dict]:
+    """
+    Split a FROM clause into its items.
+
+    Returns:
+        Dicts with kind (table, subquery or unnest), source (table name, subquery
+        SQL or UNNEST argument), lowercased alias and lowercased USING columns
+    """
+    items = []
+    for piece in split_top_level(from_sql, _JOIN_RE):
+        using: List[str] = []
+        condition = find_top_level(re.compile(r"\b(?:ON|USING)\b", re.IGNORECASE), piece)
+        if condition:
+            if condition.group().upper() == "USING":
+                using = [u.replace("`", "").lower() for u in re.findall(r"[\w`]+", piece[condition.end():])]
+            piece = piece[:condition.start()].strip()
+
+        if piece.startswith("("):
+            close = closing_paren(piece, 0)
+            kind, source, name, rest = "subquery", piece[1:close], None, piece[close + 1:]
+        elif re.match(r"UNNEST\s*\(", piece, re.IGNORECASE):
+            open_index = piece.index("(")
+            close = closing_paren(piece, open_index)
+            kind, source, name, rest = "unnest", piece[open_index + 1:close].strip(), None, piece[close + 1:]
+        else:
+            table = re.match(r"[\w`.\-]+", piece)
+            if not table:
+                continue
+            kind, name, rest = "table", table.group().replace("`", ""), piece[table.end():]
+            source = name
+        alias = re.match(r"\s*(?:AS\s+)?`?([A-Za-z_]\w*)`?", rest, re.IGNORECASE)
+        items.append({
+            "kind": kind,
+            "source": source,
+            "alias": (alias.group(1) if alias else name.split(".")[-1] if name else "").lower(),
+            "using": using,
+        })
+    return items
+
+
+def parse_select(sql: str, outer_ctes: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+    """
+    Split a query expression into the parts that determine its output.
+
+    The first SELECT at the top level is used (the first branch of a UNION names
+    the columns); CTEs of enclosing queries are visible through outer_ctes.
+
+    Returns:
+        Dict with ctes (lowercased name -> body), select (select-list items),
+        as_struct (SELECT AS STRUCT) and from (parse_from items), or None if
+        there is no SELECT
+    """
+    ctes, body = split_with(sql)
+    ctes = {**(outer_ctes or {}), **ctes}
+    body = body.strip()
+    if body.startswith("("):
+        # (SELECT ...) UNION ALL (SELECT ...): the first branch names the columns
+        return parse_select(body[1:closing_paren(body, 0)], ctes)
+
+    depths = mask_depths(body)
+    select = find_top_level(re.compile(r"\bSELECT\b", re.IGNORECASE), body, 0, depths)
+    if not select:
+        return None
+    modifiers = re.match(r"\s*(?:(?:DISTINCT|ALL)\b\s*)?(AS\s+(?:STRUCT|VALUE)\b)?", body[select.end():], re.IGNORECASE)
+    start = select.end() + modifiers.end()
+    clause = find_top_level(_CLAUSE_RE, body, start, depths)
+
+    from_items: List[Dict] = []
+    if clause and clause.group().upper() == "FROM":
+        end = find_top_level(_CLAUSE_RE, body, clause.end(), depths)
+        from_items = parse_from(body[clause.end():end.start() if end else len(body)])
+    return {
+        "ctes": ctes,
+        "select": split_top_level(body[start:clause.start() if clause else len(body)]),
+        "as_struct": bool(modifiers.group(1)) and "STRUCT" in modifiers.group(1).upper(),
+        "from": from_items,
+    }
+
+
+def star_entries(items: List[Dict], key: str, name: Callable[[Any], str] = str) -> Optional[List]:
+    """
+    Concatenate the key lists of FROM items for a `*`, or None if one is unknown.
+
+    A JOIN ... USING column is kept once: the right-hand item (which holds the
+    USING list) skips it when an earlier item already produced it.
+    """
+    entries, emitted = [], set()
+    for item in items:
+        if item[key] is None:
+            return None
+        for entry in item[key]:
+            lowered = name(entry).lower()
+            if lowered in item["using"] and lowered in emitted:
+                continue
+            emitted.add(lowered)
+            entries.append(entry)
+    return entries
+
+
+class SchemaResolver:
+    """Expands select lists against CTEs, subqueries and tables in the sql/ tree."""
+
+    def __init__(self, sql_dir: str, project: str):
+        self.sql_dir = Path(sql_dir)
+        self.project = project
+        self._tables: Dict[str, Optional[List[str]]] = {}
+
+    def table_columns(self, reference: str, depth: int) -> Optional[List[str]]:
+        """Column names of a table from its schema.yaml, or a view from its view.sql."""
+        parts = reference.replace("`", "").split(".")
+        if len(parts) == 2:
+            parts = [self.project] + parts
+        if len(parts) != 3:
+            return None
+        fqn = ".".join(parts)
+        if fqn not in self._tables:
+            self._tables[fqn] = None  # guards against cycles
+            table_dir = self.sql_dir.joinpath(*parts)
+            columns = None
+            if (table_dir / "schema.yaml").exists():
+                fields = read_schema_fields(table_dir / "schema.yaml")
+                columns = [field.get("name") for field in fields] if fields else None
+            elif (table_dir / "view.sql").exists() and depth < MAX_EXPANSION_DEPTH:
+                columns, _ = self.query_columns(clean_sql((table_dir / "view.sql").read_text(), str(self.sql_dir)), depth + 1)
+            self._tables[fqn] = columns
+        return self._tables[fqn]
+
+    def from_items(self, parsed: List[Dict], ctes: Dict[str, str], depth: int) -> List[Dict]:
+        """parse_from items with their output columns (None if unknown)."""
+        items = []
+        for item in parsed:
+            columns = None
+            if item["kind"] == "subquery":
+                columns, _ = self.query_columns(item["source"], depth + 1, ctes)
+            elif item["kind"] == "table":
+                if item["source"].lower() in ctes and depth < MAX_EXPANSION_DEPTH:
+                    columns, _ = self.query_columns(ctes[item["source"].lower()], depth + 1, ctes)
+                else:
+                    columns = self.table_columns(item["source"], depth)
+            items.append({**item, "columns": columns})
+        return items
+
+    def expand_star(self, match: re.Match, items: List[Dict]) -> Optional[List[str]]:
+        """Columns selected by `*` or `<alias>.*`, minus EXCEPT columns."""
+        qualifier = (match.group("qualifier") or "").replace("`", "").lower()
+        if qualifier:
+            selected = [item for item in items if item["alias"] == qualifier.split(".")[-1]]
+            if not selected:
+                return None
+        else:
+            selected = items
+        columns = star_entries(selected, "columns")
+        if columns is None:
+            return None
+        excluded = {c.strip().replace("`", "").lower() for c in (match.group("except") or "").split(",")}
+        return [c for c in columns if c.lower() not in excluded]
+
+    def query_columns(
+        self, sql: str, depth: int = 0, outer_ctes: Optional[Dict[str, str]] = None
+    ) -> Tuple[Optional[List[str]], List[str]]:
+        """
+        Output column names of a query expression.
+
+        Returns:
+            (column names, or None when a `*` cannot be expanded; select-list
+            items BigQuery would name itself)
+        """
+        query = parse_select(sql, outer_ctes)
+        if query is None:
+            return None, []
+        items = self.from_items(query["from"], query["ctes"], depth)
+
+        columns: Optional[List[str]] = []
+        unnamed = []
+        for item in query["select"]:
+            star = STAR_RE.fullmatch(item)
+            if star:
+                expanded = self.expand_star(star, items)
+                if expanded is None or columns is None:
+                    columns = None
+                else:
+                    columns.extend(expanded)
+                continue
+            name = column_name(item)
+            if name is None:
+                unnamed.append(" ".join(item.split())[:60])
+            elif columns is not None:
+                columns.append(name)
+        return columns, unnamed
+
+
+def read_schema_fields(schema_path: Path) -> Optional[List[Dict]]:
+    try:
+        with open(schema_path) as f:
+            return (yaml.safe_load(f) or {}).get("fields") or []
+    except Exception as e:
+        print(f"Warning: Could not parse {schema_path}: {e}", file=sys.stderr)
+        return None
+
+
+def read_metadata(metadata_path: Path) -> Dict:
+    if not metadata_path.exists():
+        return {}
+    try:
+        with open(metadata_path) as f:
+            return yaml.safe_load(f) or {}
+    except Exception as e:
+        print(f"Warning: Could not parse {metadata_path}: {e}", file=sys.stderr)
+        return {}
+
+
+def fields_without_description(fields: List[Dict], prefix: str = "") -> List[str]:
+    """Dotted paths of fields (nested included) with no or an empty description."""
+    missing = []
+    for field in fields:
+        path = f"{prefix}{field.get('name')}"
+        if not str(field.get("description") or "").strip():
+            missing.append(path)
+        missing.extend(fields_without_description(field.get("fields") or [], f"{path}."))
+    return missing
+
+
+def listed(names: List[str]) -> str:
+    shown = ", ".join(names[:MAX_LISTED_FIELDS])
+    return shown + (f" (+{len(names) - MAX_LISTED_FIELDS} more)" if len(names) > MAX_LISTED_FIELDS else "")
+
+
+def validate_query(query_path: str, sql_dir: str = DEFAULT_SQL_DIR, check_descriptions: bool = True) -> Dict:
+    """
+    Compare one query.sql's output columns with the schema.yaml next to it.
+
+    Returns:
+        Dict with file, table, query_columns, schema_columns and findings
+        (severity, check, message)
+    """
+    path = Path(query_path)
+    parts = path.parts
+    project = parts[-4] if len(parts) >= 4 else DEFAULT_PROJECT
+    result = {
+        "file": query_path,
+        "table": ".".join(parts[-4:-1]),
+        "query_columns": None,
+        "schema_columns": None,
+        "findings": [],
+    }
+
+    def report(severity: str, check: str, message: str) -> None:
+        result["findings"].append({"severity": severity, "check": check, "message": message})
+
+    try:
+        raw_sql = path.read_text()
+    except OSError as e:
+        report("error", "read", f"could not read query: {e}")
+        return result
+
+    schema_path = path.parent / "schema.yaml"
+    if not schema_path.exists():
+        report("warning", "no-schema", "no schema.yaml; run ./bqetl query schema update")
+        return result
+    fields = read_schema_fields(schema_path)
+    if fields is None:
+        report("error", "read", "schema.yaml could not be parsed")
+        return result
+    schema_columns = [str(field.get("name")) for field in fields]
+    result["schema_columns"] = schema_columns
+
+    if check_descriptions and read_metadata(path.parent / "metadata.yaml").get("require_column_descriptions", True):
+        undocumented = fields_without_description(fields)
+        if undocumented:
+            report("warning", "description", f"{len(undocumented)} field(s) without description: {listed(undocumented)}")
+
+    columns, unnamed = SchemaResolver(sql_dir, project).query_columns(clean_sql(raw_sql, sql_dir))
+    result["query_columns"] = columns
+    column_severity = "warning" if "{%" in raw_sql else "error"
+
+    for expression in unnamed:
+        report(column_severity, "unnamed", f"output expression has no name (add AS <name>): {expression}")
+    if columns is None:
+        report("warning", "unresolved", "SELECT * could not be expanded from local schemas; column checks skipped")
+        return result
+
+    lowered = [c.lower() for c in columns]
+    duplicates = sorted({c for c in lowered if lowered.count(c) > 1})
+    if duplicates:
+        report(column_severity, "duplicate", f"duplicate output column(s): {listed(duplicates)}")
+
+    schema_lowered = [c.lower() for c in schema_columns]
+    missing = [c for c in columns if c.lower() not in schema_lowered]
+    extra = [c for c in schema_columns if c.lower() not in lowered]
+    if missing:
+        report(column_severity, "missing", f"output column(s) not in schema.yaml: {listed(missing)}")
+    if extra:
+        report(column_severity, "extra", f"schema.yaml field(s) the query does not produce: {listed(extra)}")
+
+    query_order = [c for c in dict.fromkeys(lowered) if c in schema_lowered]
+    schema_order = [c for c in dict.fromkeys(schema_lowered) if c in query_order]
+    if query_order != schema_order:
+        position = next(i for i, (a, b) in enumerate(zip(query_order, schema_order)) if a != b)
+        report(
+            "warning", "order",
+            f"column order differs from schema.yaml at position {position + 1}: "
+            f"query has {query_order[position]}, schema.yaml has {schema_order[position]}",
+        )
+    return result
+
+
+def find_queries(targets: List[str], sql_dir: str = DEFAULT_SQL_DIR) -> List[str]:
+    """Resolve paths, datasets and dataset.table names to query.sql files."""
+    queries = []
+    for target in targets:
+        path = Path(target)
+        if path.is_dir():
+            queries.extend(str(p) for p in sorted(path.rglob("query.sql")))
+        elif path.is_file():
+            queries.append(target)
+        else:
+            pattern = f"*/{target.replace('.', '/')}/query.sql" if "." in target else f"*/{target}/*/query.sql"
+            matches = sorted(str(p) for p in Path(sql_dir).glob(pattern))
+            if not matches:
+                print(f"Warning: No query.sql found for {target} under {sql_dir}", file=sys.stderr)
+            queries.extend(matches)
+    return list(dict.fromkeys(queries))
+
+
+def validate_queries(
+    queries: List[str],
+    sql_dir: str = DEFAULT_SQL_DIR,
+    check_descriptions: bool = True,
+    jobs: Optional[int] = None,
+) -> List[Dict]:
+    """Validate query.sql files, in a process pool for large batches."""
+    validate = partial(validate_query, sql_dir=sql_dir, check_descriptions=check_descriptions)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(queries) < PARALLEL_THRESHOLD:
+        return list(map(validate, queries))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        chunksize = max(1, len(queries) // (jobs * 4))
+        return list(executor.map(validate, queries, chunksize=chunksize))
+
+
+def format_output(results: List[Dict], output_format: str = "text") -> str:
+    findings = [f for r in results for f in r["findings"]]
+    errors = sum(1 for f in findings if f["severity"] == "error")
+    in_sync = sum(1 for r in results if not r["findings"])
+
+    if output_format == "json":
+        return json.dumps({
+            "queries_checked": len(results),
+            "in_sync": in_sync,
+            "errors": errors,
+            "warnings": len(findings) - errors,
+            "results": [r for r in results if r["findings"]],
+        }, indent=2)
+
+    output = [
+        f"{r['file']}: {f['severity']}: {f['message']} [{f['check']}]"
+        for r in results for f in r["findings"]
+    ]
+    output.append("")
+    output.append(
+        f"{errors} error(s), {len(findings) - errors} warning(s); "
+        f"{in_sync} of {len(results)} queries in sync with schema.yaml"
+    )
+    return "\n".join(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check offline that query.sql output columns match schema.yaml",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "targets",
+        nargs="+",
+        help="Datasets, dataset.table names, query.sql files or directories"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Root of the bigquery-etl sql/ tree (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--no-descriptions",
+        action="store_true",
+        help="Skip the missing-description check"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of worker processes for large batches (default: CPU count)"
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Exit non-zero on warnings as well as errors"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "text"],
+        default="text",
+        help="Output format (default: text)"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        queries = find_queries(args.targets, args.sql_dir)
+        if not queries:
+            print("Error: No query.sql files to check", file=sys.stderr)
+            sys.exit(2)
+        results = validate_queries(queries, args.sql_dir, not args.no_descriptions, args.jobs)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    print(format_output(results, args.format))
+    findings = [f for r in results for f in r["findings"]]
+    failing = findings if args.strict else [f for f in findings if f["severity"] == "error"]
+    sys.exit(1 if failing else 0)
+
+
+if __name__ == "__main__":
+    main()
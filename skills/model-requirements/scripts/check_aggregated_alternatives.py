@@ -18,20 +18,115 @@ Examples:
     # With project
     python check_aggregated_alternatives.py moz-fx-data-shared-prod.telemetry_live.main_v5
 
+    # Point at a bigquery-etl checkout when not running from its root
+    python check_aggregated_alternatives.py telemetry_stable.main_v4 --sql-dir ~/bigquery-etl/sql
+
+    # Check the raw sources of a query, with column coverage of each alternative
+    python check_aggregated_alternatives.py --query sql/moz-fx-data-shared-prod/my_derived/my_table_v1/query.sql
+
+    # Rank alternatives by estimated bytes scanned per day from a table-stats export
+    python check_aggregated_alternatives.py --query path/to/query.sql --stats table_stats.csv
+
+    # Lint every _derived query.sql under a path for _live/_stable reads
+    python check_aggregated_alternatives.py --lint sql/ --format sarif > raw-table-reads.sarif
+
+    # Lint only queries changed since a git ref, ignoring allowlisted reads
+    python check_aggregated_alternatives.py --lint sql/ --changed-since origin/main --allowlist .raw_table_allowlist
+
 Output:
     - Flags tables that are _live or _stable
-    - Suggests known aggregated alternatives
+    - Suggests aggregated alternatives, ranked by how many queries consume them
     - Provides DataHub lineage query parameters for finding alternatives
+
+Alternatives come from a reverse-dependency index built from every _derived
+query.sql / view.sql in the sql tree: each _derived table that reads a _live or
+_stable table is an alternative to it. The index is cached on disk and rebuilt when
+the sql tree changes, so each lookup is a dictionary hit. Without a sql tree the
+hand-curated KNOWN_ALTERNATIVES below are used, unverified.
+
+With --query, the _live/_stable sources of the query are checked and every
+alternative is scored by column coverage: the share of the columns the query reads
+from the raw source that exist in the alternative's schema.yaml. A column also counts
+as covered when the alternative has a top-level column with the same leaf name
+(e.g. client_info.client_id -> client_id); those matches are listed as renamed.
+
+Cost ranking (--stats PATH) reads a local table-statistics snapshot, JSON or CSV,
+e.g. an export of INFORMATION_SCHEMA.PARTITIONS or INFORMATION_SCHEMA.TABLE_STORAGE.
+One row per table or per partition; recognised columns:
+    table | table_id | project,dataset,table | table_catalog,table_schema,table_name
+    row_count | rows | total_rows
+    bytes | size_bytes | total_logical_bytes | logical_bytes
+    partitions | partition_count          (or one row per partition_id)
+JSON may also be an object keyed by table, and may give per-column bytes as
+"column_bytes": {"<column>": <bytes>}. Bytes scanned per day are estimated as the
+table's bytes per partition (the whole table if unpartitioned) times the share of
+the row width taken by the referenced columns, using schema.yaml types when no
+per-column bytes are given. Alternatives that cover every column the query reads
+are ranked cheapest first, ahead of those that do not.
+
+Lint mode (--lint PATH) scans every query.sql of a _derived dataset under PATH in a
+process pool and reports each FROM/JOIN of a _live/_stable table with its line and
+column, as text, JSON or SARIF. Allowlist file format, one entry per line (fnmatch
+patterns, # comments):
+    my_derived.first_layer_v1                          # any raw read by this query
+    my_derived.other_v1:telemetry_stable.main_v5       # one specific raw read
 """
 
 import argparse
+import csv
+import fnmatch
 import json
+import os
+import subprocess
 import sys
 import re
-from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import yaml
+
+# Reuse the SQL parser from glean-description-lookup and the lineage graph from metadata-manager
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(SKILLS_DIR / "glean-description-lookup" / "scripts"))
+sys.path.insert(0, str(SKILLS_DIR / "metadata-manager" / "scripts"))
+from datahub_lineage import (  # noqa: E402
+    DEFAULT_CACHE_DIR,
+    build_lineage_graph,
+    lineage_tree_signature,
+    read_lineage_sql,
+)
+from extract_query_fields import (  # noqa: E402
+    extract_column_references,
+    extract_source_tables,
+    strip_comments,
+    strip_jinja,
+    strip_string_literals,
+)
+from render_jinja import render_sql  # noqa: E402
+
+
+DEFAULT_SQL_DIR = "sql"
+DEFAULT_INDEX_PATH = DEFAULT_CACHE_DIR / "aggregated_alternatives_index.json"
+DEFAULT_MAX_ALTERNATIVES = 5
+INDEX_VERSION = 2
 
+# Approximate bytes per value used to weigh columns when the stats have no per-column sizes
+TYPE_BYTES = {
+    "INTEGER": 8, "INT64": 8, "FLOAT": 8, "FLOAT64": 8, "NUMERIC": 16, "BIGNUMERIC": 32,
+    "BOOLEAN": 1, "BOOL": 1, "DATE": 8, "DATETIME": 8, "TIME": 8, "TIMESTAMP": 8,
+    "STRING": 20, "BYTES": 20, "GEOGRAPHY": 32, "JSON": 64,
+}
+DEFAULT_TYPE_BYTES = 20
+REPEATED_FACTOR = 4
+
+LINT_RULE_ID = "raw-table-read"
+_TABLE_REF_RE = re.compile(r"\b(?:FROM|JOIN)\s+([`a-zA-Z0-9_\-][`a-zA-Z0-9_\-\.]*)", re.IGNORECASE)
+_NOISE_RE = re.compile(r"--[^\n]*|/\*.*?\*/|\{#.*?#\}|\{%.*?%\}|\{\{.*?\}\}|'[^']*'", re.DOTALL)
 
-# Known mappings of _live/_stable tables to better alternatives
+
+# Hand-curated mappings of _live/_stable tables to better alternatives.
+# Used for descriptions, and as the only source when no sql directory is available.
 KNOWN_ALTERNATIVES = {
     # Firefox Desktop - Main Ping
     "telemetry_live.main_v5": [
@@ -174,6 +269,667 @@ def get_known_alternatives(short_name: str, table_info: Dict[str, str]) -> List[
     return []
 
 
+def describe_table(sql_dir: str, fqn: str) -> str:
+    """Return a one-line description of a table from its metadata.yaml."""
+    project, dataset, table = fqn.split(".")
+    metadata_path = Path(sql_dir) / project / dataset / table / "metadata.yaml"
+    if not metadata_path.exists():
+        return ""
+    try:
+        with open(metadata_path) as f:
+            metadata = yaml.safe_load(f) or {}
+    except Exception as e:
+        print(f"Warning: Could not parse {metadata_path}: {e}", file=sys.stderr)
+        return ""
+
+    description = " ".join(str(metadata.get("description") or "").split())
+    if description:
+        first_sentence = description.split(". ")[0].rstrip(".")
+        return first_sentence[:120]
+    return str(metadata.get("friendly_name") or "")
+
+
+def build_alternatives_index(sql_dir: str = DEFAULT_SQL_DIR) -> Dict[str, List[Dict]]:
+    """
+    Build the reverse-dependency index from _live/_stable tables to _derived readers.
+
+    Returns:
+        Mapping of raw table fqn to alternatives, each a dict with table
+        (dataset.table), fqn, consumers (number of local queries/views reading
+        the alternative) and description, sorted by consumers descending
+    """
+    graph = build_lineage_graph(sql_dir)
+    index: Dict[str, List[Dict]] = {}
+    descriptions: Dict[str, str] = {}
+
+    for node_id in sorted(graph.defined):
+        fqn = graph.names[node_id]
+        _, dataset, table = fqn.split(".")
+        if not dataset.endswith("_derived"):
+            continue
+
+        for source_id in graph.neighbors(node_id, "upstream"):
+            source = graph.names[source_id]
+            source_parts = source.split(".")
+            if not is_raw_table(source_parts[1], source_parts[2])[0]:
+                continue
+
+            if fqn not in descriptions:
+                descriptions[fqn] = describe_table(sql_dir, fqn)
+            index.setdefault(source, []).append({
+                "table": f"{dataset}.{table}",
+                "fqn": fqn,
+                "consumers": len(graph.neighbors(node_id, "downstream")),
+                "description": descriptions[fqn],
+            })
+
+    for alternatives in index.values():
+        alternatives.sort(key=lambda alt: (-alt["consumers"], alt["table"]))
+
+    return index
+
+
+def load_alternatives_index(
+    sql_dir: str = DEFAULT_SQL_DIR,
+    index_path: Path = DEFAULT_INDEX_PATH,
+    rebuild: bool = False,
+) -> Dict[str, List[Dict]]:
+    """Load the cached alternatives index, rebuilding it if the sql tree changed."""
+    signature = lineage_tree_signature(sql_dir)
+
+    if not rebuild and index_path.exists():
+        try:
+            with open(index_path) as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("signature") == signature:
+                return data["alternatives"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Rebuilding unreadable index {index_path}: {e}", file=sys.stderr)
+
+    alternatives = build_alternatives_index(sql_dir)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(index_path, "w") as f:
+        json.dump({"version": INDEX_VERSION, "signature": signature, "alternatives": alternatives}, f)
+    return alternatives
+
+
+def table_exists(sql_dir: str, fqn: str) -> bool:
+    """Check whether a table is defined in the local sql tree."""
+    project, dataset, table = fqn.split(".")
+    table_dir = Path(sql_dir) / project / dataset / table
+    return any((table_dir / name).exists() for name in ("query.sql", "query.py", "view.sql", "metadata.yaml"))
+
+
+def get_alternatives(
+    table_info: Dict[str, str],
+    index: Optional[Dict[str, List[Dict]]],
+    sql_dir: str = DEFAULT_SQL_DIR,
+    max_alternatives: Optional[int] = DEFAULT_MAX_ALTERNATIVES,
+) -> List[Dict]:
+    """
+    Get ranked alternatives for a raw table (all of them when max_alternatives is None).
+
+    With an index, alternatives come from the local sql tree (a _live table also
+    gets the alternatives of its _stable counterpart), curated descriptions are
+    kept for tables that exist, and curated tables missing from the tree are
+    dropped. Without an index, the curated mapping is returned as-is.
+
+    Returns list of dicts with table, description, consumers (None if unknown)
+    and verified (whether the table was found in the sql tree)
+    """
+    curated = get_known_alternatives(table_info["short_name"], table_info)
+
+    if index is None:
+        return [
+            {"table": table, "description": description, "consumers": None, "verified": False}
+            for table, description in curated[:max_alternatives]
+        ]
+
+    keys = [table_info["full_name"]]
+    if table_info["dataset"].endswith("_live"):
+        stable_dataset = table_info["dataset"][: -len("_live")] + "_stable"
+        keys.append(f"{table_info['project']}.{stable_dataset}.{table_info['table']}")
+
+    alternatives: Dict[str, Dict] = {}
+    for key in keys:
+        for alt in index.get(key, []):
+            alternatives.setdefault(alt["table"], {
+                "table": alt["table"],
+                "description": alt["description"],
+                "consumers": alt["consumers"],
+                "verified": True,
+            })
+
+    for table, description in curated:
+        fqn = f"{table_info['project']}.{table}"
+        if table in alternatives:
+            alternatives[table]["description"] = description
+        elif table_exists(sql_dir, fqn):
+            alternatives[table] = {"table": table, "description": description, "consumers": 0, "verified": True}
+
+    ranked = sorted(alternatives.values(), key=lambda alt: (-alt["consumers"], alt["table"]))
+    return ranked[:max_alternatives]
+
+
+def load_table_schema(sql_dir: str, fqn: str) -> Optional[Dict]:
+    """Load a table's schema.yaml from the local sql tree."""
+    project, dataset, table = fqn.split(".")
+    schema_path = Path(sql_dir) / project / dataset / table / "schema.yaml"
+    if not schema_path.exists():
+        return None
+    try:
+        with open(schema_path) as f:
+            return yaml.safe_load(f) or {}
+    except Exception as e:
+        print(f"Warning: Could not parse {schema_path}: {e}", file=sys.stderr)
+        return None
+
+
+def flatten_schema_fields(fields: List[Dict], prefix: str = "") -> List[str]:
+    """Flatten nested schema.yaml fields into dotted column paths."""
+    names = []
+    for field in fields or []:
+        name = f"{prefix}.{field.get('name')}" if prefix else str(field.get("name"))
+        names.append(name)
+        names.extend(flatten_schema_fields(field.get("fields", []), name))
+    return names
+
+
+def read_query_sql(query_path: str, sql_dir: str = DEFAULT_SQL_DIR) -> str:
+    """Read a query.sql, render its Jinja and strip comments, leftover Jinja and string literals."""
+    return strip_string_literals(strip_jinja(strip_comments(render_sql(Path(query_path).read_text(), sql_dir))))
+
+
+def query_columns_by_source(sql: str, sources: List[str], sql_dir: str = DEFAULT_SQL_DIR) -> Dict[str, List[str]]:
+    """
+    Attribute the columns a query reads to its source tables.
+
+    Alias-qualified references go to their table. Unqualified references go to
+    every source; when a source's schema.yaml is available locally they are kept
+    only if the source actually has that column.
+
+    Returns:
+        Mapping of source table reference (as written in the query) to column paths
+    """
+    references = extract_column_references(sql)
+    columns: Dict[str, List[str]] = {}
+
+    for source in sources:
+        try:
+            fqn = parse_table_identifier(source)["full_name"]
+        except ValueError:
+            continue
+        schema = load_table_schema(sql_dir, fqn)
+        known = set(flatten_schema_fields(schema.get("fields", []))) if schema else None
+
+        selected = []
+        for qualifier, path in references:
+            if qualifier is not None:
+                if qualifier != source:
+                    continue
+            elif known is not None and path not in known:
+                continue
+            if path not in selected:
+                selected.append(path)
+
+        # Drop parents that only appear as a prefix of a deeper reference (e.g. `events`)
+        columns[source] = [
+            c for c in selected
+            if not any(other.startswith(c + ".") for other in selected)
+        ]
+
+    return columns
+
+
+def column_coverage(columns: List[str], schema: Optional[Dict]) -> Dict:
+    """
+    Score how well a table's schema covers the given columns.
+
+    Returns dict with percent (None without a schema.yaml), covered, renamed
+    (column -> matching top-level column) and missing
+    """
+    if schema is None:
+        return {"percent": None, "covered": [], "renamed": {}, "missing": list(columns)}
+
+    available = set(flatten_schema_fields(schema.get("fields", [])))
+    covered, renamed, missing = [], {}, []
+    for column in columns:
+        leaf = column.split(".")[-1]
+        if column in available:
+            covered.append(column)
+        elif leaf in available:
+            renamed[column] = leaf
+        else:
+            missing.append(column)
+
+    percent = 100.0 if not columns else round(100.0 * (len(covered) + len(renamed)) / len(columns), 1)
+    return {"percent": percent, "covered": covered, "renamed": renamed, "missing": missing}
+
+
+def query_descendants(query_path: str, sql_dir: str = DEFAULT_SQL_DIR) -> Set[str]:
+    """The fqn of the table a sql/<project>/<dataset>/<table>/query.sql writes, plus every table downstream of it."""
+    parts = Path(query_path).resolve().parts
+    if len(parts) < 4:
+        return set()
+    fqn = ".".join(parts[-4:-1])
+    descendants = {fqn}
+    if Path(sql_dir).exists():
+        graph = build_lineage_graph(sql_dir)
+        if fqn in graph:
+            descendants.update(name for name, _ in graph.bfs(fqn, "downstream", len(graph.names)))
+    return descendants
+
+
+def check_query(
+    query_path: str,
+    index: Optional[Dict[str, List[Dict]]] = None,
+    sql_dir: str = DEFAULT_SQL_DIR,
+    max_alternatives: int = DEFAULT_MAX_ALTERNATIVES,
+) -> List[Dict]:
+    """
+    Check every source table of a query, scoring alternatives by column coverage.
+
+    Returns one check_table result per source table; raw sources also get
+    query_columns and a coverage dict per alternative, and their alternatives are
+    re-ranked by coverage, then consumers. The query's own table and the tables
+    downstream of it are never suggested as alternatives; every candidate is
+    filtered and scored before the list is cut to max_alternatives.
+    """
+    sql = read_query_sql(query_path, sql_dir)
+    # read_lineage_sql drops EXTRACT(... FROM ...), which would read as a table
+    sources = extract_source_tables(read_lineage_sql(Path(query_path), sql_dir))
+    columns = query_columns_by_source(sql, sources, sql_dir)
+    excluded = None
+
+    results = []
+    for source in sources:
+        result = check_table(source, index, sql_dir, None)
+        if result.get("is_raw"):
+            result["query_columns"] = columns.get(source, [])
+            project = result["parsed"]["project"]
+            if result["alternatives"] and excluded is None:
+                excluded = query_descendants(query_path, sql_dir)
+            result["alternatives"] = [
+                alt for alt in result["alternatives"] if f"{project}.{alt['table']}" not in excluded
+            ]
+            for alt in result["alternatives"]:
+                schema = load_table_schema(sql_dir, f"{project}.{alt['table']}")
+                alt["coverage"] = column_coverage(result["query_columns"], schema)
+            result["alternatives"].sort(
+                key=lambda alt: (-(alt["coverage"]["percent"] or 0), -(alt["consumers"] or 0))
+            )
+            result["alternatives"] = result["alternatives"][:max_alternatives]
+        results.append(result)
+
+    return results
+
+
+def _first(row: Dict, *keys: str):
+    for key in keys:
+        if row.get(key) not in (None, ""):
+            return row[key]
+    return None
+
+
+def _stats_table_id(row: Dict) -> Optional[str]:
+    table = _first(row, "table", "table_id", "full_name")
+    if table and "." in str(table):
+        parts = str(table).replace("`", "").split(".")
+        return ".".join(parts) if len(parts) == 3 else f"moz-fx-data-shared-prod.{'.'.join(parts)}"
+
+    project = _first(row, "project", "table_catalog", "project_id") or "moz-fx-data-shared-prod"
+    dataset = _first(row, "dataset", "table_schema", "dataset_id")
+    table = _first(row, "table", "table_name")
+    if dataset and table:
+        return f"{project}.{dataset}.{table}"
+    return None
+
+
+def load_table_stats(path: str) -> Dict[str, Dict]:
+    """
+    Load a table-statistics snapshot (JSON or CSV).
+
+    Returns:
+        Mapping of table fqn to dict with rows, bytes, partitions (None if
+        unknown) and column_bytes (may be empty)
+    """
+    with open(path) as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            data = json.load(f)
+            if isinstance(data, dict):
+                rows = [{"table": table, **values} for table, values in data.items()]
+            else:
+                rows = data
+
+    stats: Dict[str, Dict] = {}
+    for row in rows:
+        fqn = _stats_table_id(row)
+        if not fqn:
+            continue
+        entry = stats.setdefault(fqn, {"rows": 0, "bytes": 0, "partitions": None, "column_bytes": {}})
+        entry["rows"] += int(float(_first(row, "row_count", "rows", "total_rows") or 0))
+        entry["bytes"] += int(float(_first(row, "bytes", "size_bytes", "total_logical_bytes", "logical_bytes") or 0))
+
+        partition_id = _first(row, "partition_id")
+        partitions = _first(row, "partitions", "partition_count")
+        if partition_id is not None and partition_id != "__NULL__":
+            entry["partitions"] = (entry["partitions"] or 0) + 1
+        elif partitions is not None:
+            entry["partitions"] = int(float(partitions))
+
+        for column, size in (row.get("column_bytes") or {}).items():
+            entry["column_bytes"][column] = entry["column_bytes"].get(column, 0) + int(size)
+
+    return stats
+
+
+def column_weights(fields: List[Dict], prefix: str = "", factor: int = 1) -> Dict[str, int]:
+    """Approximate stored bytes per row for every leaf column of a schema."""
+    weights = {}
+    for field in fields or []:
+        name = f"{prefix}.{field.get('name')}" if prefix else str(field.get("name"))
+        field_factor = factor * (REPEATED_FACTOR if field.get("mode") == "REPEATED" else 1)
+        if field.get("fields"):
+            weights.update(column_weights(field["fields"], name, field_factor))
+        else:
+            weights[name] = field_factor * TYPE_BYTES.get(str(field.get("type", "")).upper(), DEFAULT_TYPE_BYTES)
+    return weights
+
+
+def column_shares(
+    table_stats: Dict,
+    schema: Optional[Dict],
+    columns: List[str],
+) -> Optional[Dict[str, float]]:
+    """
+    Share of a table's stored bytes taken by each of the given columns.
+
+    Uses the snapshot's per-column bytes when present, otherwise schema.yaml
+    types. A column inside a record whose size is only known as a whole is
+    charged the whole record.
+
+    Returns:
+        Mapping of column to share (0-1), or None when nothing can weigh the columns
+    """
+    weights = table_stats.get("column_bytes") or (column_weights(schema.get("fields", [])) if schema else {})
+    total = sum(weights.values())
+    if not total:
+        return None
+
+    shares = {}
+    for column in columns:
+        shares[column] = sum(
+            weight for name, weight in weights.items()
+            if name == column or name.startswith(column + ".") or column.startswith(name + ".")
+        ) / total
+    return shares
+
+
+def estimate_daily_scan_bytes(
+    table_stats: Optional[Dict],
+    schema: Optional[Dict],
+    columns: Optional[List[str]] = None,
+) -> Optional[int]:
+    """
+    Estimate the bytes one daily run scans from a table.
+
+    Args:
+        table_stats: Entry from load_table_stats
+        schema: The table's schema.yaml, used to weigh columns
+        columns: Columns read (None means every column)
+
+    Returns:
+        Estimated bytes, or None without stats for the table
+    """
+    if not table_stats:
+        return None
+
+    per_day = table_stats["bytes"] / (table_stats["partitions"] or 1)
+    if columns is None:
+        return int(per_day)
+
+    shares = column_shares(table_stats, schema, columns)
+    if shares is None:
+        return int(per_day)
+    return int(per_day * min(sum(shares.values()), 1.0))
+
+
+def add_cost_estimates(results: List[Dict], stats: Dict[str, Dict], sql_dir: str = DEFAULT_SQL_DIR):
+    """
+    Estimate per-day bytes scanned for each raw table and its alternatives.
+
+    Adds estimated_bytes_per_day to raw results and to each alternative (with
+    estimated_saving_bytes), then sorts alternatives so adequate ones (full column
+    coverage, or no query to check against) come first, cheapest first.
+    """
+    for result in results:
+        if not result.get("is_raw"):
+            continue
+
+        project = result["parsed"]["project"]
+        raw_fqn = result["parsed"]["full_name"]
+        columns = result.get("query_columns")
+        raw_bytes = estimate_daily_scan_bytes(stats.get(raw_fqn), load_table_schema(sql_dir, raw_fqn), columns)
+        result["estimated_bytes_per_day"] = raw_bytes
+
+        for alt in result.get("alternatives", []):
+            alt_fqn = f"{project}.{alt['table']}"
+            alt_columns = None
+            coverage = alt.get("coverage")
+            if columns is not None and coverage and coverage["percent"] is not None:
+                alt_columns = coverage["covered"] + list(coverage["renamed"].values())
+            alt_bytes = estimate_daily_scan_bytes(stats.get(alt_fqn), load_table_schema(sql_dir, alt_fqn), alt_columns)
+            alt["estimated_bytes_per_day"] = alt_bytes
+            alt["estimated_saving_bytes"] = (
+                raw_bytes - alt_bytes if raw_bytes is not None and alt_bytes is not None else None
+            )
+
+        def rank(alt: Dict):
+            coverage = alt.get("coverage")
+            adequate = coverage is None or coverage["percent"] == 100.0
+            cost = alt["estimated_bytes_per_day"]
+            return (
+                not adequate,
+                cost is None,
+                cost if cost is not None else 0,
+                -((coverage or {}).get("percent") or 0),
+            )
+
+        result["alternatives"].sort(key=rank)
+
+
+def format_bytes(size: Optional[float]) -> str:
+    if size is None:
+        return "unknown"
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} PB"
+
+
+def mask_sql_noise(sql: str) -> str:
+    """Blank out comments, Jinja and string literals, preserving line and column positions."""
+    return _NOISE_RE.sub(lambda m: re.sub(r"[^\n]", " ", m.group()), sql)
+
+
+def lint_query_file(query_path: str) -> List[Dict]:
+    """
+    Find _live/_stable reads in a single query.sql.
+
+    Returns:
+        Findings with file, line, column, query (dataset.table) and source table
+    """
+    _, dataset, table = Path(query_path).resolve().parts[-4:-1]
+    try:
+        sql = mask_sql_noise(Path(query_path).read_text())
+    except OSError as e:
+        print(f"Warning: Could not read {query_path}: {e}", file=sys.stderr)
+        return []
+
+    findings = []
+    for match in _TABLE_REF_RE.finditer(sql):
+        parts = match.group(1).replace("`", "").split(".")
+        if len(parts) == 2:
+            source_dataset, source_table = parts
+        elif len(parts) == 3:
+            source_dataset, source_table = parts[1:]
+        else:
+            continue
+
+        is_raw, table_type = is_raw_table(source_dataset, source_table)
+        if not is_raw:
+            continue
+
+        start = match.start(1)
+        line_start = sql.rfind("\n", 0, start) + 1
+        findings.append({
+            "file": query_path,
+            "line": sql.count("\n", 0, start) + 1,
+            "column": start - line_start + 1,
+            "query": f"{dataset}.{table}",
+            "source": f"{source_dataset}.{source_table}",
+            "table_type": table_type,
+        })
+    return findings
+
+
+def load_allowlist(path: Optional[str]) -> List[Tuple[str, Optional[str]]]:
+    """Load (query pattern, source pattern or None) entries from an allowlist file."""
+    if not path:
+        return []
+    entries = []
+    for line in Path(path).read_text().splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        query, _, source = line.partition(":")
+        entries.append((query.strip(), source.strip() or None))
+    return entries
+
+
+def is_allowlisted(finding: Dict, allowlist: List[Tuple[str, Optional[str]]]) -> bool:
+    for query_pattern, source_pattern in allowlist:
+        if fnmatch.fnmatch(finding["query"], query_pattern) and (
+            source_pattern is None or fnmatch.fnmatch(finding["source"], source_pattern)
+        ):
+            return True
+    return False
+
+
+def find_lint_targets(path: str, changed_since: Optional[str] = None) -> List[str]:
+    """
+    Find the query.sql files of _derived datasets under path.
+
+    With changed_since, only files added or modified since that git ref are returned.
+    """
+    root = Path(path)
+    if changed_since:
+        toplevel = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel"],
+            cwd=root, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        changed = subprocess.run(
+            ["git", "diff", "--name-only", "--diff-filter=ACMR", changed_since, "--", "."],
+            cwd=root, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        candidates = [
+            Path(os.path.relpath(Path(toplevel) / name))
+            for name in changed
+            if name.endswith("query.sql")
+        ]
+    else:
+        candidates = list(root.rglob("query.sql"))
+
+    return sorted(
+        str(p) for p in candidates
+        if p.exists() and len(p.resolve().parts) >= 4 and p.resolve().parts[-3].endswith("_derived")
+    )
+
+
+def lint_queries(
+    path: str,
+    changed_since: Optional[str] = None,
+    allowlist: Optional[List[Tuple[str, Optional[str]]]] = None,
+    jobs: Optional[int] = None,
+) -> Tuple[List[Dict], int]:
+    """
+    Lint _derived queries under path for _live/_stable reads in a process pool.
+
+    Returns:
+        (findings not covered by the allowlist, number of files scanned)
+    """
+    targets = find_lint_targets(path, changed_since)
+    if not targets:
+        return [], 0
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(targets) < 50:
+        per_file = list(map(lint_query_file, targets))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            chunksize = max(1, len(targets) // (jobs * 4))
+            per_file = list(executor.map(lint_query_file, targets, chunksize=chunksize))
+
+    findings = [f for file_findings in per_file for f in file_findings]
+    findings = [f for f in findings if not is_allowlisted(f, allowlist or [])]
+    return findings, len(targets)
+
+
+def format_lint_output(findings: List[Dict], files_scanned: int, output_format: str = "text") -> str:
+    """Format lint findings as text, JSON or SARIF 2.1.0."""
+    if output_format == "json":
+        return json.dumps({"files_scanned": files_scanned, "findings": findings}, indent=2)
+
+    if output_format == "sarif":
+        results = [
+            {
+                "ruleId": LINT_RULE_ID,
+                "level": "warning",
+                "message": {
+                    "text": (
+                        f"{f['query']} reads _{f['table_type']} table {f['source']}. "
+                        f"Check for an aggregated alternative: "
+                        f"check_aggregated_alternatives.py {f['source']}"
+                    )
+                },
+                "locations": [{
+                    "physicalLocation": {
+                        "artifactLocation": {"uri": f["file"]},
+                        "region": {"startLine": f["line"], "startColumn": f["column"]},
+                    }
+                }],
+            }
+            for f in findings
+        ]
+        sarif = {
+            "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+            "version": "2.1.0",
+            "runs": [{
+                "tool": {
+                    "driver": {
+                        "name": "check_aggregated_alternatives",
+                        "rules": [{
+                            "id": LINT_RULE_ID,
+                            "shortDescription": {"text": "_derived query reads a _live or _stable table"},
+                            "helpUri": "https://mozilla.github.io/bigquery-etl/reference/recommended_practices/",
+                        }],
+                    }
+                },
+                "results": results,
+            }],
+        }
+        return json.dumps(sarif, indent=2)
+
+    output = [f"{f['file']}:{f['line']}:{f['column']}: {f['query']} reads _{f['table_type']} table {f['source']}"
+              for f in findings]
+    output.append("")
+    output.append(f"{len(findings)} raw table read(s) in {files_scanned} _derived queries scanned")
+    return "\n".join(output)
+
+
 def generate_lineage_query_params(table_info: Dict[str, str]) -> Dict:
     """
     Generate DataHub lineage query parameters.
@@ -193,9 +949,14 @@ def generate_lineage_query_params(table_info: Dict[str, str]) -> Dict:
     }
 
 
-def check_table(table_identifier: str) -> Dict:
+def check_table(
+    table_identifier: str,
+    index: Optional[Dict[str, List[Dict]]] = None,
+    sql_dir: str = DEFAULT_SQL_DIR,
+    max_alternatives: Optional[int] = DEFAULT_MAX_ALTERNATIVES,
+) -> Dict:
     """
-    Check a single table and return analysis.
+    Check a single table and return analysis (every alternative when max_alternatives is None).
     """
     try:
         table_info = parse_table_identifier(table_identifier)
@@ -215,9 +976,9 @@ def check_table(table_identifier: str) -> Dict:
     }
 
     if is_raw:
-        # Get known alternatives
-        alternatives = get_known_alternatives(table_info["short_name"], table_info)
-        result["known_alternatives"] = alternatives
+        # Get ranked alternatives
+        result["alternatives"] = get_alternatives(table_info, index, sql_dir, max_alternatives)
+        result["alternatives_source"] = "sql" if index is not None else "curated"
 
         # Generate lineage query
         result["lineage_query"] = generate_lineage_query_params(table_info)
@@ -254,15 +1015,45 @@ def format_output(results: List[Dict], output_format: str = "text") -> str:
         # Raw table found
         output.append(f"⚠️  {table}")
         output.append(f"   Type: _{table_type} table (raw ingestion)")
+        if "query_columns" in result:
+            output.append(f"   Columns read by the query: {len(result['query_columns'])}")
+        if "estimated_bytes_per_day" in result:
+            output.append(f"   Est. scanned per day: {format_bytes(result['estimated_bytes_per_day'])}")
         output.append("")
 
-        # Known alternatives
-        alternatives = result.get("known_alternatives", [])
+        # Ranked alternatives
+        alternatives = result.get("alternatives", [])
         if alternatives:
             output.append("   📊 Suggested Alternatives:")
-            for alt_table, description in alternatives:
-                output.append(f"      • {alt_table}")
-                output.append(f"        {description}")
+            for alt in alternatives:
+                if alt["consumers"] is not None:
+                    output.append(f"      • {alt['table']} ({alt['consumers']} downstream consumers)")
+                else:
+                    output.append(f"      • {alt['table']} (not verified - no sql directory)")
+                if alt["description"]:
+                    output.append(f"        {alt['description']}")
+                if alt.get("estimated_bytes_per_day") is not None:
+                    line = f"        Est. scanned per day: {format_bytes(alt['estimated_bytes_per_day'])}"
+                    raw_bytes = result.get("estimated_bytes_per_day")
+                    if alt["estimated_saving_bytes"] is not None and raw_bytes:
+                        pct = 100.0 * alt["estimated_saving_bytes"] / raw_bytes
+                        line += f" (saves {format_bytes(alt['estimated_saving_bytes'])}, {pct:.0f}%)"
+                    output.append(line)
+                coverage = alt.get("coverage")
+                if coverage:
+                    if coverage["percent"] is None:
+                        output.append("        Column coverage: unknown (no schema.yaml)")
+                    else:
+                        output.append(f"        Column coverage: {coverage['percent']}%")
+                    for column, match in coverage["renamed"].items():
+                        output.append(f"          ~ {column} → {match}")
+                    if coverage["missing"]:
+                        missing = ", ".join(coverage["missing"][:10])
+                        more = len(coverage["missing"]) - 10
+                        output.append(f"          missing: {missing}" + (f" (+{more} more)" if more > 0 else ""))
+            output.append("")
+        elif result.get("alternatives_source") == "sql":
+            output.append("   ℹ️  No _derived tables read from this table in the sql directory")
             output.append("")
         else:
             output.append("   ℹ️  No known alternatives in lookup table")
@@ -279,7 +1070,16 @@ def format_output(results: List[Dict], output_format: str = "text") -> str:
         # Benefits reminder
         output.append("   💡 Benefits of using aggregated alternatives:")
         output.append("      • Faster queries (pre-aggregated)")
-        output.append("      • Lower cost (less data scanned)")
+        best = next(
+            (a for a in alternatives if a.get("estimated_saving_bytes") is not None), None
+        )
+        if best and result.get("estimated_bytes_per_day"):
+            output.append(
+                f"      • Lower cost ({best['table']}: ~{format_bytes(best['estimated_bytes_per_day'])}/day "
+                f"instead of ~{format_bytes(result['estimated_bytes_per_day'])}/day)"
+            )
+        else:
+            output.append("      • Lower cost (less data scanned)")
         output.append("      • Deduplicated (no duplicate pings)")
         output.append("      • Better documented and tested")
         output.append("")
@@ -295,24 +1095,108 @@ def main():
     )
     parser.add_argument(
         "tables",
-        nargs="+",
+        nargs="*",
         help="Table identifiers to check (dataset.table or project.dataset.table)"
     )
+    parser.add_argument(
+        "--query",
+        metavar="PATH",
+        help="Check the source tables of a query.sql and score alternatives by column coverage"
+    )
+    parser.add_argument(
+        "--stats",
+        metavar="PATH",
+        help="Table-statistics snapshot (JSON or CSV) used to rank alternatives by estimated scan cost"
+    )
+    parser.add_argument(
+        "--lint",
+        metavar="PATH",
+        help="Scan every _derived query.sql under PATH for _live/_stable reads"
+    )
+    parser.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="With --lint, only scan query.sql files changed since this git ref"
+    )
+    parser.add_argument(
+        "--allowlist",
+        metavar="FILE",
+        help="With --lint, file of allowed reads (<query> or <query>:<source>, fnmatch patterns)"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="With --lint, number of worker processes (default: CPU count)"
+    )
     parser.add_argument(
         "--format",
-        choices=["text", "json"],
+        choices=["text", "json", "sarif"],
         default="text",
-        help="Output format (default: text)"
+        help="Output format (default: text; sarif only with --lint)"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Path to sql directory (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--max-alternatives",
+        type=int,
+        default=DEFAULT_MAX_ALTERNATIVES,
+        help=f"Maximum alternatives to suggest per table (default: {DEFAULT_MAX_ALTERNATIVES})"
+    )
+    parser.add_argument(
+        "--rebuild-index",
+        action="store_true",
+        help="Rebuild the cached alternatives index even if the sql tree is unchanged"
     )
 
     args = parser.parse_args()
 
+    if args.lint:
+        try:
+            findings, files_scanned = lint_queries(
+                args.lint, args.changed_since, load_allowlist(args.allowlist), args.jobs
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(2)
+        print(format_lint_output(findings, files_scanned, args.format))
+        sys.exit(1 if findings else 0)
+
+    if not args.tables and not args.query:
+        parser.error("provide table identifiers, --query or --lint")
+    if args.format == "sarif":
+        parser.error("--format sarif is only supported with --lint")
+
+    index = None
+    if Path(args.sql_dir).exists():
+        index = load_alternatives_index(args.sql_dir, rebuild=args.rebuild_index)
+    else:
+        print(
+            f"Warning: SQL directory not found: {args.sql_dir} - using unverified curated alternatives",
+            file=sys.stderr,
+        )
+
     # Check each table
     results = []
+    if args.query:
+        try:
+            results.extend(check_query(args.query, index, args.sql_dir, args.max_alternatives))
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(2)
     for table in args.tables:
-        result = check_table(table)
+        result = check_table(table, index, args.sql_dir, args.max_alternatives)
         results.append(result)
 
+    if args.stats:
+        try:
+            add_cost_estimates(results, load_table_stats(args.stats), args.sql_dir)
+        except (OSError, ValueError) as e:
+            print(f"Error: Could not load table stats {args.stats}: {e}", file=sys.stderr)
+            sys.exit(2)
+
     # Output results
     output = format_output(results, args.format)
     print(output)
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Duplicate Query Finder
+
+Finds derived tables whose query.sql is identical or nearly identical to another's,
+so a new model can reuse an existing table and redundant aggregates can be retired.
+
+Every query.sql is normalized:
+    - comments and Jinja are removed, the SQL is tokenized and keywords lowercased
+    - string/number literals become `?`; @parameters are kept
+    - table references are fully qualified; table aliases and CTE names are
+      renamed by order of appearance (a1, a2, ... / cte1, ...), output column
+      aliases (`AS name` in SELECT lists) are dropped
+    - the items of every SELECT and GROUP BY list are sorted
+
+Two signatures are then computed per query:
+    - a structural fingerprint (hash of the normalized tokens); equal fingerprints
+      are duplicates
+    - a MinHash signature over token 5-grams (one-permutation hashing: one hash per
+      shingle, so signing is linear in query length)
+
+Near-duplicates are found with locality-sensitive hashing: signatures are cut into
+bands and only queries sharing a band bucket are compared, so the run time grows
+roughly linearly with the number of queries instead of quadratically. Candidate
+pairs are confirmed with the exact Jaccard similarity of their shingle sets and
+grouped.
+
+Versions of the same table (foo_v1, foo_v2) are expected to be similar and are not
+reported unless --include-versions is given.
+
+Usage:
+    python scripts/find_duplicate_queries.py [--sql-dir sql] [options]
+    python scripts/find_duplicate_queries.py --query path/to/query.sql [options]
+
+Examples:
+    # Groups of near-duplicate queries across the repository
+    python scripts/find_duplicate_queries.py
+
+    # Only _derived datasets matching a pattern, stricter threshold
+    python scripts/find_duplicate_queries.py --dataset "*search*" --threshold 0.9
+
+    # Does an existing table already compute what this draft computes?
+    python scripts/find_duplicate_queries.py --query sql/moz-fx-data-shared-prod/search_derived/new_table_v1/query.sql
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(SKILLS_DIR / "glean-description-lookup" / "scripts"))
+from extract_query_fields import strip_comments, strip_jinja  # noqa: E402
+from render_jinja import render_sql  # noqa: E402
+
+
+DEFAULT_SQL_DIR = "sql"
+DEFAULT_THRESHOLD = 0.8
+NUM_HASHES = 128
+SHINGLE_SIZE = 5
+MIN_SHINGLES = 10
+PARALLEL_THRESHOLD = 200
+LSH_RECALL_MARGIN = 0.1
+
+_TOKEN_RE = re.compile(
+    r"""(?P<string>[rRbB]?'''.*?'''|[rRbB]?\"\"\".*?\"\"\"|[rRbB]?'(?:[^'\\]|\\.)*'|[rRbB]?"(?:[^"\\]|\\.)*")"""
+    r"|(?P<quoted>`[^`]*`)"
+    r"|(?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)"
+    r"|(?P<param>@\w+)"
+    r"|(?P<word>[A-Za-z_][\w\-]*(?:\.[A-Za-z_][\w\-]*)*)"
+    r"|(?P<symbol><=|>=|<>|!=|\|\||[^\s\w])",
+    re.DOTALL,
+)
+_KEYWORDS = {
+    "select", "from", "where", "join", "inner", "left", "right", "full", "outer", "cross",
+    "on", "using", "group", "by", "order", "having", "qualify", "window", "limit", "as",
+    "with", "union", "all", "distinct", "except", "intersect", "and", "or", "not", "in",
+    "is", "null", "case", "when", "then", "else", "end", "between", "like", "unnest",
+    "over", "partition", "rows", "range", "asc", "desc", "true", "false", "struct",
+    "array", "interval", "if", "exists", "replace", "recursive", "current", "row",
+    "preceding", "following", "unbounded", "nulls", "first", "last", "lateral",
+}
+# Tokens after which the next word (optionally after AS) names a table
+_TABLE_PREFIXES = {"from", "join"}
+
+
+def tokenize(sql: str) -> List[Tuple[str, str]]:
+    """Split SQL (comments and Jinja already removed) into (kind, text) tokens."""
+    return [(m.lastgroup, m.group()) for m in _TOKEN_RE.finditer(sql)]
+
+
+def _sort_lists(tokens: List[str]) -> List[str]:
+    """Sort the items of every SELECT and GROUP BY list, recursing into parentheses."""
+    result = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        result.append(token)
+        i += 1
+        if token == "by" and len(result) >= 2 and result[-2] == "group":
+            select = False
+        elif token == "select":
+            select = True
+            # Modifiers that belong before the list
+            while i < len(tokens) and tokens[i] in ("distinct", "all"):
+                result.append(tokens[i])
+                i += 1
+            if i + 1 < len(tokens) and tokens[i] == "as" and tokens[i + 1] == "struct":
+                result.extend(tokens[i:i + 2])
+                i += 2
+        else:
+            continue
+
+        items: List[List[str]] = [[]]
+        depth = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if depth == 0 and token in ("from", "where", "group", "having", "qualify", "window",
+                                        "order", "limit", "union", "except", "intersect", ")", ";"):
+                break
+            if token == "(":
+                depth += 1
+            elif token == ")":
+                depth -= 1
+            if depth == 0 and token == ",":
+                items.append([])
+            else:
+                items[-1].append(token)
+            i += 1
+
+        normalized = []
+        for item in items:
+            # Drop output aliases (`expr AS name`)
+            if select and len(item) >= 2 and item[-2] == "as":
+                item = item[:-2]
+            normalized.append(_sort_lists(item))
+        for n, item in enumerate(sorted(normalized)):
+            if n:
+                result.append(",")
+            result.extend(item)
+    return result
+
+
+def normalize_query(sql: str, project: str, sql_dir: str = DEFAULT_SQL_DIR) -> List[str]:
+    """
+    Normalize a query into canonical tokens.
+
+    Args:
+        sql: Raw query.sql text
+        project: Project the query belongs to, for two-part table references
+        sql_dir: Root of the sql/ tree, for Jinja includes and macros
+
+    Returns:
+        Normalized token list
+    """
+    raw = tokenize(strip_jinja(strip_comments(render_sql(sql, sql_dir))))
+    words = [text.lower() if kind == "word" else text for kind, text in raw]
+
+    # Names introduced by `WITH name AS (` / `, name AS (` are CTEs
+    ctes = set()
+    for i, (kind, _) in enumerate(raw):
+        if kind == "word" and i + 2 < len(raw) and words[i + 1] == "as" and words[i + 2] == "(" and (
+            i > 0 and words[i - 1] in ("with", ",", "recursive")
+        ):
+            ctes.add(words[i])
+
+    renames: Dict[str, str] = {}
+    counts = {"a": 0, "cte": 0}
+
+    def rename(name: str, prefix: str) -> str:
+        if name not in renames:
+            counts[prefix] += 1
+            renames[name] = f"{prefix}{counts[prefix]}"
+        return renames[name]
+
+    tokens = []
+    previous = None
+    expect_alias = False
+    for i, (kind, text) in enumerate(raw):
+        word = words[i]
+        is_name = kind == "quoted" or (kind == "word" and word not in _KEYWORDS)
+        name = text.strip("`").lower() if kind == "quoted" else word
+        if kind in ("string", "number"):
+            token = "?"
+        elif not is_name:
+            token = word
+        elif name in ctes:
+            token = rename(name, "cte")
+        elif previous in _TABLE_PREFIXES and "." in name:
+            token = f"{project}.{name}" if name.count(".") == 1 else name
+        elif expect_alias:
+            # `FROM <table> [AS] alias`
+            token = rename(name, "a")
+        else:
+            token = renames.get(name, name)
+
+        skip = expect_alias and word == "as"
+        expect_alias = (previous in _TABLE_PREFIXES and is_name and (name in ctes or "." in name)) or skip
+        if not skip:
+            tokens.append(token)
+        previous = word
+
+    # Qualified column references through a renamed alias (`x.col`)
+    canonical = []
+    for token in tokens:
+        head, _, rest = token.partition(".")
+        if rest and head in renames:
+            token = f"{renames[head]}.{rest}"
+        canonical.append(token)
+
+    return _sort_lists(canonical)
+
+
+def stable_hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def shingles(tokens: List[str], size: int = SHINGLE_SIZE) -> Set[int]:
+    """Hashed token n-grams of a normalized query."""
+    if len(tokens) < size:
+        return {stable_hash(" ".join(tokens))} if tokens else set()
+    return {stable_hash(" ".join(tokens[i:i + size])) for i in range(len(tokens) - size + 1)}
+
+
+def minhash(shingle_set: Set[int], num_hashes: int = NUM_HASHES) -> Tuple[int, ...]:
+    """
+    One-permutation MinHash: each shingle hash is assigned to one of num_hashes bins
+    and the minimum per bin is kept; empty bins borrow from the next non-empty bin.
+    """
+    bin_width = 2 ** 64 // num_hashes
+    bins: List[Optional[int]] = [None] * num_hashes
+    for value in shingle_set:
+        index = min(value // bin_width, num_hashes - 1)
+        offset = value - index * bin_width
+        if bins[index] is None or offset < bins[index]:
+            bins[index] = offset
+    if all(b is None for b in bins):
+        return tuple([0] * num_hashes)
+    # Densify: rotate right until a filled bin is found, offset by the distance
+    for i in range(num_hashes):
+        if bins[i] is None:
+            j, distance = i, 0
+            while bins[j % num_hashes] is None:
+                j += 1
+                distance += 1
+            bins[i] = bins[j % num_hashes] + distance * bin_width
+    return tuple(bins)
+
+
+def lsh_parameters(threshold: float, num_hashes: int = NUM_HASHES) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) with bands * rows = num_hashes.
+
+    The S-curve midpoint (1/bands)^(1/rows) is placed a little below the threshold:
+    candidates are confirmed with exact Jaccard anyway, so recall matters more than
+    the number of candidates.
+    """
+    target = max(threshold - LSH_RECALL_MARGIN, 0.05)
+    options = [(b, num_hashes // b) for b in range(1, num_hashes + 1) if num_hashes % b == 0]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - target))
+
+
+def signature_file(path: str, sql_dir: str = DEFAULT_SQL_DIR) -> Optional[Dict]:
+    """Normalize one query.sql and compute its fingerprint, shingles and MinHash."""
+    sql_path = Path(path)
+    try:
+        sql = sql_path.read_text()
+    except OSError as e:
+        print(f"Warning: Could not read {path}: {e}", file=sys.stderr)
+        return None
+    parts = sql_path.resolve().parts
+    project, dataset, table = parts[-4:-1]
+    tokens = normalize_query(sql, project, sql_dir)
+    shingle_set = shingles(tokens)
+    return {
+        "table": f"{project}.{dataset}.{table}",
+        "path": path,
+        "fingerprint": hashlib.sha1(" ".join(tokens).encode()).hexdigest(),
+        "shingles": shingle_set,
+        "minhash": minhash(shingle_set),
+    }
+
+
+def table_family(fqn: str) -> str:
+    """foo_v1 and foo_v2 belong to the same family."""
+    return re.sub(r"_v\d+$", "", fqn)
+
+
+def find_query_files(sql_dir: str, dataset_pattern: Optional[str] = None) -> List[str]:
+    return sorted(
+        str(path) for path in Path(sql_dir).glob("*/*/*/query.sql")
+        if fnmatch.fnmatch(path.parts[-3], dataset_pattern or "*_derived")
+    )
+
+
+def compute_signatures(paths: List[str], jobs: Optional[int] = None, sql_dir: str = DEFAULT_SQL_DIR) -> List[Dict]:
+    jobs = jobs or os.cpu_count() or 1
+    compute = partial(signature_file, sql_dir=sql_dir)
+    if jobs == 1 or len(paths) < PARALLEL_THRESHOLD:
+        signatures = list(map(compute, paths))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            signatures = list(executor.map(compute, paths, chunksize=max(1, len(paths) // (jobs * 4))))
+    return [s for s in signatures if s and len(s["shingles"]) >= MIN_SHINGLES]
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def find_duplicates(
+    signatures: List[Dict],
+    threshold: float = DEFAULT_THRESHOLD,
+    include_versions: bool = False,
+    targets: Optional[List[Dict]] = None,
+) -> List[Dict]:
+    """
+    Group duplicate and near-duplicate queries.
+
+    Args:
+        signatures: signature_file results for the corpus
+        threshold: Minimum Jaccard similarity of shingle sets
+        include_versions: Also report versions of the same table
+        targets: If given, only report matches of these (e.g. a draft query)
+
+    Returns:
+        Groups of {tables, exact (all share a fingerprint), pairs: [(a, b, similarity)]},
+        largest similarity first
+    """
+    bands, rows = lsh_parameters(threshold)
+    corpus = signatures + [t for t in (targets or []) if t["path"] not in {s["path"] for s in signatures}]
+    target_paths = {t["path"] for t in targets} if targets else None
+
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = defaultdict(list)
+    for index, signature in enumerate(corpus):
+        for band in range(bands):
+            buckets[(band, signature["minhash"][band * rows:(band + 1) * rows])].append(index)
+
+    pairs: Dict[Tuple[int, int], float] = {}
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                i, j = members[x], members[y]
+                if (i, j) in pairs:
+                    continue
+                a, b = corpus[i], corpus[j]
+                if target_paths is not None and a["path"] not in target_paths and b["path"] not in target_paths:
+                    continue
+                if not include_versions and table_family(a["table"]) == table_family(b["table"]):
+                    continue
+                similarity = 1.0 if a["fingerprint"] == b["fingerprint"] else jaccard(a["shingles"], b["shingles"])
+                if similarity >= threshold:
+                    pairs[(i, j)] = similarity
+
+    # Union-find over confirmed pairs
+    parent = list(range(len(corpus)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in pairs:
+        parent[find(i)] = find(j)
+
+    groups: Dict[int, Dict] = {}
+    for (i, j), similarity in pairs.items():
+        group = groups.setdefault(find(i), {"members": set(), "pairs": []})
+        group["members"].update((i, j))
+        group["pairs"].append((corpus[i]["table"], corpus[j]["table"], round(similarity, 3)))
+
+    results = []
+    for group in groups.values():
+        members = sorted(group["members"], key=lambda m: corpus[m]["table"])
+        results.append({
+            "tables": [corpus[m]["table"] for m in members],
+            "paths": [corpus[m]["path"] for m in members],
+            "exact": len({corpus[m]["fingerprint"] for m in members}) == 1,
+            "pairs": sorted(group["pairs"], key=lambda p: -p[2]),
+        })
+    return sorted(results, key=lambda g: (-max(p[2] for p in g["pairs"]), g["tables"]))
+
+
+def format_output(groups: List[Dict], queries_scanned: int, output_format: str = "text") -> str:
+    if output_format == "json":
+        return json.dumps({"queries_scanned": queries_scanned, "groups": groups}, indent=2)
+
+    output = []
+    for group in groups:
+        label = "Duplicate" if group["exact"] else "Near-duplicate"
+        output.append(f"🔁 {label} group ({len(group['tables'])} tables):")
+        for table in group["tables"]:
+            output.append(f"   • {table}")
+        if not group["exact"]:
+            for a, b, similarity in group["pairs"]:
+                output.append(f"      {similarity:.0%} similar: {a.split('.', 1)[1]} ~ {b.split('.', 1)[1]}")
+        output.append("")
+    output.append(f"{len(groups)} group(s) found in {queries_scanned} queries scanned")
+    return "\n".join(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find duplicate and near-duplicate derived queries",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Root of the bigquery-etl sql/ tree (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--dataset",
+        metavar="PATTERN",
+        help="Only scan datasets matching this fnmatch pattern (default: *_derived)"
+    )
+    parser.add_argument(
+        "--query",
+        metavar="PATH",
+        help="Only report tables similar to this query.sql (e.g. a draft)"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Minimum similarity (Jaccard of token 5-grams, 0-1) to report (default: {DEFAULT_THRESHOLD})"
+    )
+    parser.add_argument(
+        "--include-versions",
+        action="store_true",
+        help="Also report similar versions of the same table (foo_v1 ~ foo_v2)"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of worker processes (default: CPU count)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "text"],
+        default="text",
+        help="Output format (default: text)"
+    )
+
+    args = parser.parse_args()
+    if not 0 < args.threshold <= 1:
+        parser.error("--threshold must be in (0, 1]")
+
+    try:
+        signatures = compute_signatures(find_query_files(args.sql_dir, args.dataset), args.jobs, args.sql_dir)
+        targets = None
+        if args.query:
+            target = signature_file(args.query)
+            if target is None:
+                sys.exit(2)
+            targets = [target]
+        groups = find_duplicates(signatures, args.threshold, args.include_versions, targets)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(format_output(groups, len(signatures), args.format))
+
+
+if __name__ == "__main__":
+    main()
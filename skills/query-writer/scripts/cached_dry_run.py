@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Cached Dry Run
+
+Dry-runs query.sql files through a pluggable backend and caches the results on
+disk, so re-checking a query after a comment-only or formatting edit does not
+wait for another dry run.
+
+Cache key:
+    A SHA-256 hash of the normalized rendered query, the query parameters, whether
+    the init branch is dry-run (--init), the query's default project and dataset
+    (from its sql/<project>/<dataset>/<table>/ path) and the backend. The Jinja is
+    rendered first (render_jinja.py, with {% include %} resolved against --sql-dir),
+    so editing an included file changes the key. Normalization drops SQL and Jinja
+    comments and whitespace that does not separate two words; string literals and
+    quoted identifiers are kept byte for byte. bqetl macros are stubbed when
+    rendering, so after changing only a macro use --refresh.
+
+Cache entries:
+    Validity, errors, output schema and bytes processed, in a single JSON file
+    (default: ~/.cache/bigquery-etl-skills/dry_run_cache.json) shared safely between
+    concurrent runs (see datahub_lineage.JsonFileCache). Invalid results are
+    cached too. Entries expire after --cache-ttl seconds (upstream tables can change
+    under an unchanged query) and the least recently used entries are evicted past
+    --cache-max-entries. Backend failures (command missing, timeout, unreadable
+    output) are never cached; --refresh forces a new dry run.
+
+Backends (--backend):
+    bqetl    - `<bqetl> dryrun <query.sql>` (default ./bqetl). Reports validity and
+               errors only; schema and bytes processed are not printed by bqetl.
+               It cannot dry-run the init branch.
+    command  - `<--backend-command> <query.sql>` with the query text on stdin and
+               --parameter values as `--parameter name:TYPE:value` arguments (and
+               `--init` with --init). It must
+               print one JSON object: {"valid": bool, "errors": [...], "schema":
+               {"fields": [...]}, "total_bytes_processed": int} (the camelCase
+               `totalBytesProcessed` of a BigQuery dry-run response is accepted).
+               Point it at a wrapper around your dry-run service, or at a local stub
+               in tests.
+
+Usage:
+    python scripts/cached_dry_run.py <query.sql>... [options]
+
+Examples:
+    # Dry-run a query through bqetl, reusing the cached result when only formatting changed
+    python scripts/cached_dry_run.py sql/moz-fx-data-shared-prod/telemetry_derived/my_table_v1/query.sql
+
+    # Use a JSON-speaking backend with a parameter, and print the schema
+    python scripts/cached_dry_run.py query.sql --backend command --backend-command "python dry_run_wrapper.py" \\
+        --parameter submission_date:DATE:2024-01-01 --format json
+
+    # Ignore the cached result, or clear the cache
+    python scripts/cached_dry_run.py query.sql --refresh
+    python scripts/cached_dry_run.py --clear
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import shlex
+import subprocess
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(SKILLS_DIR / "glean-description-lookup" / "scripts"))
+sys.path.insert(0, str(SKILLS_DIR / "model-requirements" / "scripts"))
+sys.path.insert(0, str(SKILLS_DIR / "metadata-manager" / "scripts"))
+from check_aggregated_alternatives import format_bytes  # noqa: E402
+from datahub_lineage import DEFAULT_CACHE_DIR, JsonFileCache  # noqa: E402
+from render_jinja import DEFAULT_SQL_DIR, render_sql  # noqa: E402
+
+
+DEFAULT_CACHE_TTL = 24 * 60 * 60  # seconds
+DEFAULT_CACHE_MAX_ENTRIES = 1024
+DEFAULT_BQETL = "./bqetl"
+DEFAULT_TIMEOUT_SECONDS = 300
+
+_NORMALIZE_RE = re.compile(
+    r"(?P<comment>\{#.*?#\}|--[^\n]*|#[^\n]*|/\*.*?\*/)"
+    r"|(?P<string>[rRbB]{0,2}'''.*?'''|[rRbB]{0,2}\"\"\".*?\"\"\""
+    r"|[rRbB]{0,2}'(?:[^'\\\n]|\\.)*'|[rRbB]{0,2}\"(?:[^\"\\\n]|\\.)*\"|`[^`]*`)"
+    r"|(?P<space>\s+)",
+    re.DOTALL,
+)
+_GAP = "\x00"
+_WORD_EDGE_RE = re.compile(r"[\w@$'\"`]")
+
+
+class BackendError(Exception):
+    """The dry run could not be performed; the result is not cached."""
+
+
+def normalize_sql(sql: str) -> str:
+    """Drop comments and insignificant whitespace, keeping literals and quoted names unchanged."""
+    marked = _NORMALIZE_RE.sub(lambda m: m.group() if m.lastgroup == "string" else _GAP, sql)
+    normalized = ""
+    for piece in marked.split(_GAP):
+        if not piece:
+            continue
+        if normalized and _WORD_EDGE_RE.match(normalized[-1]) and _WORD_EDGE_RE.match(piece[0]):
+            normalized += " "
+        normalized += piece
+    return normalized.rstrip(";")
+
+
+def query_context(query_path: Path) -> Tuple[Optional[str], Optional[str]]:
+    """Default (project, dataset) of a sql/<project>/<dataset>/<table>/query.sql file."""
+    parts = query_path.resolve().parts
+    if len(parts) >= 4:
+        return parts[-4], parts[-3]
+    return None, None
+
+
+def cache_key(
+    sql: str,
+    parameters: List[str],
+    context: Tuple[Optional[str], Optional[str]],
+    backend: str,
+    sql_dir: str = DEFAULT_SQL_DIR,
+    init: bool = False,
+) -> str:
+    rendered = render_sql(sql, sql_dir, init)
+    payload = json.dumps([normalize_sql(rendered), sorted(parameters), init, list(context), backend])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class DryRunCache(JsonFileCache):
+    """On-disk cache of dry-run results keyed by cache_key(); see JsonFileCache for expiry and eviction."""
+
+    FILENAME = "dry_run_cache.json"
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        ttl: int = DEFAULT_CACHE_TTL,
+        max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+    ):
+        super().__init__(cache_dir, ttl, max_entries)
+
+
+def bqetl_backend(
+    query_path: Path, sql: str, parameters: List[str], command: str, timeout: int, init: bool = False,
+) -> dict:
+    """Run `bqetl dryrun` on the file; validity and errors only."""
+    if init:
+        raise BackendError("bqetl dryrun cannot dry-run the init branch; use --backend command")
+    try:
+        result = subprocess.run(
+            shlex.split(command) + ["dryrun", str(query_path)],
+            capture_output=True, text=True, timeout=timeout,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise BackendError(str(e))
+    if result.returncode == 0:
+        return {"valid": True, "errors": [], "schema": None, "total_bytes_processed": None}
+    lines = [line.strip() for line in (result.stderr + result.stdout).splitlines() if line.strip()]
+    return {
+        "valid": False,
+        "errors": lines[-5:] or [f"exit code {result.returncode}"],
+        "schema": None,
+        "total_bytes_processed": None,
+    }
+
+
+def command_backend(
+    query_path: Path, sql: str, parameters: List[str], command: str, timeout: int, init: bool = False,
+) -> dict:
+    """Run a command that prints a JSON dry-run result (query text on stdin)."""
+    if not command:
+        raise BackendError("--backend-command is required for the command backend")
+    args = shlex.split(command) + [str(query_path)]
+    for parameter in parameters:
+        args += ["--parameter", parameter]
+    if init:
+        args.append("--init")
+    try:
+        result = subprocess.run(args, input=sql, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise BackendError(str(e))
+    try:
+        response = json.loads(result.stdout)
+    except ValueError:
+        message = (result.stderr or result.stdout).strip().splitlines()
+        raise BackendError(message[-1] if message else f"no JSON output (exit code {result.returncode})")
+    if not isinstance(response, dict) or "valid" not in response:
+        raise BackendError("backend output has no 'valid' field")
+
+    errors = response.get("errors") or []
+    total_bytes = response.get("total_bytes_processed", response.get("totalBytesProcessed"))
+    return {
+        "valid": bool(response["valid"]),
+        "errors": [e.get("message", str(e)) if isinstance(e, dict) else str(e) for e in errors],
+        "schema": response.get("schema"),
+        "total_bytes_processed": int(total_bytes) if total_bytes is not None else None,
+    }
+
+
+BACKENDS: Dict[str, Callable[..., dict]] = {
+    "bqetl": bqetl_backend,
+    "command": command_backend,
+}
+
+
+def cached_dry_run(
+    query_path: Path,
+    cache: Optional[DryRunCache],
+    backend: str = "bqetl",
+    command: str = DEFAULT_BQETL,
+    parameters: Optional[List[str]] = None,
+    timeout: int = DEFAULT_TIMEOUT_SECONDS,
+    refresh: bool = False,
+    sql_dir: str = DEFAULT_SQL_DIR,
+    init: bool = False,
+) -> dict:
+    """
+    Dry-run one query, serving the result from the cache when the normalized rendered text matches.
+
+    Returns the result dict with "query", "key" and "cached" added.
+    """
+    parameters = parameters or []
+    sql = query_path.read_text()
+    key = cache_key(sql, parameters, query_context(query_path), f"{backend}:{command}", sql_dir, init)
+
+    result = None if cache is None or refresh else cache.get(key)
+    cached = result is not None
+    if result is None:
+        result = BACKENDS[backend](query_path, sql, parameters, command, timeout, init)
+        if cache is not None:
+            cache.put(key, result)
+    return {"query": str(query_path), "key": key[:16], "cached": cached, **result}
+
+
+def format_output(results: List[dict], output_format: str = "text") -> str:
+    if output_format == "json":
+        return json.dumps(results, indent=2)
+
+    output = []
+    for result in results:
+        source = "cached" if result["cached"] else "dry run"
+        if "backend_error" in result:
+            output.append(f"⚠️  {result['query']}: backend failed: {result['backend_error']}")
+            continue
+        status = "✅ valid" if result["valid"] else "❌ invalid"
+        output.append(f"{status}  {result['query']} ({source})")
+        if result.get("total_bytes_processed") is not None:
+            output.append(f"   Bytes processed: {format_bytes(result['total_bytes_processed'])}")
+        if result.get("schema"):
+            output.append(f"   Schema: {len(result['schema'].get('fields', []))} top-level field(s)")
+        for error in result.get("errors", []):
+            output.append(f"   {error}")
+
+    hits = sum(1 for r in results if r.get("cached"))
+    output.append("")
+    output.append(f"{len(results)} quer{'y' if len(results) == 1 else 'ies'}, {hits} served from cache")
+    return "\n".join(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Dry-run queries with an on-disk cache keyed by the normalized query text",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "queries",
+        nargs="*",
+        help="query.sql files to dry-run"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=sorted(BACKENDS),
+        default="bqetl",
+        help="Dry-run backend (default: bqetl)"
+    )
+    parser.add_argument(
+        "--bqetl",
+        default=DEFAULT_BQETL,
+        help=f"bqetl command for the bqetl backend (default: {DEFAULT_BQETL})"
+    )
+    parser.add_argument(
+        "--backend-command",
+        help="Command for the command backend; prints a JSON dry-run result"
+    )
+    parser.add_argument(
+        "--parameter",
+        action="append",
+        default=[],
+        help="Query parameter as name:TYPE:value (repeatable; part of the cache key)"
+    )
+    parser.add_argument(
+        "--init",
+        action="store_true",
+        help="Dry-run the init branch (is_init() true; part of the cache key)"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Root of the sql/ tree for {{% include %}} when rendering the cache key (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=int,
+        default=DEFAULT_TIMEOUT_SECONDS,
+        help=f"Seconds before a dry run is abandoned (default: {DEFAULT_TIMEOUT_SECONDS})"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(DEFAULT_CACHE_DIR),
+        help=f"Directory for the dry-run cache (default: {DEFAULT_CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=DEFAULT_CACHE_TTL,
+        help=f"Seconds before a cached result expires (default: {DEFAULT_CACHE_TTL})"
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=DEFAULT_CACHE_MAX_ENTRIES,
+        help=f"Maximum cached results, least recently used evicted first (default: {DEFAULT_CACHE_MAX_ENTRIES})"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached results and store fresh ones"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor write the cache"
+    )
+    parser.add_argument(
+        "--clear",
+        action="store_true",
+        help="Remove all cached results"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "text"],
+        default="text",
+        help="Output format (default: text)"
+    )
+
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else DryRunCache(Path(args.cache_dir), args.cache_ttl, args.cache_max_entries)
+    if args.clear and cache is not None:
+        cache.clear()
+        print(f"Cleared {cache.path}", file=sys.stderr)
+    if not args.queries:
+        if not args.clear:
+            parser.error("no query.sql files given")
+        return
+
+    command = args.backend_command if args.backend == "command" else args.bqetl
+    results = []
+    for query in args.queries:
+        path = Path(query)
+        if path.is_dir():
+            path = path / "query.sql"
+        if not path.exists():
+            print(f"Error: Query file not found: {path}", file=sys.stderr)
+            sys.exit(1)
+        try:
+            results.append(cached_dry_run(
+                path, cache, args.backend, command, args.parameter, args.timeout, args.refresh,
+                args.sql_dir, args.init,
+            ))
+        except BackendError as e:
+            print(f"Warning: Dry run failed for {path}: {e}", file=sys.stderr)
+            results.append({"query": str(path), "cached": False, "backend_error": str(e)})
+
+    print(format_output(results, args.format))
+    failed = any("backend_error" in r or not r["valid"] for r in results)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
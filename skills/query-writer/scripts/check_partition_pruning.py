@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Partition-Pruning Linter
+
+Flags queries that would scan every partition of a day-partitioned source.
+
+For each table a query reads (FROM/JOIN), the partition column is taken from the
+source's metadata.yaml (`bigquery.time_partitioning.field`); _live/_stable tables,
+which have no metadata.yaml in the repo, are partitioned on `submission_timestamp`.
+The query's WHERE/ON predicates are then checked for a filter on that column:
+
+    ok       - filtered against a query parameter, e.g.
+               `submission_date = @submission_date` or
+               `DATE(submission_timestamp) = @submission_date`
+    warning  - filtered, but not against a parameter (a constant range still prunes,
+               an expression over another table does not), or the query is a full
+               refresh (`scheduling.date_partition_parameter: null`) with no filter
+    error    - no filter on the partition column: every run scans the whole table
+
+Sources without a local metadata.yaml partition field (views, other projects) are
+skipped. Predicates are matched per source by alias/table qualifier; unqualified
+columns count for every source.
+
+Usage:
+    python scripts/check_partition_pruning.py <query.sql | directory>... [options]
+
+Examples:
+    # Check a draft query
+    python scripts/check_partition_pruning.py sql/moz-fx-data-shared-prod/telemetry_derived/my_table_v1/query.sql
+
+    # Check every _derived query in the repo, in parallel
+    python scripts/check_partition_pruning.py sql/
+
+    # Only queries changed on this branch, as SARIF for code scanning
+    python scripts/check_partition_pruning.py sql/ --changed-since origin/main --format sarif
+
+    # Skip known full-scan queries (same allowlist format as check_aggregated_alternatives.py --lint)
+    python scripts/check_partition_pruning.py sql/ --allowlist .partition_filter_allowlist
+
+Exit code is 1 if any error (or, with --strict, any warning) is reported.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(SKILLS_DIR / "model-requirements" / "scripts"))
+from check_aggregated_alternatives import (  # noqa: E402
+    DEFAULT_SQL_DIR,
+    find_lint_targets,
+    is_allowlisted,
+    is_raw_table,
+    load_allowlist,
+    mask_sql_noise,
+)
+from extract_query_fields import extract_cte_names, extract_table_aliases  # noqa: E402
+
+
+DEFAULT_PROJECT = "moz-fx-data-shared-prod"
+RAW_PARTITION_FIELD = "submission_timestamp"
+RULE_ID = "partition-filter"
+PARALLEL_THRESHOLD = 50
+
+_TABLE_REF_RE = re.compile(r"\b(?:FROM|JOIN)\s+([`a-zA-Z0-9_\-][`a-zA-Z0-9_\-\.]*)", re.IGNORECASE)
+# Clause keywords that end a predicate, and parentheses to track nesting
+_PREDICATE_TOKEN_RE = re.compile(
+    r"\b(?:AND|OR|WHERE|ON|HAVING|QUALIFY|GROUP|ORDER|WINDOW|SELECT|FROM|JOIN|UNION|LIMIT|USING)\b|[;,()]",
+    re.IGNORECASE,
+)
+
+
+def read_yaml(path: Path) -> Dict:
+    if not path.exists():
+        return {}
+    try:
+        with open(path) as f:
+            return yaml.safe_load(f) or {}
+    except Exception as e:
+        print(f"Warning: Could not parse {path}: {e}", file=sys.stderr)
+        return {}
+
+
+def source_partitioning(sql_dir: str, fqn: str) -> Optional[Dict]:
+    """
+    Return the time partitioning of a source table, or None if unknown/unpartitioned.
+
+    Returns:
+        Dict with field and require_partition_filter
+    """
+    project, dataset, table = fqn.split(".")
+    metadata = read_yaml(Path(sql_dir) / project / dataset / table / "metadata.yaml")
+    partitioning = (metadata.get("bigquery") or {}).get("time_partitioning") or {}
+    if partitioning.get("field"):
+        return {
+            "field": partitioning["field"],
+            "require_partition_filter": bool(partitioning.get("require_partition_filter")),
+        }
+    if is_raw_table(dataset, table)[0]:
+        return {"field": RAW_PARTITION_FIELD, "require_partition_filter": True}
+    return None
+
+
+def predicate_around(sql: str, start: int, end: int) -> str:
+    """
+    Return the predicate containing sql[start:end], bounded by AND/OR/clause keywords.
+
+    Boundaries inside nested parentheses (function arguments, subqueries) are
+    skipped, and an unmatched parenthesis ends the predicate.
+    """
+    left = 0
+    depth = 0
+    # Function calls wrapping the column, e.g. DATE(submission_timestamp), belong to the predicate
+    wrapping_calls = 0
+    tokens = list(_PREDICATE_TOKEN_RE.finditer(sql, 0, start))
+    for match in reversed(tokens):
+        token = match.group()
+        if token == ")":
+            depth += 1
+        elif token == "(":
+            if depth == 0:
+                function = re.search(r"(\w+)\s*$", sql[:match.start()])
+                if function and not _PREDICATE_TOKEN_RE.fullmatch(function.group(1)):
+                    wrapping_calls += 1
+                    continue
+                left = match.end()
+                break
+            depth -= 1
+        elif depth == 0:
+            left = match.end()
+            break
+
+    right = len(sql)
+    depth = -wrapping_calls
+    between = False
+    for match in _PREDICATE_TOKEN_RE.finditer(sql, end):
+        token = match.group()
+        if token == "(":
+            depth += 1
+            continue
+        if token == ")":
+            if depth == 0:
+                right = match.start()
+                break
+            depth -= 1
+            continue
+        if depth > 0:
+            continue
+        # `x BETWEEN a AND b` spans one AND
+        if token.upper() == "AND" and not between and re.search(
+            r"\bBETWEEN\b", sql[left:match.start()], re.IGNORECASE
+        ):
+            between = True
+            continue
+        right = match.start()
+        break
+    return sql[left:right]
+
+
+def partition_predicates(sql: str, field: str, qualifiers: Optional[List[str]] = None) -> List[str]:
+    """
+    Return the predicates (comparisons) a query applies to a partition column.
+
+    A qualified column (alias.field) only counts when its qualifier is one of
+    qualifiers; unqualified columns always count.
+    """
+    predicates = []
+    column_re = re.compile(rf"(?<![\w\.@])(?:([\w\-\.`]+)\.)?{re.escape(field)}\b", re.IGNORECASE)
+    for match in column_re.finditer(sql):
+        qualifier = (match.group(1) or "").replace("`", "") or None
+        if qualifier is not None and qualifiers is not None and qualifier not in qualifiers:
+            continue
+        predicate = predicate_around(sql, match.start(), match.end())
+        if re.search(r"=|<|>|\bBETWEEN\b|\bIN\b", predicate, re.IGNORECASE):
+            predicates.append(predicate)
+    return predicates
+
+
+def partition_filter(sql: str, field: str, qualifiers: Optional[List[str]] = None) -> Optional[str]:
+    """
+    Classify how a query filters on a partition column.
+
+    Returns:
+        "parameter" if a predicate compares the column with a @parameter,
+        "other" if it is compared with something else, None if it is never filtered
+    """
+    predicates = partition_predicates(sql, field, qualifiers)
+    if any(re.search(r"@\w+", predicate) for predicate in predicates):
+        return "parameter"
+    return "other" if predicates else None
+
+
+def check_query_file(query_path: str, sql_dir: str = DEFAULT_SQL_DIR) -> List[Dict]:
+    """
+    Check one query.sql for reads of partitioned sources without a partition filter.
+
+    Returns:
+        Findings (warnings and errors only) with file, line, column, query, source,
+        field, filter ("parameter", "other" or None), severity and message
+    """
+    path = Path(query_path)
+    parts = path.resolve().parts
+    project, dataset, table = parts[-4:-1] if len(parts) >= 4 else (DEFAULT_PROJECT, "", "")
+    try:
+        sql = mask_sql_noise(path.read_text())
+    except OSError as e:
+        print(f"Warning: Could not read {query_path}: {e}", file=sys.stderr)
+        return []
+
+    metadata = read_yaml(path.parent / "metadata.yaml")
+    full_refresh = "date_partition_parameter" in (metadata.get("scheduling") or {}) and (
+        metadata["scheduling"]["date_partition_parameter"] is None
+    )
+    ctes = set(extract_cte_names(sql))
+    aliases = extract_table_aliases(sql)
+
+    findings = []
+    seen = set()
+    for match in _TABLE_REF_RE.finditer(sql):
+        reference = match.group(1).replace("`", "")
+        names = reference.split(".")
+        if len(names) == 2:
+            fqn = f"{project}.{reference}"
+        elif len(names) == 3:
+            fqn = reference
+        else:
+            continue
+        if reference in ctes or fqn in seen:
+            continue
+        seen.add(fqn)
+
+        partitioning = source_partitioning(sql_dir, fqn)
+        if not partitioning:
+            continue
+
+        qualifiers = [reference, names[-1]] + [a for a, t in aliases.items() if t == reference]
+        kind = partition_filter(sql, partitioning["field"], qualifiers)
+        if kind == "parameter":
+            continue
+
+        source = ".".join(fqn.split(".")[1:])
+        if kind == "other":
+            severity = "warning"
+            message = (
+                f"{dataset}.{table} filters {source} on {partitioning['field']} without a query "
+                f"parameter; use @submission_date so each run prunes to its partition"
+            )
+        else:
+            severity = "warning" if full_refresh else "error"
+            message = f"{dataset}.{table} scans every partition of {source} (no filter on {partitioning['field']})"
+            if full_refresh:
+                message += "; full refresh query (date_partition_parameter: null)"
+            if partitioning["require_partition_filter"]:
+                message += "; the source requires a partition filter, so the query will fail"
+
+        start = match.start(1)
+        findings.append({
+            "file": query_path,
+            "line": sql.count("\n", 0, start) + 1,
+            "column": start - (sql.rfind("\n", 0, start) + 1) + 1,
+            "query": f"{dataset}.{table}",
+            "source": source,
+            "field": partitioning["field"],
+            "filter": kind,
+            "severity": severity,
+            "message": message,
+        })
+    return findings
+
+
+def check_paths(
+    paths: List[str],
+    sql_dir: str = DEFAULT_SQL_DIR,
+    changed_since: Optional[str] = None,
+    allowlist: Optional[List[Tuple[str, Optional[str]]]] = None,
+    jobs: Optional[int] = None,
+) -> Tuple[List[Dict], int]:
+    """
+    Check query.sql files and directories (every _derived query.sql under them).
+
+    Returns:
+        (findings not covered by the allowlist, number of files checked)
+    """
+    targets = []
+    for path in paths:
+        if os.path.isdir(path):
+            targets.extend(find_lint_targets(path, changed_since))
+        else:
+            targets.append(path)
+
+    check = partial(check_query_file, sql_dir=sql_dir)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(targets) < PARALLEL_THRESHOLD:
+        per_file = list(map(check, targets))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            chunksize = max(1, len(targets) // (jobs * 4))
+            per_file = list(executor.map(check, targets, chunksize=chunksize))
+
+    findings = [f for file_findings in per_file for f in file_findings]
+    findings = [f for f in findings if not is_allowlisted(f, allowlist or [])]
+    return findings, len(targets)
+
+
+def format_output(findings: List[Dict], files_checked: int, output_format: str = "text") -> str:
+    """Format findings as text, JSON or SARIF 2.1.0."""
+    if output_format == "json":
+        return json.dumps({"files_checked": files_checked, "findings": findings}, indent=2)
+
+    if output_format == "sarif":
+        sarif = {
+            "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+            "version": "2.1.0",
+            "runs": [{
+                "tool": {
+                    "driver": {
+                        "name": "check_partition_pruning",
+                        "rules": [{
+                            "id": RULE_ID,
+                            "shortDescription": {"text": "Query does not prune a partitioned source"},
+                            "helpUri": "https://mozilla.github.io/bigquery-etl/reference/recommended_practices/",
+                        }],
+                    }
+                },
+                "results": [
+                    {
+                        "ruleId": RULE_ID,
+                        "level": f["severity"],
+                        "message": {"text": f["message"]},
+                        "locations": [{
+                            "physicalLocation": {
+                                "artifactLocation": {"uri": f["file"]},
+                                "region": {"startLine": f["line"], "startColumn": f["column"]},
+                            }
+                        }],
+                    }
+                    for f in findings
+                ],
+            }],
+        }
+        return json.dumps(sarif, indent=2)
+
+    output = [f"{f['file']}:{f['line']}:{f['column']}: {f['severity']}: {f['message']}" for f in findings]
+    errors = sum(1 for f in findings if f["severity"] == "error")
+    output.append("")
+    output.append(
+        f"{errors} full scan(s), {len(findings) - errors} warning(s) in {files_checked} queries checked"
+    )
+    return "\n".join(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Flag queries that scan every partition of a day-partitioned source",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        help="query.sql files, or directories to scan for _derived query.sql files"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Root of the bigquery-etl sql/ tree for source metadata.yaml (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="For directories, only check query.sql files changed since this git ref"
+    )
+    parser.add_argument(
+        "--allowlist",
+        metavar="PATH",
+        help="File of allowed reads (<query> or <query>:<source>, fnmatch patterns)"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of worker processes for large batches (default: CPU count)"
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Exit non-zero on warnings as well as errors"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "text", "sarif"],
+        default="text",
+        help="Output format (default: text)"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        findings, files_checked = check_paths(
+            args.paths, args.sql_dir, args.changed_since, load_allowlist(args.allowlist), args.jobs
+        )
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    print(format_output(findings, files_checked, args.format))
+    failing = findings if args.strict else [f for f in findings if f["severity"] == "error"]
+    sys.exit(1 if failing else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Static Bytes-Scanned Estimator
+
+Estimates how many bytes one run of a draft query.sql will process, without a
+BigQuery dry run, and points at the sources and columns that dominate the cost.
+It combines:
+
+    1. Source tables and the columns read from each (parsed from the SQL)
+    2. Column types from local schema.yaml files (to weigh columns against each other)
+    3. Row/byte/partition counts from a local table-statistics snapshot
+
+Per source, the estimate is the table's bytes per partition when the query filters
+on the partition column (the whole table otherwise), times the share of the row
+width taken by the columns the query reads. `SELECT *` from a source counts every
+column. Sources missing from the snapshot are listed but not estimated.
+
+The snapshot uses the same format as
+model-requirements/scripts/check_aggregated_alternatives.py --stats (JSON or CSV,
+table- or partition-level, e.g. an export of INFORMATION_SCHEMA.PARTITIONS).
+
+This is a static approximation: it does not see clustering, column compression or
+filters other than the partition column. Confirm with `./bqetl query validate`
+(dry run) once the query is final.
+
+Usage:
+    python scripts/estimate_query_cost.py <query.sql> --stats <snapshot> [--sql-dir sql]
+
+Examples:
+    # Estimate a draft query
+    python scripts/estimate_query_cost.py sql/moz-fx-data-shared-prod/telemetry_derived/my_table_v1/query.sql --stats table_stats.csv
+
+    # Show the 10 most expensive columns per source, as JSON
+    python scripts/estimate_query_cost.py query.sql --stats table_stats.json --top-columns 10 --format json
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(SKILLS_DIR / "model-requirements" / "scripts"))
+from check_aggregated_alternatives import (  # noqa: E402
+    DEFAULT_SQL_DIR,
+    column_shares,
+    flatten_schema_fields,
+    format_bytes,
+    is_raw_table,
+    load_table_schema,
+    load_table_stats,
+    parse_table_identifier,
+    query_columns_by_source,
+    read_query_sql,
+)
+from datahub_lineage import read_lineage_sql  # noqa: E402
+from check_partition_pruning import partition_filter, source_partitioning  # noqa: E402
+from extract_query_fields import extract_source_tables, extract_table_aliases  # noqa: E402
+
+
+DEFAULT_TOP_COLUMNS = 5
+# Partition columns assumed when a source has no local metadata.yaml partition field
+DEFAULT_PARTITION_FIELDS = ("submission_timestamp", "submission_date")
+# A source is flagged when it accounts for at least this share of the total estimate
+MAJOR_CONTRIBUTOR_SHARE = 0.25
+
+
+def partition_fields(sql_dir: str, fqn: str) -> List[str]:
+    """Return the table's time partitioning column, or the usual defaults when unknown."""
+    partitioning = source_partitioning(sql_dir, fqn)
+    return [partitioning["field"]] if partitioning else list(DEFAULT_PARTITION_FIELDS)
+
+
+def has_partition_filter(sql: str, fields: List[str], qualifiers: Optional[List[str]] = None) -> bool:
+    """Check whether the query filters on any of the partition columns (see check_partition_pruning.py)."""
+    return any(partition_filter(sql, field, qualifiers) for field in fields)
+
+
+def star_sources(sql: str, sources: List[str]) -> List[str]:
+    """Return the sources read with SELECT * (or alias.*) directly."""
+    starred = set()
+    for table in re.findall(
+        r"SELECT\s+(?:DISTINCT\s+)?\*(?:\s+(?:EXCEPT|REPLACE)\s*\([^)]*\))?\s+FROM\s+([`\w\-\.]+)",
+        sql,
+        re.IGNORECASE,
+    ):
+        starred.add(table.replace("`", ""))
+
+    aliases = extract_table_aliases(sql)
+    for qualifier in re.findall(r"\b(\w+)\.\*", sql):
+        starred.add(aliases.get(qualifier, qualifier))
+
+    return [source for source in sources if source in starred]
+
+
+def estimate_query_cost(
+    query_path: str,
+    stats: Dict[str, Dict],
+    sql_dir: str = DEFAULT_SQL_DIR,
+    top_columns: int = DEFAULT_TOP_COLUMNS,
+) -> Dict:
+    """
+    Estimate bytes processed per run of a query, broken down by source and column.
+
+    Returns:
+        Dict with query, total_bytes (sum of estimated sources), unestimated (sources
+        without stats) and sources: one entry per source table with columns,
+        select_star, partition_filter, bytes, share, top_columns and warnings,
+        sorted by estimated bytes
+    """
+    sql = read_query_sql(query_path, sql_dir)
+    # read_lineage_sql drops EXTRACT(... FROM ...), which would read as a table
+    sources = extract_source_tables(read_lineage_sql(Path(query_path), sql_dir))
+    columns_by_source = query_columns_by_source(sql, sources, sql_dir)
+    starred = star_sources(sql, sources)
+    aliases = extract_table_aliases(sql)
+
+    entries = []
+    for source in sources:
+        try:
+            parsed = parse_table_identifier(source)
+        except ValueError:
+            continue
+        fqn = parsed["full_name"]
+        schema = load_table_schema(sql_dir, fqn)
+        table_stats = stats.get(fqn)
+        select_star = source in starred
+        columns = columns_by_source.get(source, [])
+        if select_star and schema:
+            columns = [
+                c for c in flatten_schema_fields(schema.get("fields", []))
+                if "." not in c
+            ]
+
+        partitioned = bool(table_stats and (table_stats["partitions"] or 0) > 1)
+        qualifiers = [source, parsed["table"]] + [alias for alias, table in aliases.items() if table == source]
+        partition_filter = has_partition_filter(sql, partition_fields(sql_dir, fqn), qualifiers)
+
+        entry = {
+            "table": parsed["short_name"],
+            "columns": columns,
+            "select_star": select_star,
+            "partition_filter": partition_filter,
+            "bytes": None,
+            "top_columns": [],
+            "warnings": [],
+        }
+
+        if table_stats:
+            scanned = table_stats["bytes"]
+            if partitioned and partition_filter:
+                scanned /= table_stats["partitions"]
+
+            shares = None if select_star else column_shares(table_stats, schema, columns)
+            if shares is not None:
+                entry["bytes"] = int(scanned * min(sum(shares.values()), 1.0))
+                ranked = sorted(shares.items(), key=lambda item: -item[1])[:top_columns]
+                entry["top_columns"] = [
+                    {"column": column, "bytes": int(scanned * share)} for column, share in ranked
+                ]
+            else:
+                entry["bytes"] = int(scanned)
+        else:
+            entry["warnings"].append("no stats in snapshot")
+
+        if partitioned and not partition_filter:
+            entry["warnings"].append(
+                f"no filter on partition column ({', '.join(partition_fields(sql_dir, fqn))}): full table scan"
+            )
+        if select_star:
+            entry["warnings"].append("SELECT * reads every column")
+        if is_raw_table(parsed["dataset"], parsed["table"])[0]:
+            entry["warnings"].append("raw _live/_stable source (see check_aggregated_alternatives.py)")
+        if not schema and not select_star and table_stats and not table_stats["column_bytes"]:
+            entry["warnings"].append("no schema.yaml: assumed every column is read")
+
+        entries.append(entry)
+
+    total = sum(e["bytes"] for e in entries if e["bytes"] is not None)
+    for entry in entries:
+        entry["share"] = round(entry["bytes"] / total, 4) if total and entry["bytes"] is not None else None
+        if entry["share"] is not None and entry["share"] >= MAJOR_CONTRIBUTOR_SHARE and len(entries) > 1:
+            entry["warnings"].insert(0, f"{entry['share']:.0%} of the estimated total")
+
+    entries.sort(key=lambda e: -(e["bytes"] or 0))
+    return {
+        "query": query_path,
+        "total_bytes": total,
+        "unestimated": [e["table"] for e in entries if e["bytes"] is None],
+        "sources": entries,
+    }
+
+
+def format_output(result: Dict, output_format: str = "text") -> str:
+    """Format the estimate as JSON or text."""
+    if output_format == "json":
+        return json.dumps(result, indent=2)
+
+    output = [
+        f"Estimated bytes processed per run: {format_bytes(result['total_bytes'])}",
+        f"Query: {result['query']}",
+        "",
+    ]
+    if result["unestimated"]:
+        output.append(f"⚠️  Not estimated (no stats): {', '.join(result['unestimated'])}")
+        output.append("")
+
+    for entry in result["sources"]:
+        share = f" ({entry['share']:.0%})" if entry["share"] is not None else ""
+        output.append(f"• {entry['table']}: {format_bytes(entry['bytes'])}{share}")
+        output.append(
+            f"    {'all' if entry['select_star'] else len(entry['columns'])} columns read, "
+            f"partition filter: {'yes' if entry['partition_filter'] else 'no'}"
+        )
+        for column in entry["top_columns"]:
+            output.append(f"      {column['column']}: {format_bytes(column['bytes'])}")
+        for warning in entry["warnings"]:
+            output.append(f"    ⚠️  {warning}")
+        output.append("")
+
+    return "\n".join(output).rstrip()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Estimate bytes processed by a query.sql from local schemas and table stats",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "query",
+        help="Path to the query.sql to estimate"
+    )
+    parser.add_argument(
+        "--stats",
+        metavar="PATH",
+        required=True,
+        help="Table-statistics snapshot (JSON or CSV)"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Root of the bigquery-etl sql/ tree for schema.yaml and metadata.yaml (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--top-columns",
+        type=int,
+        default=DEFAULT_TOP_COLUMNS,
+        help=f"Most expensive columns to list per source (default: {DEFAULT_TOP_COLUMNS})"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "text"],
+        default="text",
+        help="Output format (default: text)"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        stats = load_table_stats(args.stats)
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not load table stats {args.stats}: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    try:
+        result = estimate_query_cost(args.query, stats, args.sql_dir, args.top_columns)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(format_output(result, args.format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Minimal Fixture Generator
+
+Writes the smallest input fixtures that exercise every column a query reads,
+plus query_params.yaml, for a new tests/sql/<project>/<dataset>/<table>/<test_name>/
+directory. Values are typed placeholders to edit into the test scenario; expect.yaml
+is not generated (run the test and check the output, see common_test_failures.md).
+
+For each table the query reads (FROM/JOIN, named exactly as referenced so the
+fixture replaces it):
+    - Columns come from the query's column references (table and UNNEST aliases
+      resolved); unqualified columns go to the sources whose schema has them.
+    - Types, modes and nesting come from the table's schema.yaml in the sql/ tree.
+      RECORD columns contain only the referenced subfields (all of them when the
+      record is referenced as a whole); REPEATED columns get one element.
+      Without a schema.yaml, types are guessed from column names and paths read
+      through UNNEST become arrays.
+    - The partition column is always included. When the query filters it with a
+      parameter, the read window comes from the predicates of the SELECT that
+      reads the table (DATE_SUB(@submission_date, INTERVAL 1 DAY) reads the day
+      before): one row falls inside that window and a second just outside it, so
+      the filter is exercised. Otherwise the row falls on the parameter date.
+
+Output follows references/yaml_format_guide.md: array syntax, double-quoted
+strings, dates as "YYYY-MM-DD", timestamps as "YYYY-MM-DD HH:MM:SS", three-part
+versions, explicit null only where a column cannot be synthesized.
+
+Usage:
+    python scripts/generate_fixtures.py <path/to/query.sql> [--output DIR] [options]
+
+Examples:
+    # Print the fixtures
+    python scripts/generate_fixtures.py sql/moz-fx-data-shared-prod/telemetry_derived/clients_last_seen_v1/query.sql
+
+    # Write them into a new test directory
+    python scripts/generate_fixtures.py sql/moz-fx-data-shared-prod/telemetry_derived/clients_last_seen_v1/query.sql \\
+        --output tests/sql/moz-fx-data-shared-prod/telemetry_derived/clients_last_seen_v1/test_basic
+
+    # Another parameter date
+    python scripts/generate_fixtures.py path/to/query.sql --date 2024-06-01
+"""
+
+import argparse
+import json
+import re
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(SKILLS_DIR / "glean-description-lookup" / "scripts"))
+sys.path.insert(0, str(SKILLS_DIR / "query-writer" / "scripts"))
+sys.path.insert(0, str(SKILLS_DIR / "metadata-manager" / "scripts"))
+from check_partition_pruning import (  # noqa: E402
+    DEFAULT_PROJECT,
+    mask_sql_noise,
+    read_yaml,
+    source_partitioning,
+)
+from extract_query_fields import (  # noqa: E402
+    extract_column_references,
+    extract_cte_names,
+    extract_source_tables,
+    extract_table_aliases,
+    extract_unnest_aliases,
+    strip_comments,
+    strip_jinja,
+    strip_string_literals,
+)
+from datahub_lineage import read_lineage_sql  # noqa: E402
+from render_jinja import render_sql  # noqa: E402
+from recommend_partitioning import read_window  # noqa: E402
+
+
+DEFAULT_SQL_DIR = "sql"
+DEFAULT_DATE = "2025-01-01"  # matches assets/query_params_example.yaml
+DEFAULT_PARTITION_PARAMETER = "submission_date"
+HEADER = "# Generated by generate_fixtures.py: placeholder values, edit them into the test scenario"
+
+_PARAMETER_RE = re.compile(r"@(\w+)")
+_SOURCE_RE = re.compile(r"\b(?:FROM|JOIN)\s+([`\w\-][`\w\-\.]*)", re.IGNORECASE)
+_SCOPE_TOKEN_RE = re.compile(r"[();]|\b(?:UNION|INTERSECT|EXCEPT)\b", re.IGNORECASE)
+_SUBQUERY_RE = re.compile(r"\(\s*(?:SELECT|WITH)\b", re.IGNORECASE)
+# SELECT * with its EXCEPT/REPLACE list, which read_scope would take for a set operator
+_STAR_RE = re.compile(r"\bSELECT\s+(?:DISTINCT\s+)?\*(?:\s*(?:EXCEPT|REPLACE)\s*\([^)]*\))?", re.IGNORECASE)
+
+
+def guess_type(name: str) -> str:
+    """Column type from its name, for sources without a schema.yaml."""
+    name = name.lower()
+    if name.endswith("_timestamp") or name in ("timestamp", "submission_timestamp"):
+        return "TIMESTAMP"
+    if name.endswith("_date") or name == "date":
+        return "DATE"
+    if name in ("sample_id",) or name.endswith(("_count", "_sum", "_seconds", "_ms")) or name.startswith("n_"):
+        return "INTEGER"
+    return "STRING"
+
+
+def placeholder(name: str, field_type: str, day: date) -> object:
+    """Placeholder value for a column of the given BigQuery type."""
+    field_type = field_type.upper()
+    if field_type in ("INTEGER", "INT64"):
+        return 1
+    if field_type in ("FLOAT", "FLOAT64", "NUMERIC", "BIGNUMERIC"):
+        return 1.5
+    if field_type in ("BOOLEAN", "BOOL"):
+        return True
+    if field_type == "DATE":
+        return day.isoformat()
+    if field_type in ("TIMESTAMP", "DATETIME"):
+        return f"{day.isoformat()} 00:00:00"
+    if field_type == "TIME":
+        return "00:00:00"
+    if field_type == "JSON":
+        return "{}"
+    if field_type == "GEOGRAPHY":
+        return "POINT(0 0)"
+    if field_type == "BYTES":
+        return "AA=="
+    if "version" in name.lower():
+        return "120.0.0"  # three-part versions are not parsed as floats
+    return f"{name}_1"
+
+
+def path_tree(paths: Set[str]) -> Dict:
+    """Nest dotted column paths: {"client_info": {"client_id": {}}, "sample_id": {}}."""
+    tree: Dict = {}
+    for path in sorted(paths):
+        node = tree
+        for part in path.split("."):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def synthesize(fields: List[Dict], wanted: Optional[Dict], day: date, missing: List[str], prefix: str = "") -> Dict:
+    """
+    Build a row from schema fields, keeping only wanted columns.
+
+    Args:
+        wanted: Nested path tree of columns to keep; None or {} keeps every field
+        missing: Collects wanted paths that are not in the schema
+    """
+    by_name = {field.get("name"): field for field in fields}
+    keep_all = not wanted
+    row = {}
+    for name in (by_name if keep_all else wanted):
+        field = by_name.get(name)
+        if field is None:
+            missing.append(f"{prefix}{name}")
+            continue
+        field_type = str(field.get("type", "STRING")).upper()
+        if field_type in ("RECORD", "STRUCT"):
+            value = synthesize(field.get("fields") or [], None if keep_all else wanted[name], day, missing, f"{prefix}{name}.")
+        else:
+            value = placeholder(name, field_type, day)
+        row[name] = [value] if str(field.get("mode", "")).upper() == "REPEATED" else value
+    return row
+
+
+def guessed_row(wanted: Dict, repeated: Set[str], day: date, prefix: str = "") -> Dict:
+    """Build a row from referenced paths alone, guessing types; paths in repeated become arrays."""
+    row = {}
+    for name, children in wanted.items():
+        path = f"{prefix}{name}"
+        value = guessed_row(children, repeated, day, f"{path}.") if children else placeholder(name, guess_type(name), day)
+        row[name] = [value] if path in repeated else value
+    return row
+
+
+def set_path(row: Dict, path: str, value) -> None:
+    """Set a top-level or nested (non-repeated) column in a row."""
+    *parents, leaf = path.split(".")
+    for part in parents:
+        row = row.setdefault(part, {})
+    row[leaf] = value
+
+
+def read_scope(sql: str, position: int) -> str:
+    """
+    The SELECT around position: its enclosing parentheses or statement, cut at
+    set operators, with nested subqueries blanked so their predicates are left out.
+    """
+    start, depth = 0, 0
+    for match in reversed(list(_SCOPE_TOKEN_RE.finditer(sql, 0, position))):
+        if match.group() == ")":
+            depth += 1
+        elif match.group() == "(" and depth:
+            depth -= 1
+        elif depth == 0:
+            start = match.end()
+            break
+    end, depth = len(sql), 0
+    for match in _SCOPE_TOKEN_RE.finditer(sql, position):
+        if match.group() == "(":
+            depth += 1
+        elif match.group() == ")" and depth:
+            depth -= 1
+        elif depth == 0:
+            end = match.start()
+            break
+
+    scope = list(sql[start:end])
+    for match in _SUBQUERY_RE.finditer(sql, start, end):
+        depth = 0
+        for i in range(match.start(), end):
+            depth += {"(": 1, ")": -1}.get(sql[i], 0)
+            if depth == 0:
+                scope[match.start() + 1 - start:i - start] = " " * (i - match.start() - 1)
+                break
+    return "".join(scope)
+
+
+def source_scopes(sql: str, reference: str) -> List[str]:
+    """The SELECTs reading a table (see read_scope), or the whole query when no FROM/JOIN names it."""
+    scopes = [
+        read_scope(sql, match.start())
+        for match in _SOURCE_RE.finditer(sql)
+        if match.group(1).replace("`", "") == reference
+    ]
+    return scopes or [sql]
+
+
+def generate_fixtures(query_path: Path, sql_dir: str = DEFAULT_SQL_DIR, day: date = date.fromisoformat(DEFAULT_DATE)) -> Dict:
+    """
+    Generate fixtures and query parameters for a query.
+
+    Returns:
+        Dict with files (file name -> rows) and warnings
+    """
+    parts = query_path.resolve().parts
+    project = parts[-4] if len(parts) >= 4 else DEFAULT_PROJECT
+    raw_sql = render_sql(query_path.read_text(), sql_dir)
+    sql = strip_string_literals(strip_jinja(strip_comments(raw_sql)))
+    masked = mask_sql_noise(raw_sql)
+    ctes = set(extract_cte_names(sql))
+    aliases = extract_table_aliases(sql)
+    unnested = []  # (table or None, array path) read through UNNEST
+    for path in extract_unnest_aliases(sql).values():
+        first, _, rest = path.partition(".")
+        unnested.append((aliases[first], rest) if rest and first in aliases else (None, path))
+    # EXTRACT(<part> FROM <column>) reads like a FROM clause, so tables come from the lineage view of the SQL
+    references = [reference for reference in extract_source_tables(read_lineage_sql(query_path, sql_dir)) if reference not in ctes]
+    columns = extract_column_references(sql)
+    # SELECT * / <alias>.* reads every column of the table
+    star = {
+        source.group(1).replace("`", "")
+        for match in _STAR_RE.finditer(sql)
+        for source in _SOURCE_RE.finditer(read_scope(sql, match.end()))
+    } & set(references)
+    star |= {aliases.get(name, name) for name in re.findall(r"([\w`\.\-]+)\.\*", sql)}
+
+    metadata = read_yaml(query_path.parent / "metadata.yaml")
+    parameter = (metadata.get("scheduling") or {}).get("date_partition_parameter", DEFAULT_PARTITION_PARAMETER)
+
+    schemas = {}
+    for reference in references:
+        fqn = reference if reference.count(".") == 2 else f"{project}.{reference}"
+        schema_path = Path(sql_dir).joinpath(*fqn.split(".")) / "schema.yaml"
+        schemas[reference] = (fqn, read_yaml(schema_path).get("fields") if schema_path.exists() else None)
+
+    # Assign column references to sources
+    wanted: Dict[str, Set[str]] = {reference: set() for reference in references}
+    for qualifier, path in columns:
+        if qualifier is not None:
+            if qualifier in wanted:
+                wanted[qualifier].add(path)
+            continue
+        first = path.split(".")[0]
+        owners = [
+            reference for reference, (_, fields) in schemas.items()
+            if fields and any(field.get("name") == first for field in fields)
+        ]
+        if not owners and len(references) == 1 and not schemas[references[0]][1]:
+            owners = references
+        for owner in owners:
+            wanted[owner].add(path)
+
+    files, warnings = {}, []
+    for reference in references:
+        fqn, fields = schemas[reference]
+        partitioning = source_partitioning(sql_dir, fqn)
+        field = partitioning["field"] if partitioning else None
+        paths = set(wanted[reference]) | ({field} if field else set())
+        tree = {} if reference in star else path_tree(paths)
+
+        missing: List[str] = []
+        if fields:
+            row = synthesize(fields, tree, day, missing)
+            if field and field not in row:
+                row[field] = placeholder(field, guess_type(field), day)
+                missing = [path for path in missing if path != field]
+        else:
+            repeated = {path for table, path in unnested if table in (reference, None)}
+            row = guessed_row(tree, repeated, day)
+            warnings.append(f"{reference}: no schema.yaml in {sql_dir}; types guessed from column names")
+        for path in missing:
+            warnings.append(f"{reference}: {path} is not in schema.yaml")
+
+        rows = [row]
+        names = reference.split(".")
+        qualifiers = [reference, names[-1]] + [alias for alias, table in aliases.items() if table == reference]
+        # Every SELECT reading the table must bound it for a row to fall outside what the query reads
+        windows = [read_window(scope, field, qualifiers) for scope in source_scopes(masked, reference)] if field else []
+        if windows and all(windows):
+            firsts, lasts = [first for first, _ in windows], [last for _, last in windows]
+            first = None if None in firsts else min(firsts)
+            last = None if None in lasts else max(lasts)
+            field_type = next((str(f.get("type")) for f in fields or [] if f.get("name") == field), guess_type(field))
+            inside = last if last is not None else max(first, 0)
+            set_path(row, field, placeholder(field, field_type, day + timedelta(days=inside)))
+            outside = json.loads(json.dumps(row))
+            outside_day = day + timedelta(days=first - 1 if first is not None else last + 1)
+            set_path(outside, field, placeholder(field, field_type, outside_day))
+            rows.append(outside)
+        files[f"{reference}.yaml"] = rows
+
+    parameters = sorted(set(_PARAMETER_RE.findall(masked)))
+    if parameters:
+        params = []
+        for name in parameters:
+            if name == parameter or name.endswith("_date"):
+                params.append({"name": name, "type": "DATE", "value": day.isoformat()})
+            else:
+                params.append({"name": name, "type": "STRING", "value": ""})
+                warnings.append(f"query_params.yaml: set the type and value of @{name}")
+        files["query_params.yaml"] = params
+
+    return {"files": files, "warnings": warnings}
+
+
+def _scalar(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return json.dumps(value)  # double-quoted, YAML-compatible escapes
+
+
+def _emit_mapping(mapping: Dict, indent: int, first_prefix: str, lines: List[str]) -> None:
+    """Emit a mapping; the first key is written after first_prefix (e.g. "- ")."""
+    pad = " " * indent
+    for i, (key, value) in enumerate(mapping.items()):
+        lead = first_prefix if i == 0 else " " * len(first_prefix)
+        if isinstance(value, dict) and value:
+            lines.append(f"{pad}{lead}{key}:")
+            _emit_mapping(value, indent + len(lead) + 2, "", lines)
+        elif isinstance(value, list) and value:
+            lines.append(f"{pad}{lead}{key}:")
+            _emit_list(value, indent + len(lead) + 2, lines)
+        else:
+            empty = "[]" if isinstance(value, list) else "{}" if isinstance(value, dict) else _scalar(value)
+            lines.append(f"{pad}{lead}{key}: {empty}")
+
+
+def _emit_list(items: List, indent: int, lines: List[str]) -> None:
+    for item in items:
+        if isinstance(item, dict) and item:
+            _emit_mapping(item, indent, "- ", lines)
+        else:
+            lines.append(f"{' ' * indent}- {_scalar(item)}")
+
+
+def to_yaml(rows: List[Dict], file_name: str) -> str:
+    """Render rows in the fixture style of yaml_format_guide.md."""
+    lines = [HEADER, f"# File: {file_name}"]
+    _emit_list(rows, 0, lines)
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate minimal input fixtures and query_params.yaml for a query's unit test",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "query",
+        help="Path to query.sql (sql/<project>/<dataset>/<table>/query.sql)"
+    )
+    parser.add_argument(
+        "--output",
+        metavar="DIR",
+        help="Test directory to write the files to (default: print them)"
+    )
+    parser.add_argument(
+        "--date",
+        default=DEFAULT_DATE,
+        type=date.fromisoformat,
+        help=f"Partition parameter date (default: {DEFAULT_DATE})"
+    )
+    parser.add_argument(
+        "--sql-dir",
+        default=DEFAULT_SQL_DIR,
+        help=f"Root of the bigquery-etl sql/ tree (default: {DEFAULT_SQL_DIR})"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Overwrite existing files in --output"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "yaml"],
+        default="yaml",
+        help="Output format when printing (default: yaml)"
+    )
+
+    args = parser.parse_args()
+
+    query_path = Path(args.query)
+    if not query_path.exists():
+        print(f"Error: Query not found: {args.query}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        result = generate_fixtures(query_path, args.sql_dir, args.date)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for warning in result["warnings"]:
+        print(f"Warning: {warning}", file=sys.stderr)
+
+    if args.output:
+        output_dir = Path(args.output)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        written = 0
+        for file_name, rows in result["files"].items():
+            path = output_dir / file_name
+            if path.exists() and not args.force:
+                print(f"Warning: {path} exists, skipped (use --force to overwrite)", file=sys.stderr)
+                continue
+            path.write_text(to_yaml(rows, file_name))
+            print(f"✅ Wrote {path}")
+            written += 1
+        if written:
+            print("Next: add expect.yaml (see references/common_test_failures.md) and run pytest on the directory")
+    elif args.format == "json":
+        print(json.dumps(result, indent=2))
+    else:
+        print("\n".join(to_yaml(rows, file_name) for file_name, rows in result["files"].items()).rstrip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Test Impact Analysis for SQL Unit Tests
+
+Selects the tests/sql/ directories a change can affect, so CI can run a handful
+of test cases instead of the whole suite.
+
+A test in tests/sql/<project>/<dataset>/<table>/<test_name>/ runs the table's
+query.sql against the fixtures in its directory. Every table the query reads is
+replaced by a fixture when one exists; otherwise its definition runs too: views
+are expanded (following lineage upstream until a fixture or a base table is hit)
+and UDFs are inlined. A test is selected when the change touches:
+
+    - the tested table (query.sql, metadata.yaml, schema.yaml, ...)
+    - a view the test executes because it has no fixture for it
+    - a UDF (mozfun.*, udf.*, udf_js.*) called by the executed SQL, directly or
+      through other UDFs
+    - a file in the test directory (fixtures, expect.yaml, query_params.yaml)
+    - the schema.yaml of a table the test has a fixture for (the fixture may no
+      longer match the table)
+
+Changes to the test framework (bigquery_etl/, conftest.py, pytest.ini,
+requirements) select the whole suite. Tables a test neither mocks nor can expand
+are reported: such tests read production data (see
+references/preventing_production_queries.md).
+
+Usage:
+    python scripts/select_affected_tests.py [--changed-since REF] [files...] [options]
+
+Examples:
+    # Tests affected by the current branch, from the bigquery-etl root
+    python scripts/select_affected_tests.py --changed-since origin/main
+
+    # For explicit files
+    python scripts/select_affected_tests.py sql/moz-fx-data-shared-prod/telemetry_derived/clients_daily_v1/query.sql
+
+    # Paths only, to pass to pytest
+    pytest $(python scripts/select_affected_tests.py --changed-since origin/main --format paths)
+"""
+
+import argparse
+import fnmatch
+import json
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(SKILLS_DIR / "metadata-manager" / "scripts"))
+from datahub_lineage import (  # noqa: E402
+    extract_source_tables,
+    read_lineage_sql,
+    resolve_table_reference,
+)
+from extract_query_fields import strip_comments, strip_jinja, strip_string_literals  # noqa: E402
+from render_jinja import render_sql_both_modes  # noqa: E402
+
+
+DEFAULT_TESTS_DIR = "tests/sql"
+FULL_SUITE_PATTERNS = (
+    "bigquery_etl/*",
+    "conftest.py",
+    "tests/conftest.py",
+    "tests/sql/conftest.py",
+    "pytest.ini",
+    "requirements*.txt",
+)
+FIXTURE_SUFFIXES = (".yaml", ".yml", ".json", ".ndjson")
+UDF_DATASETS = ("udf", "udf_js")
+
+_UDF_CALL_RE = re.compile(
+    r"\b(?:`?[\w\-]+`?\.)?(mozfun\.\w+\.\w+|(?:udf|udf_js)\.\w+)\s*\(",
+    re.IGNORECASE,
+)
+
+
+def git_changed_files(repo: Path, ref: str) -> List[str]:
+    """Files changed (including deleted) between ref and the working tree, relative to repo."""
+    toplevel = Path(subprocess.run(
+        ["git", "rev-parse", "--show-toplevel"],
+        cwd=repo, capture_output=True, text=True, check=True,
+    ).stdout.strip())
+    changed = subprocess.run(
+        ["git", "diff", "--name-only", ref, "--", "."],
+        cwd=repo, capture_output=True, text=True, check=True,
+    ).stdout.split()
+    prefix = repo.resolve().relative_to(toplevel.resolve())
+    return [
+        str(Path(name).relative_to(prefix)) if prefix.parts else name
+        for name in changed
+        if not prefix.parts or Path(name).parts[:len(prefix.parts)] == prefix.parts
+    ]
+
+
+def udf_name(parts: Tuple[str, ...]) -> Optional[str]:
+    """UDF name from a sql/<project>/<dataset>/<name>/ path, or None if it is not a UDF directory."""
+    project, dataset, name = parts
+    if project == "mozfun":
+        return f"mozfun.{dataset}.{name}"
+    if dataset in UDF_DATASETS:
+        return f"{dataset}.{name}"
+    return None
+
+
+def classify_changes(files: List[str], tests_dir: str) -> Dict:
+    """
+    Map changed files to what they affect.
+
+    Returns:
+        Dict with tables (changed table fqns), schema_tables (tables whose schema.yaml
+        changed), udfs, test_dirs (changed test directories), table_test_dirs (tables
+        whose test root changed), full_suite (bool) and ignored (files affecting no test)
+    """
+    changes = {
+        "tables": set(), "schema_tables": set(), "udfs": set(), "test_dirs": set(),
+        "table_test_dirs": set(), "full_suite": False, "ignored": [],
+    }
+    tests_parts = Path(tests_dir).parts
+    for name in files:
+        parts = Path(name).parts
+        if parts[:len(tests_parts)] == tests_parts and parts[-1] != "conftest.py":
+            rest = parts[len(tests_parts):]
+            if len(rest) >= 5:
+                changes["test_dirs"].add(str(Path(tests_dir, *rest[:4])))
+            elif len(rest) == 4:
+                changes["table_test_dirs"].add(".".join(rest[:3]))
+            else:
+                changes["ignored"].append(name)
+        elif parts[0] == "sql" and len(parts) >= 5:
+            udf = udf_name(parts[1:4])
+            if udf:
+                changes["udfs"].add(udf)
+            else:
+                fqn = ".".join(parts[1:4])
+                changes["tables"].add(fqn)
+                if parts[-1] == "schema.yaml":
+                    changes["schema_tables"].add(fqn)
+        elif any(fnmatch.fnmatch(name, pattern) for pattern in FULL_SUITE_PATTERNS):
+            changes["full_suite"] = True
+        else:
+            changes["ignored"].append(name)
+    return changes
+
+
+class SqlIndex:
+    """Table definitions and UDF bodies of the sql/ tree, parsed on demand."""
+
+    def __init__(self, sql_dir: Path):
+        self.sql_dir = sql_dir
+        self._parsed: Dict[Path, Tuple[List[str], Set[str]]] = {}
+        self._udf_deps: Optional[Dict[str, Set[str]]] = None
+
+    def definition(self, fqn: str) -> Optional[Path]:
+        """The query.sql or view.sql of a table, if it is in the tree."""
+        table_dir = self.sql_dir.joinpath(*fqn.split("."))
+        for name in ("query.sql", "view.sql"):
+            if (table_dir / name).exists():
+                return table_dir / name
+        return None
+
+    def parse(self, sql_path: Path) -> Tuple[List[str], Set[str]]:
+        """(table references as written, UDFs called) of a SQL file."""
+        if sql_path not in self._parsed:
+            try:
+                raw_sql = sql_path.read_text()
+            except OSError as e:
+                print(f"Warning: Could not read {sql_path}: {e}", file=sys.stderr)
+                raw_sql = ""
+            # read_lineage_sql drops EXTRACT(...) calls, which would hide mozfun.*.extract UDFs
+            sql_dir = str(self.sql_dir)
+            calls = _UDF_CALL_RE.findall(
+                strip_string_literals(strip_jinja(strip_comments(render_sql_both_modes(raw_sql, sql_dir))))
+            )
+            udfs = {call.lower() if call.lower().startswith("mozfun.") else call for call in calls}
+            self._parsed[sql_path] = (extract_source_tables(read_lineage_sql(sql_path, sql_dir)) if raw_sql else [], udfs)
+        return self._parsed[sql_path]
+
+    def udf_dependents(self, udfs: Set[str]) -> Set[str]:
+        """The given UDFs plus every UDF that calls one of them, transitively."""
+        if self._udf_deps is None:
+            self._udf_deps = defaultdict(set)
+            for udf_path in self.sql_dir.glob("*/*/*/udf.sql"):
+                caller = udf_name(udf_path.parts[-4:-1])
+                if caller:
+                    for callee in self.parse(udf_path)[1] - {caller}:
+                        self._udf_deps[callee].add(caller)
+        affected, stack = set(udfs), list(udfs)
+        while stack:
+            for caller in self._udf_deps.get(stack.pop(), ()):
+                if caller not in affected:
+                    affected.add(caller)
+                    stack.append(caller)
+        return affected
+
+
+def fixture_names(test_dir: Path) -> Set[str]:
+    """Table names mocked by fixture files in a test directory."""
+    names = set()
+    for path in test_dir.iterdir():
+        if path.name.endswith(".schema.json") or path.stem in ("expect", "query_params"):
+            continue
+        if path.suffix in FIXTURE_SUFFIXES:
+            names.add(path.stem)
+    return names
+
+
+def test_dependencies(index: SqlIndex, test_dir: Path, fqn: str) -> Dict:
+    """
+    What a test executes besides its fixtures.
+
+    Returns:
+        Dict with tables (tested table and expanded views), udfs, mocked (fqns
+        replaced by fixtures) and unmocked (fqns read from production)
+    """
+    fixtures = fixture_names(test_dir)
+    deps = {"tables": {fqn}, "udfs": set(), "mocked": set(), "unmocked": set()}
+    stack, seen = [fqn], {fqn}
+    while stack:
+        table = stack.pop()
+        sql_path = index.definition(table)
+        if sql_path is None:
+            continue
+        references, udfs = index.parse(sql_path)
+        deps["udfs"] |= udfs
+        for reference in references:
+            source = resolve_table_reference(reference, table.split(".")[0])
+            if not source or source in seen:
+                continue
+            seen.add(source)
+            if {reference, source, ".".join(source.split(".")[1:]), source.split(".")[-1]} & fixtures:
+                deps["mocked"].add(source)
+                continue
+            definition = index.definition(source)
+            if definition is not None and definition.name == "view.sql":
+                deps["tables"].add(source)
+                stack.append(source)
+            else:
+                deps["unmocked"].add(source)
+    return deps
+
+
+def find_test_dirs(tests_dir: Path) -> Dict[str, List[Path]]:
+    """Test directories per table fqn under tests/sql/<project>/<dataset>/<table>/<test>/."""
+    tests = defaultdict(list)
+    for test_dir in sorted(tests_dir.glob("*/*/*/*/")):
+        if test_dir.is_dir():
+            tests[".".join(test_dir.parts[-4:-1])].append(test_dir)
+    return tests
+
+
+def select_tests(repo: Path, files: List[str], tests_dir: str = DEFAULT_TESTS_DIR) -> Dict:
+    """
+    Select the test directories affected by changed files.
+
+    Returns:
+        Dict with changed_files, full_suite, selected (list of path, table, reasons,
+        unmocked), paths (minimal directories to run: a table's test root when all of
+        its tests are selected), total_tests and ignored files
+    """
+    changes = classify_changes(files, tests_dir)
+    tests_root = repo / tests_dir
+    all_tests = find_test_dirs(tests_root) if tests_root.exists() else {}
+    total = sum(len(dirs) for dirs in all_tests.values())
+    result = {
+        "changed_files": len(files),
+        "full_suite": changes["full_suite"],
+        "selected": [],
+        "paths": [tests_dir] if changes["full_suite"] else [],
+        "total_tests": total,
+        "ignored": changes["ignored"],
+    }
+    if changes["full_suite"]:
+        return result
+
+    index = SqlIndex(repo / "sql")
+    changed_udfs = index.udf_dependents(changes["udfs"]) if changes["udfs"] else set()
+    for fqn, test_dirs in sorted(all_tests.items()):
+        for test_dir in test_dirs:
+            relative = str(test_dir.relative_to(repo))
+            deps = test_dependencies(index, test_dir, fqn)
+            reasons = []
+            if relative in changes["test_dirs"] or fqn in changes["table_test_dirs"]:
+                reasons.append("test files changed")
+            if fqn in changes["tables"]:
+                reasons.append("tested query changed")
+            reasons += [f"runs view {view}" for view in sorted((deps["tables"] - {fqn}) & changes["tables"])]
+            reasons += [f"calls UDF {udf}" for udf in sorted(deps["udfs"] & changed_udfs)]
+            reasons += [
+                f"fixture for {table} (schema.yaml changed)" for table in sorted(deps["mocked"] & changes["schema_tables"])
+            ]
+            if reasons:
+                result["selected"].append({
+                    "path": relative,
+                    "table": fqn,
+                    "reasons": reasons,
+                    "unmocked": sorted(deps["unmocked"]),
+                })
+
+    by_table = defaultdict(list)
+    for selected in result["selected"]:
+        by_table[selected["table"]].append(selected["path"])
+    for fqn, paths in sorted(by_table.items()):
+        if len(paths) == len(all_tests[fqn]) and len(paths) > 1:
+            result["paths"].append(str(Path(tests_dir, *fqn.split("."))))
+        else:
+            result["paths"].extend(paths)
+    return result
+
+
+def format_output(result: Dict, output_format: str = "text") -> str:
+    """Format the selection as JSON, pytest paths or text."""
+    if output_format == "json":
+        return json.dumps(result, indent=2)
+    if output_format == "paths":
+        return "\n".join(result["paths"])
+
+    if result["full_suite"]:
+        return f"🧪 Test framework changed: run the whole suite ({result['total_tests']} test(s) in {result['paths'][0]})"
+
+    output = [
+        f"🧪 {len(result['selected'])} of {result['total_tests']} test(s) affected by "
+        f"{result['changed_files']} changed file(s)"
+    ]
+    for selected in result["selected"]:
+        output.append(f"   • {selected['path']}")
+        output.append(f"      {'; '.join(selected['reasons'])}")
+        if selected["unmocked"]:
+            output.append(f"      ⚠️  No fixture for {', '.join(selected['unmocked'])} (reads production)")
+    if result["paths"]:
+        output.append("")
+        output.append("Run:")
+        output.append(f"   pytest {' '.join(result['paths'])}")
+    if result["ignored"]:
+        output.append("")
+        output.append(f"{len(result['ignored'])} changed file(s) affect no SQL test")
+    return "\n".join(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Select the SQL unit test directories affected by changed files",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "files",
+        nargs="*",
+        help="Changed files, relative to --repo (default: from --changed-since)"
+    )
+    parser.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="Use the files changed since this git ref (e.g. origin/main)"
+    )
+    parser.add_argument(
+        "--repo",
+        default=".",
+        help="Root of the bigquery-etl checkout (default: current directory)"
+    )
+    parser.add_argument(
+        "--tests-dir",
+        default=DEFAULT_TESTS_DIR,
+        help=f"SQL test root, relative to --repo (default: {DEFAULT_TESTS_DIR})"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "paths", "text"],
+        default="text",
+        help="Output format (default: text; paths prints one directory per line for pytest)"
+    )
+
+    args = parser.parse_args()
+    if not args.files and not args.changed_since:
+        parser.error("provide changed files or --changed-since")
+
+    repo = Path(args.repo)
+    if not (repo / "sql").exists():
+        print(f"Error: No sql/ directory in {args.repo}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        files = list(args.files)
+        if args.changed_since:
+            files += git_changed_files(repo, args.changed_since)
+        result = select_tests(repo, sorted(set(files)), args.tests_dir)
+    except subprocess.CalledProcessError as e:
+        print(f"Error: git failed: {e.stderr.strip()}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(format_output(result, args.format))
+
+
+if __name__ == "__main__":
+    main()